@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.sinks import ResultSink
+from wash_lang_prototype.wash import Wash
+
+
+STATIC_CONFIGURATION = """
+define configuration static_configuration {
+    description: "Static execution"
+    option browser_type {
+        browser_type: "static"
+    }
+}
+"""
+
+
+@pytest.fixture
+def create_static_script(tmp_path):
+    """
+    Returns a function writing the given HTML document and returning a script executing
+    the given expressions statically (without a browser) against the document.
+    """
+    pytest.importorskip('lxml')
+
+    configuration_path = tmp_path / 'static_configuration.wash'
+    configuration_path.write_text(STATIC_CONFIGURATION, encoding='utf-8')
+    document_path = tmp_path / 'document.html'
+
+    def create(expressions: str, html: str) -> str:
+        document_path.write_text(html, encoding='utf-8')
+        return (f'import "{configuration_path.as_posix()}"\n'
+                f'use configuration static_configuration\n'
+                f'file "{document_path.as_posix()}"\n'
+                f'{expressions}\n')
+
+    return create
+
+
+@pytest.fixture
+def run_static_script(tmp_path, create_static_script):
+    """
+    Returns a function executing the given expressions statically (without a browser)
+    against the given HTML document (optionally writing the items to a result sink),
+    and returning the parsed JSON execution result.
+    """
+    def run(expressions: str, html: str, options: WashOptions = None,
+            result_sink: ResultSink = None) -> dict:
+        script = create_static_script(expressions, html)
+        wash = Wash.from_string(script, options=options or WashOptions(),
+                                script_file_path=str(tmp_path / 'script.wash'))
+        if result_sink:
+            return json.loads(wash.execute(result_sink=result_sink).to_json())
+        return json.loads(wash.execute_as_json())
+
+    return run
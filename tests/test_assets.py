@@ -0,0 +1,57 @@
+from wash_lang_prototype.core.assets import AssetPipeline
+
+
+def read(path) -> bytes:
+    with open(path, 'rb') as asset_file:
+        return asset_file.read()
+
+
+def test_downloads_are_deduplicated_by_url_and_content(tmp_path):
+    image_paths = []
+    for name in ('a.png', 'b.png', 'c.png'):
+        image_paths.append(tmp_path / name)
+        image_paths[-1].write_bytes(b'same' if name != 'c.png' else b'other')
+
+    pipeline = AssetPipeline(directory=str(tmp_path / 'assets'), max_downloads=2)
+    try:
+        locations = [pipeline.download(path.as_uri()).location for path in image_paths]
+        # NOTE: The first URL is no longer remembered, but its content is already stored.
+        image_paths[0].write_bytes(b'same')
+        repeated_location = pipeline.download(image_paths[0].as_uri()).location
+    finally:
+        pipeline.close()
+
+    assert locations[0] == locations[1] == repeated_location
+    assert locations[2] != locations[0]
+    assert read(locations[0]) == b'same'
+    assert read(locations[2]) == b'other'
+
+
+def test_remembered_url_is_not_downloaded_again(tmp_path):
+    image_path = tmp_path / 'a.png'
+    image_path.write_bytes(b'first')
+
+    pipeline = AssetPipeline(directory=str(tmp_path / 'assets'))
+    try:
+        location = pipeline.download(image_path.as_uri()).location
+        image_path.write_bytes(b'second')
+        repeated_location = pipeline.download(image_path.as_uri()).location
+    finally:
+        pipeline.close()
+
+    assert repeated_location == location
+    assert read(location) == b'first'
+
+
+def test_failed_download_is_retried(tmp_path):
+    image_path = tmp_path / 'a.png'
+
+    pipeline = AssetPipeline(directory=str(tmp_path / 'assets'))
+    try:
+        assert pipeline.download(image_path.as_uri()).location is None
+        image_path.write_bytes(b'image')
+        location = pipeline.download(image_path.as_uri()).location
+    finally:
+        pipeline.close()
+
+    assert read(location) == b'image'
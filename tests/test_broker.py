@@ -0,0 +1,132 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from wash_lang_prototype.core.broker import SQLiteJobBroker
+
+
+SCRIPT = 'open "https://example.com"'
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    return str(tmp_path / 'jobs.db')
+
+
+@pytest.fixture
+def create_broker(database_path):
+    brokers = []
+
+    def create(**kwargs) -> SQLiteJobBroker:
+        broker = SQLiteJobBroker(path=database_path, **kwargs)
+        brokers.append(broker)
+        return broker
+
+    yield create
+    for broker in brokers:
+        broker.close()
+
+
+def get_status(broker: SQLiteJobBroker, job_id: str) -> str:
+    return broker.get_jobs([job_id])[0]['status']
+
+
+def test_scripts_are_stored_once(create_broker, database_path):
+    broker = create_broker()
+    job_ids = [broker.enqueue(SCRIPT, url=f'https://example.com/{index}')
+               for index in range(3)]
+    broker.enqueue('open "https://example.org"')
+
+    with closing(sqlite3.connect(database_path)) as connection:
+        assert connection.execute('SELECT COUNT(*) FROM wash_scripts').fetchone()[0] == 2
+
+    job = broker.lease('worker')
+    assert (job.id, job.script, job.url) == (job_ids[0], SCRIPT, 'https://example.com/0')
+
+
+def test_url_filter_skips_jobs(create_broker):
+    broker = create_broker()
+    broker.enqueue(SCRIPT, url='https://example.com/a')
+    job_id = broker.enqueue(SCRIPT, url='https://example.com/b')
+
+    job = broker.lease('worker', url_filter=lambda url: url.endswith('/b'))
+    assert (job.id, job.script) == (job_id, SCRIPT)
+
+
+def test_expired_lease_is_handed_out_again(create_broker):
+    broker = create_broker()
+    job_id = broker.enqueue(SCRIPT)
+
+    expired_job = broker.lease('first', lease_duration=-1)
+    job = broker.lease('second')
+
+    assert (job.id, job.attempts) == (job_id, 2)
+    assert not broker.complete(expired_job, '{}')
+    assert broker.complete(job, '{}')
+    assert get_status(broker, job_id) == 'succeeded'
+
+
+def test_expired_lease_of_last_attempt_fails_job(create_broker):
+    broker = create_broker(max_attempts=2)
+    job_id = broker.enqueue(SCRIPT)
+
+    broker.lease('first', lease_duration=-1)
+    broker.lease('second', lease_duration=-1)
+
+    assert broker.lease('third') is None
+    job = broker.get_jobs([job_id])[0]
+    assert job['status'] == 'failed'
+    assert (job['attempts'], job['error']) == (2, 'Lease expired.')
+
+
+def test_failed_job_is_retried_until_max_attempts(create_broker):
+    broker = create_broker(max_attempts=2)
+    job_id = broker.enqueue(SCRIPT)
+
+    assert broker.fail(broker.lease('worker'), error='Crashed.')
+    assert get_status(broker, job_id) == 'queued'
+    assert broker.fail(broker.lease('worker'), error='Crashed.')
+
+    assert get_status(broker, job_id) == 'failed'
+    assert broker.lease('worker') is None
+
+
+def test_failed_job_without_retry_is_not_queued_again(create_broker):
+    broker = create_broker()
+    job_id = broker.enqueue(SCRIPT)
+
+    assert broker.fail(broker.lease('worker'), error='Invalid script.', retry=False)
+    assert get_status(broker, job_id) == 'failed'
+
+
+def test_postponed_job_is_not_leased_before_delay(create_broker):
+    broker = create_broker()
+    broker.enqueue(SCRIPT)
+
+    assert broker.postpone(broker.lease('worker'), delay=60, error='Throttled.')
+
+    assert broker.lease('worker') is None
+    assert broker.count_queued_jobs() == 1
+
+
+def test_postponed_job_does_not_count_attempt(create_broker):
+    broker = create_broker(max_attempts=1)
+    job_id = broker.enqueue(SCRIPT)
+
+    assert broker.postpone(broker.lease('worker'), delay=0, error='Throttled.')
+    job = broker.lease('worker')
+
+    assert (job.id, job.attempts) == (job_id, 1)
+
+
+def test_job_postponed_too_often_fails(create_broker):
+    broker = create_broker(max_postponements=1)
+    job_id = broker.enqueue(SCRIPT)
+
+    assert broker.postpone(broker.lease('worker'), delay=0, error='Throttled.')
+    assert broker.postpone(broker.lease('worker'), delay=0, error='Throttled.')
+
+    job = broker.get_jobs([job_id])[0]
+    assert (job['status'], job['error']) == ('failed', 'Throttled.')
+    assert broker.lease('worker') is None
@@ -0,0 +1,67 @@
+from wash_lang_prototype.core.incremental import fingerprint_html, get_item_identity, \
+    get_key_identity
+from wash_lang_prototype.core.options import WashOptions
+
+
+ROWS = ("<html><body>"
+        "<div class='row'><a href='/one'>one</a></div>"
+        "<div class='row'><span>two</span></div>"
+        "<div class='row'><span>three</span></div>"
+        "<div class='row'><span>three</span></div>"
+        "</body></html>")
+
+EXPRESSIONS = "?c .row { ?c a : @href -> link  ?c span : text -> text } -> rows"
+
+
+def create_options(tmp_path, incremental_key=None) -> WashOptions:
+    options = WashOptions()
+    options.incremental_state_path = str(tmp_path / 'state.db')
+    options.incremental_key = incremental_key
+    return options
+
+
+def test_key_identity_of_empty_keys_is_none():
+    assert get_key_identity(None) is None
+    assert get_key_identity([]) is None
+    assert get_key_identity('') is None
+    assert get_key_identity('a') == 'a'
+    assert get_key_identity(0) == '0'
+
+
+def test_item_identity_falls_back_to_numbered_fingerprint():
+    identities = set()
+    for key in ('a', [], 'a', []):
+        identities.add(get_item_identity(key, 'f', identities))
+
+    assert identities == {'a', 'f', 'f#1', 'f#2'}
+
+
+def test_missing_and_duplicate_keys_report_no_changes(run_static_script, tmp_path):
+    options = create_options(tmp_path, incremental_key='link')
+
+    first_result = run_static_script(EXPRESSIONS, ROWS, options=options)
+    first_changes = first_result['incremental_changes']['rows']
+    assert len(first_changes['new']) == 4
+    assert len(set(first_changes['new'])) == 4
+
+    for _ in range(2):
+        result = run_static_script(EXPRESSIONS, ROWS, options=options)
+        changes = result['incremental_changes']['rows']
+        assert changes == {'new': [], 'changed': [], 'removed': [], 'unchanged': 4}
+
+
+def test_identical_items_without_key_are_tracked_separately(run_static_script, tmp_path):
+    options = create_options(tmp_path)
+
+    run_static_script(EXPRESSIONS, ROWS, options=options)
+    changed_rows = ROWS.replace('<span>two</span>', '<span>2</span>')
+    result = run_static_script(EXPRESSIONS, changed_rows, options=options)
+    changes = result['incremental_changes']['rows']
+
+    assert changes['unchanged'] == 3
+    assert len(changes['new']) == 1
+    assert len(changes['removed']) == 1
+
+
+def test_fingerprint_is_sha1_of_utf8_html():
+    assert fingerprint_html('<b>café</b>') == '0f4027e3fe1fa5b9d2692d33ec5be4adb01d3313'
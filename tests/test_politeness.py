@@ -0,0 +1,132 @@
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.politeness import HostPolicy, HostState, \
+    PolitenessScheduler, parse_retry_after
+from wash_lang_prototype.core.server import WashServer
+
+
+HOST = 'example.com'
+
+
+def create_scheduler(**policy) -> PolitenessScheduler:
+    return PolitenessScheduler(default_policy=HostPolicy(**policy))
+
+
+def create_state(scheduler: PolitenessScheduler, now: float) -> HostState:
+    return HostState(scheduler.get_policy(HOST), tokens_updated_at=now)
+
+
+def test_token_bucket_allows_burst_and_refills_at_rate():
+    scheduler = create_scheduler(max_concurrency=10, min_delay=0, requests_per_second=2,
+                                 burst=2)
+    state = create_state(scheduler, now=100.0)
+
+    for _ in range(2):
+        assert scheduler.get_state_delay(HOST, state, 100.0) == 0
+        scheduler.start_request(HOST, state, 100.0)
+
+    assert scheduler.get_state_delay(HOST, state, 100.0) == pytest.approx(0.5)
+    assert scheduler.get_state_delay(HOST, state, 100.25) == pytest.approx(0.25)
+    assert scheduler.get_state_delay(HOST, state, 100.5) == 0
+    assert scheduler.get_state_delay(HOST, state, 200.0) == 0
+    assert state.tokens == 2
+
+
+def test_min_delay_separates_request_starts():
+    scheduler = create_scheduler(max_concurrency=10, min_delay=1.0)
+    state = create_state(scheduler, now=100.0)
+
+    scheduler.start_request(HOST, state, 100.0)
+    scheduler.finish_request(HOST, state, 100.1)
+
+    assert scheduler.get_state_delay(HOST, state, 100.4) == pytest.approx(0.6)
+    assert scheduler.get_state_delay(HOST, state, 101.0) == 0
+
+
+def test_max_concurrency_waits_for_running_request():
+    scheduler = create_scheduler(max_concurrency=1, min_delay=0)
+    state = create_state(scheduler, now=100.0)
+
+    scheduler.start_request(HOST, state, 100.0)
+    assert scheduler.get_state_delay(HOST, state, 200.0) == float('inf')
+
+    scheduler.finish_request(HOST, state, 200.0)
+    assert scheduler.get_state_delay(HOST, state, 200.0) == 0
+
+
+def test_throttled_host_is_paused_for_retry_after():
+    scheduler = create_scheduler(min_delay=0)
+    state = create_state(scheduler, now=100.0)
+
+    scheduler.start_request(HOST, state, 100.0)
+    scheduler.finish_request(HOST, state, 100.0, throttled=True, retry_after=30)
+
+    assert scheduler.get_state_delay(HOST, state, 110.0) == pytest.approx(20)
+    assert scheduler.get_state_delay(HOST, state, 130.0) == 0
+
+
+def test_throttled_host_without_retry_after_backs_off_exponentially():
+    scheduler = create_scheduler(min_delay=1.0, max_backoff=5)
+    state = create_state(scheduler, now=100.0)
+
+    pauses = []
+    for _ in range(4):
+        scheduler.start_request(HOST, state, 100.0)
+        scheduler.finish_request(HOST, state, 100.0, throttled=True)
+        pauses.append(state.paused_until - 100.0)
+        state.paused_until = 0.0
+
+    assert pauses == [1, 2, 4, 5]
+
+    scheduler.start_request(HOST, state, 100.0)
+    scheduler.finish_request(HOST, state, 100.0)
+    assert state.throttled_responses == 0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == \
+        pytest.approx(60, abs=2)
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_acquire_waits_for_release():
+    scheduler = create_scheduler(max_concurrency=1, min_delay=0)
+    url = f'https://{HOST}/a'
+
+    assert scheduler.acquire(url)
+    assert not scheduler.acquire(f'https://{HOST}/b', timeout=0.05)
+    assert scheduler.acquire('https://example.org/', timeout=0.05)
+
+    threading.Timer(0.05, scheduler.release, args=(url,)).start()
+    assert scheduler.acquire(f'https://{HOST}/b', timeout=5)
+    assert scheduler.statistics()['requests'] == 3
+
+
+def test_server_jobs_wait_for_their_host(tmp_path, create_static_script):
+    script = create_static_script('?c body { ?c p : text -> text } -> page',
+                                  '<html><body><p>text</p></body></html>')
+
+    server = WashServer(options=WashOptions(), port=0, workers=2,
+                        scheduler=create_scheduler(min_delay=0.3))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        script_file_path = str(tmp_path / 'script.wash')
+        jobs = [server.submit(script=script, script_file_path=script_file_path)
+                for _ in range(2)]
+        for job in jobs:
+            assert job.done.wait(timeout=10)
+    finally:
+        server.shutdown()
+        thread.join()
+
+    assert [job.error for job in jobs] == [None, None]
+    start_times = sorted(job.started_at for job in jobs)
+    assert start_times[1] - start_times[0] >= 0.29
@@ -0,0 +1,24 @@
+ITEMS = ("<html><body>"
+         "<div class='item'><a href='/one'>link</a><span>one</span></div>"
+         "<div class='item'><span>two</span></div>"
+         "<div class='item'><span>three</span></div>"
+         "<div class='item'><a href='/one'>link</a><span>one again</span></div>"
+         "</body></html>")
+
+
+def test_items_without_key_are_deduplicated_by_fingerprint(run_static_script):
+    result = run_static_script(
+        "scroll and collect ?c .item { ?c a : @href -> link  ?c span : text -> text } "
+        "key link -> items", ITEMS)
+
+    texts = [item['text'] for item in result['execution_result']['items']]
+    assert texts == ['one', 'two', 'three']
+
+
+def test_item_count_limits_collected_items(run_static_script):
+    result = run_static_script(
+        "scroll and collect ?c .item { ?c span : text -> text } until count 2 -> items",
+        ITEMS)
+
+    items = result['execution_result']['items']
+    assert [item['text'] for item in items] == ['one', 'two']
@@ -0,0 +1,88 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+import pytest
+
+from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.politeness import HostPolicy, PolitenessScheduler
+from wash_lang_prototype.core.server import WashServer
+
+
+HTML = '<html><body><p>text</p></body></html>'
+
+
+@contextmanager
+def run_server(**kwargs):
+    server = WashServer(options=WashOptions(), port=0, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def post_job(server: WashServer, body) -> tuple[int, dict]:
+    host, port = server.address
+    request = urllib.request.Request(f'http://{host}:{port}/jobs', method='POST',
+                                     data=json.dumps(body).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def job(tmp_path, create_static_script):
+    script = create_static_script('?c body { ?c p : text -> text } -> page', HTML)
+    return {'script': script, 'script_path': str(tmp_path / 'script.wash')}
+
+
+@pytest.mark.parametrize('body', [[], 'script', 42, None])
+def test_request_body_that_is_not_object_is_rejected(body):
+    with run_server() as server:
+        status, response = post_job(server, body)
+
+    assert status == 400
+    assert response == {'error': 'The request body must be a JSON object.'}
+
+
+@pytest.mark.parametrize('wait', ['yes', -1])
+def test_invalid_wait_is_rejected(job, wait):
+    with run_server() as server:
+        status, response = post_job(server, dict(job, wait=wait))
+
+    assert status == 400
+    assert 'wait' in response['error']
+
+
+@pytest.mark.parametrize('wait', [True, 5])
+def test_waiting_returns_finished_job(job, wait):
+    with run_server() as server:
+        status, response = post_job(server, dict(job, wait=wait))
+
+    assert status == 200
+    assert response['error'] is None
+    assert response['result']['execution_result'] == {'page': {'text': 'text'}}
+
+
+def test_waiting_returns_accepted_job_after_timeout(job):
+    # NOTE: The second job waits for the minimum delay between the jobs of the host.
+    scheduler = PolitenessScheduler(default_policy=HostPolicy(min_delay=1.0))
+    with run_server(scheduler=scheduler, wait_timeout=0.2) as server:
+        status, _ = post_job(server, dict(job, wait=True))
+        assert status == 200
+
+        status, response = post_job(server, dict(job, wait=True))
+        assert status == 202
+        assert response['status'] == 'queued'
+
+        accepted_job = server.get_job(response['id'])
+        assert accepted_job.done.wait(timeout=5)
+        assert accepted_job.error is None
@@ -0,0 +1,117 @@
+import csv
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from wash_lang_prototype.core.result import ExecutionResult
+from wash_lang_prototype.core.sinks import ArrowResultSink, CsvResultSink, \
+    SqliteResultSink
+
+
+ROWS = "<html><body>{}</body></html>".format(
+    ''.join(f"<div class='row'><span>{index}</span></div>" for index in range(5)))
+
+
+def read_csv(path) -> list[dict]:
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def test_items_written_to_sink_are_counted_instead_of_kept(run_static_script, tmp_path):
+    with CsvResultSink(path=str(tmp_path / 'output'), batch_size=2) as result_sink:
+        result = run_static_script("?c .row { ?c span : text -> text } -> rows", ROWS,
+                                   result_sink=result_sink)
+
+    assert result['execution_result']['rows'] == 5
+    rows = read_csv(tmp_path / 'output' / 'rows.csv')
+    assert [row['text'] for row in rows] == ['0', '1', '2', '3', '4']
+
+
+def item(**values) -> ExecutionResult:
+    return ExecutionResult(**values)
+
+
+def read_arrow(path, file_format: str):
+    pyarrow = pytest.importorskip('pyarrow')
+    if file_format == 'parquet':
+        from pyarrow import parquet
+        return parquet.read_table(path)
+
+    from pyarrow import ipc
+    with pyarrow.memory_map(str(path)) as source, ipc.open_file(source) as reader:
+        return reader.read_all()
+
+
+def create_arrow_sink(path, file_format: str) -> ArrowResultSink:
+    pytest.importorskip('pyarrow')
+    return ArrowResultSink(path=str(path), file_format=file_format, batch_size=2)
+
+
+def test_csv_sink_rewrites_header_for_late_columns(tmp_path):
+    with CsvResultSink(path=str(tmp_path), batch_size=2) as result_sink:
+        result_sink.write('rows', [item(title='a'), item(title='b')])
+        result_sink.write('rows', [item(title='c', price=3, tags=['x'])])
+
+    assert read_csv(tmp_path / 'rows.csv') == [
+        {'title': 'a', 'price': '', 'tags': ''},
+        {'title': 'b', 'price': '', 'tags': ''},
+        {'title': 'c', 'price': '3', 'tags': '["x"]'},
+    ]
+
+
+def test_csv_sink_writes_scalar_items_into_result_key_column(tmp_path):
+    with CsvResultSink(path=str(tmp_path)) as result_sink:
+        result_sink.write('links', ['a', 'b'])
+
+    assert read_csv(tmp_path / 'links.csv') == [{'links': 'a'}, {'links': 'b'}]
+
+
+def test_sqlite_sink_adds_late_columns(tmp_path):
+    path = str(tmp_path / 'result.db')
+    with SqliteResultSink(path=path, batch_size=2) as result_sink:
+        result_sink.write('rows', [item(title='a'), item(title='b')])
+        result_sink.write('rows', [item(title='c', price=3, nested=item(name='x'))])
+
+    with closing(sqlite3.connect(path)) as connection:
+        rows = connection.execute('SELECT title, price, nested FROM rows').fetchall()
+
+    assert rows == [('a', None, None), ('b', None, None), ('c', 3, '{"name": "x"}')]
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_arrow_sink_rewrites_file_for_late_columns(tmp_path, file_format):
+    with create_arrow_sink(tmp_path, file_format) as result_sink:
+        result_sink.write('rows', [item(title='a'), item(title='b')])
+        result_sink.write('rows', [item(title='c', price=3)])
+
+    table = read_arrow(tmp_path / f'rows.{file_format}', file_format)
+    assert table.to_pydict() == {'title': ['a', 'b', 'c'], 'price': [None, None, 3]}
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_arrow_sink_unifies_schemas(tmp_path, file_format):
+    pyarrow = pytest.importorskip('pyarrow')
+    with create_arrow_sink(tmp_path, file_format) as result_sink:
+        result_sink.write('rows', [item(title=None, price=1), item(title=None, price=2)])
+        result_sink.write('rows', [item(title='c', price=3.5),
+                                   item(title='d', price=None)])
+
+    table = read_arrow(tmp_path / f'rows.{file_format}', file_format)
+    assert table.schema.field('title').type == pyarrow.string()
+    assert table.schema.field('price').type == pyarrow.float64()
+    assert table.to_pydict() == {'title': [None, None, 'c', 'd'],
+                                 'price': [1.0, 2.0, 3.5, None]}
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_arrow_sink_falls_back_to_strings(tmp_path, file_format):
+    pyarrow = pytest.importorskip('pyarrow')
+    with create_arrow_sink(tmp_path, file_format) as result_sink:
+        result_sink.write('rows', [item(value=1), item(value=2)])
+        result_sink.write('rows', [item(value='three'), item(value=True)])
+        result_sink.write('rows', [item(value=5), item(value='six')])
+
+    table = read_arrow(tmp_path / f'rows.{file_format}', file_format)
+    assert table.schema.field('value').type == pyarrow.string()
+    assert table.to_pydict() == {'value': ['1', '2', 'three', 'True', '5', 'six']}
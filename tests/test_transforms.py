@@ -0,0 +1,110 @@
+import json
+import shutil
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from wash_lang_prototype.core.transforms import DATA_VALUES_SCRIPT, TransformPipeline, \
+    is_browser_compatible_pattern
+
+
+VALUES = [
+    '  Price: 12 EUR \n',
+    '﻿ Café ÉTÉ 7\x1c',
+    'ΟΔΟΣ 42　',
+    '٣٤ items',
+    'no digits',
+    '',
+]
+
+
+def transform(name, pattern=None, group=None):
+    return SimpleNamespace(name=name, pattern=pattern, group=group, replacement=None,
+                           date_format=None)
+
+
+def run_browser_steps(steps, values):
+    """
+    Applies the given browser steps to the given values using DATA_VALUES_SCRIPT
+    in Node.js.
+    """
+    node = shutil.which('node')
+    if node is None:
+        pytest.skip('Node.js is not available')
+
+    program = (
+        'var elements = JSON.parse(process.argv[1]).map(function (value) {\n'
+        '    return {title: value, getAttribute: function () { return value; }};\n'
+        '});\n'
+        'var source = {type: "attribute", name: "title"};\n'
+        'var values = (function () {' + DATA_VALUES_SCRIPT + '}).apply(\n'
+        '    null, [elements, source, JSON.parse(process.argv[2])]);\n'
+        'process.stdout.write(JSON.stringify(values));\n'
+    )
+    output = subprocess.run([node, '-e', program, json.dumps(values), json.dumps(steps)],
+                            check=True, capture_output=True, encoding='utf-8').stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize('pattern', [r'(\w+)', r'(\d+)', r'\bitems', r'\s(\S+)',
+                                     r'(\w+)$', r'(?i)cafe', r'(?P<number>[0-9]+)',
+                                     r'a{,3}'])
+def test_patterns_that_differ_in_javascript_are_not_browser_compatible(pattern):
+    assert not is_browser_compatible_pattern(pattern)
+
+    pipeline = TransformPipeline([transform('trim'), transform('regex', pattern, 0)])
+    assert pipeline.browser_steps() == [{'name': 'trim', 'pattern': None, 'group': None}]
+
+
+@pytest.mark.parametrize('pattern', [r'([0-9]+)', r'([^ ]+) ', r'(.)É', r'^(ΟΔ)'])
+def test_compatible_patterns_are_applied_in_the_browser(pattern):
+    assert is_browser_compatible_pattern(pattern)
+
+    pipeline = TransformPipeline([transform('regex', pattern, 1)])
+    assert len(pipeline.browser_steps()) == 1
+
+
+def test_absolute_url_is_applied_in_python():
+    pipeline = TransformPipeline([transform('trim'), transform('absolute_url')])
+
+    assert len(pipeline.browser_steps()) == 1
+    assert pipeline.requires_base_url(start=1)
+
+
+@pytest.mark.parametrize('transforms', [
+    [transform('trim')],
+    [transform('lower')],
+    [transform('upper'), transform('trim')],
+    [transform('trim'), transform('regex', r'([0-9]+)', 1)],
+    [transform('regex', r'([^ ]+) ([^ ]+)', 2), transform('lower')],
+    [transform('upper'), transform('regex', r'(.)É', 1)],
+    [transform('regex', r'^(ΟΔ)', 0)],
+])
+def test_browser_steps_match_python(transforms):
+    pipeline = TransformPipeline(transforms)
+    steps = pipeline.browser_steps()
+    assert len(steps) == len(transforms)
+
+    assert run_browser_steps(steps, VALUES) == pipeline.apply(VALUES)
+
+
+def test_single_and_multiple_elements_give_the_same_values(run_static_script):
+    html = """
+    <html><body>
+        <a class="one" href="a/1.html">  Item 1 </a>
+        <a href="a/2.html">Item 22</a>
+    </body></html>
+    """
+    result = run_static_script("""?c body {
+        ?c .one : @href | absolute_url -> single
+        ?c .one : text | trim | regex "([0-9]+)" | int -> singles
+        ?c a : @href | absolute_url -> multiple
+        ?c a : text | trim | regex "([0-9]+)" | int -> multiples
+    } -> page""", html)
+
+    page = result['execution_result']['page']
+    assert page['single'] == page['multiple'][0]
+    assert page['single'].endswith('/a/1.html')
+    assert page['singles'] == 1
+    assert page['multiples'] == [1, 22]
@@ -0,0 +1,46 @@
+import os
+
+from wash_lang_prototype.cli.execute import create_wash_options
+from wash_lang_prototype.core.benchmark import benchmark_script
+
+try:
+    import click
+except ImportError:
+    raise Exception('Missing CLI dependencies. To use WASH from CLI, please run following command:/n'
+                    'pip install wash-lang-prototype[cli]')
+
+
+def benchmark(wash_lang_prototype):
+    @wash_lang_prototype.command()
+    @click.argument('script_file_path',
+                    type=click.Path(), required=True, nargs=1)
+    @click.option('--web_driver_path', help='Path to Chrome WebDriver executable (webdriver protocol).',
+                  required=False, type=str)
+    @click.option('--chrome_binary_path', help='Path to Chrome executable (cdp protocol). If not specified, '
+                                               'Chrome is searched for on PATH.',
+                  required=False, type=str)
+    @click.option('--protocol', 'protocols', help='Automation protocol to be benchmarked (can be repeated).',
+                  multiple=True, type=click.Choice(['webdriver', 'cdp'], case_sensitive=False),
+                  default=['webdriver', 'cdp'])
+    @click.option('--runs', help='Number of measured executions per protocol.', required=False,
+                  type=click.IntRange(min=1), default=5)
+    @click.option('--warmup_runs', help='Number of executions per protocol before the measured ones.',
+                  required=False, type=click.IntRange(min=0), default=1)
+    @click.pass_context
+    def benchmark(context, script_file_path, web_driver_path, chrome_binary_path, protocols, runs, warmup_runs):
+        debug = context.obj['debug']
+        try:
+            options = create_wash_options(web_driver_path=web_driver_path, browser_type='chrome')
+            options.chrome_binary_path = chrome_binary_path
+            results = benchmark_script(script_file_path=script_file_path, options=options,
+                                       automation_protocols=[protocol.lower() for protocol in protocols],
+                                       runs=runs, warmup_runs=warmup_runs, debug=debug)
+        except Exception as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"Benchmark of {os.path.abspath(script_file_path)} ({runs} run(s) per protocol):")
+        baseline = results[0]
+        for result in results:
+            click.echo(f"  {result.automation_protocol:<10} "
+                       f"mean {result.mean * 1000:9.1f} ms   median {result.median * 1000:9.1f} ms   "
+                       f"min {result.minimum * 1000:9.1f} ms   speedup {baseline.mean / result.mean:5.2f}x")
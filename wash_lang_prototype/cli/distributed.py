@@ -0,0 +1,103 @@
+import json
+
+from wash_lang_prototype.cli.execute import create_wash_options
+from wash_lang_prototype.core.broker import DEFAULT_LEASE_DURATION, DEFAULT_MAX_ATTEMPTS, DEFAULT_MAX_POSTPONEMENTS, \
+    SQLiteJobBroker, WashCoordinator, WashWorker
+from wash_lang_prototype.core.politeness import HostPolicy, PolitenessScheduler
+
+try:
+    import click
+except ImportError:
+    raise Exception('Missing CLI dependencies. To use WASH from CLI, please run following command:/n'
+                    'pip install wash-lang-prototype[cli]')
+
+
+def submit(wash_lang_prototype):
+    @wash_lang_prototype.command()
+    @click.argument('script_file_path',
+                    type=click.Path(exists=True, dir_okay=False), required=True, nargs=1)
+    @click.option('--broker', 'broker_path', help='Path of the SQLite job broker database shared with the workers.',
+                  required=True, type=click.Path(dir_okay=False))
+    @click.option('--url', 'urls', help='URL of a document the script is executed against (can be repeated). '
+                                        'If not specified, the document of the script is used.',
+                  multiple=True, type=str)
+    @click.option('--max_attempts', help='Number of times a job is attempted before it is marked as failed.',
+                  required=False, type=click.IntRange(min=1), default=DEFAULT_MAX_ATTEMPTS)
+    @click.option('--wait', help='Wait until all jobs are finished and print their results as JSON.',
+                  is_flag=True, default=False)
+    @click.option('--timeout', help='Maximum time (in seconds) to wait for the jobs.', required=False, type=float)
+    def submit(script_file_path, broker_path, urls, max_attempts, wait, timeout):
+        broker = None
+        try:
+            broker = SQLiteJobBroker(path=broker_path, max_attempts=max_attempts)
+            coordinator = WashCoordinator(broker=broker)
+            job_ids = coordinator.submit(script_file_path=script_file_path, urls=urls)
+            if wait:
+                click.echo(json.dumps(coordinator.wait(job_ids, timeout=timeout)))
+            else:
+                click.echo('\n'.join(job_ids))
+        except Exception as e:
+            raise click.ClickException(str(e))
+        finally:
+            if broker:
+                broker.close()
+
+
+def worker(wash_lang_prototype):
+    @wash_lang_prototype.command()
+    @click.option('--broker', 'broker_path', help='Path of the SQLite job broker database shared with the coordinator.',
+                  required=True, type=click.Path(dir_okay=False))
+    @click.option('--web_driver_path', help='Path to WebDriver executable.', required=True, type=str)
+    @click.option('--browser_type', help='Browser type.', required=True,
+                  type=click.Choice(['chrome', 'firefox', 'edge', 'opera'], case_sensitive=False),
+                  default='chrome')
+    @click.option('--concurrency', help='Number of concurrently executed jobs.', required=False,
+                  type=click.IntRange(min=1), default=1)
+    @click.option('--lease', 'lease_duration', help='Duration (in seconds) of a job lease, after which a job of an '
+                                                    'unresponsive worker is handed out again.',
+                  required=False, type=click.FloatRange(min=1), default=DEFAULT_LEASE_DURATION)
+    @click.option('--max_per_host', help='Politeness: maximum number of concurrent jobs per host.', required=False,
+                  type=click.IntRange(min=1))
+    @click.option('--min_delay', help='Politeness: minimum time (in seconds) between the starts of jobs per host.',
+                  required=False, type=click.FloatRange(min=0))
+    @click.option('--rate', help='Politeness: maximum number of jobs started per second per host.', required=False,
+                  type=click.FloatRange(min=0, min_open=True))
+    @click.option('--burst', help='Politeness: number of jobs per host that can be started at once despite the rate.',
+                  required=False, type=click.IntRange(min=1), default=1)
+    @click.option('--max_postponements', help='Politeness: number of times a job throttled by its host is postponed '
+                                              'before it is marked as failed.',
+                  required=False, type=click.IntRange(min=0), default=DEFAULT_MAX_POSTPONEMENTS)
+    @click.option('--exit_when_idle', help='Exit once no job is available instead of polling for new jobs.',
+                  is_flag=True, default=False)
+    def worker(broker_path, web_driver_path, browser_type, concurrency, lease_duration, max_per_host, min_delay, rate,
+               burst, max_postponements, exit_when_idle):
+        broker = None
+        try:
+            broker = SQLiteJobBroker(path=broker_path, max_postponements=max_postponements)
+            options = create_wash_options(web_driver_path=web_driver_path, browser_type=browser_type)
+            scheduler = create_scheduler(max_per_host=max_per_host, min_delay=min_delay, rate=rate, burst=burst,
+                                         concurrency=concurrency)
+            wash_worker = WashWorker(broker=broker, options=options, concurrency=concurrency,
+                                     lease_duration=lease_duration, scheduler=scheduler)
+            click.echo(f"WASH worker {wash_worker.worker_id} started.")
+            wash_worker.run(stop_when_idle=exit_when_idle)
+        except KeyboardInterrupt:
+            click.echo("WASH worker stopped.")
+        except Exception as e:
+            raise click.ClickException(str(e))
+        finally:
+            if broker:
+                broker.close()
+
+
+def create_scheduler(max_per_host: int, min_delay: float, rate: float, burst: int,
+                     concurrency: int) -> [PolitenessScheduler, None]:
+    """
+    Creates a PolitenessScheduler from the politeness options, or returns None if no limit is specified.
+    """
+    if not max_per_host and min_delay is None and not rate:
+        return None
+
+    return PolitenessScheduler(default_policy=HostPolicy(max_concurrency=max_per_host or concurrency,
+                                                         min_delay=min_delay or 0.0, requests_per_second=rate,
+                                                         burst=burst))
@@ -1,6 +1,9 @@
 import os
 
+from wash_lang_prototype.core.metrics import PrometheusMetricsRegistry, get_metrics_registry, set_metrics_registry
 from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.sinks import create_result_sink
+from wash_lang_prototype.core.tracing import RecordingTracer, get_tracer, set_tracer
 from wash_lang_prototype.wash import Wash
 
 try:
@@ -18,29 +21,99 @@ def execute(wash_lang_prototype):
     @click.option('--browser_type', help='Browser type.', required=True,
                   type=click.Choice(['chrome', 'firefox', 'edge', 'opera'], case_sensitive=False),
                   default='chrome')
+    @click.option('--chrome_binary_path', help='Path to Chrome executable used when the configuration selects '
+                                               'the cdp automation protocol (found on PATH if not specified).',
+                  required=False, type=str)
+    @click.option('--asset_directory', help='Directory used to store extracted images and screenshots.',
+                  required=False, type=click.Path(file_okay=False))
+    @click.option('--output', help='Output directory (CSV, Parquet, Arrow) or database file (SQLite). '
+                                   'If not specified, the execution result is printed as JSON.',
+                  required=False, type=click.Path())
+    @click.option('--output_format', help='Output format used when the output is specified.', required=False,
+                  type=click.Choice(['csv', 'sqlite', 'parquet', 'arrow'], case_sensitive=False), default='csv')
+    @click.option('--incremental_state', help='Path of the state database used for incremental execution. '
+                                              'Only new and changed items are extracted.',
+                  required=False, type=click.Path(dir_okay=False))
+    @click.option('--incremental_key', help='Result key used to identify items in incremental execution.',
+                  required=False, type=str)
+    @click.option('--storage_state', help='File the browser session state (cookies, local storage) is restored from '
+                                          'before and saved to after the execution.',
+                  required=False, type=click.Path(dir_okay=False))
+    @click.option('--select', help='Dot-separated path of a result key to be extracted (e.g. top_ten.link.link_url, '
+                                   'can be repeated). Expressions of other result keys are not executed.',
+                  multiple=True, type=str)
+    @click.option('--sample', help='Preview mode: maximum number of items processed per context (e.g. 5).',
+                  required=False, type=click.IntRange(min=1))
+    @click.option('--processes', help='Number of worker processes large top-level contexts are sharded across.',
+                  required=False, type=click.IntRange(min=1), default=1)
+    @click.option('--prelaunch/--no_prelaunch', help='Start the browser while the script is being parsed.',
+                  default=True)
+    @click.option('--metrics_file', help='File the collected metrics are written to (Prometheus text format).',
+                  required=False, type=click.Path(dir_okay=False))
+    @click.option('--trace_file', help='File the recorded trace spans are written to (OTLP JSON format).',
+                  required=False, type=click.Path(dir_okay=False))
     @click.pass_context
-    def execute(context, script_file_path, web_driver_path, browser_type):
+    def execute(context, script_file_path, web_driver_path, browser_type, chrome_binary_path, asset_directory, output,
+                output_format, incremental_state, incremental_key, storage_state, select, sample, processes,
+                prelaunch, metrics_file, trace_file):
         debug = context.obj['debug']
+        if metrics_file:
+            set_metrics_registry(PrometheusMetricsRegistry())
+        if trace_file:
+            set_tracer(RecordingTracer())
         try:
-            options = WashOptions()
-            if browser_type.casefold() == 'chrome':
-                options.chrome_webdriver_path = web_driver_path
-            if browser_type.casefold() == 'firefox':
-                options.firefox_webdriver_path = web_driver_path
-            if browser_type.casefold() == 'edge':
-                options.edge_webdriver_path = web_driver_path
-            if browser_type.casefold() == 'opera':
-                options.opera_webdriver_path = web_driver_path
-
-            execution_result = execute_wash_script(script_file_path=script_file_path, wash_options=options, debug=debug)
-            print(execution_result)
+            with get_tracer().span('wash', script_file_path=os.path.abspath(script_file_path)):
+                options = create_wash_options(web_driver_path=web_driver_path, browser_type=browser_type)
+                options.chrome_binary_path = chrome_binary_path
+                options.asset_directory = asset_directory
+                options.incremental_state_path = incremental_state
+                options.incremental_key = incremental_key
+                options.storage_state_path = storage_state
+                options.shard_processes = processes
+                options.sample_size = sample
+                options.prelaunch_browser = prelaunch
+
+                if output:
+                    with create_result_sink(output_format=output_format, path=output) as result_sink:
+                        wash_script = Wash.from_file(script_file_path=script_file_path, options=options, debug=debug)
+                        try:
+                            wash_script.execute(result_sink=result_sink, select=list(select))
+                        finally:
+                            wash_script.close()
+                    click.echo(f"Execution result written to {os.path.abspath(output)} ({output_format}).")
+                else:
+                    execution_result = execute_wash_script(script_file_path=script_file_path, wash_options=options,
+                                                           debug=debug, select=list(select))
+                    print(execution_result)
         except Exception as e:
             raise click.ClickException(str(e))
+        finally:
+            if metrics_file:
+                with open(metrics_file, 'w', encoding='utf-8') as metrics_output:
+                    metrics_output.write(get_metrics_registry().export())
+            if trace_file:
+                get_tracer().export(trace_file)
 
         click.echo(f"WASH Script executed successfully. ({os.path.abspath(script_file_path)})")
 
 
-def execute_wash_script(script_file_path, wash_options, debug=False) -> str:
-    wash_script = Wash.from_file(script_file_path=script_file_path, options=wash_options, debug=debug)
+def create_wash_options(web_driver_path, browser_type) -> WashOptions:
+    options = WashOptions()
+    if browser_type.casefold() == 'chrome':
+        options.chrome_webdriver_path = web_driver_path
+    if browser_type.casefold() == 'firefox':
+        options.firefox_webdriver_path = web_driver_path
+    if browser_type.casefold() == 'edge':
+        options.edge_webdriver_path = web_driver_path
+    if browser_type.casefold() == 'opera':
+        options.opera_webdriver_path = web_driver_path
+
+    return options
 
-    return wash_script.execute_as_json()
+
+def execute_wash_script(script_file_path, wash_options, debug=False, select=None) -> str:
+    wash_script = Wash.from_file(script_file_path=script_file_path, options=wash_options, debug=debug)
+    try:
+        return wash_script.execute_as_json(select=select)
+    finally:
+        wash_script.close()
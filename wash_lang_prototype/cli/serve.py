@@ -0,0 +1,58 @@
+from wash_lang_prototype.cli.distributed import create_scheduler
+from wash_lang_prototype.cli.execute import create_wash_options
+from wash_lang_prototype.core.metrics import PrometheusMetricsRegistry, set_metrics_registry
+from wash_lang_prototype.core.server import DEFAULT_WAIT_TIMEOUT, WashServer
+
+try:
+    import click
+except ImportError:
+    raise Exception('Missing CLI dependencies. To use WASH from CLI, please run following command:/n'
+                    'pip install wash-lang-prototype[cli]')
+
+
+def serve(wash_lang_prototype):
+    @wash_lang_prototype.command()
+    @click.option('--web_driver_path', help='Path to WebDriver executable.', required=True, type=str)
+    @click.option('--browser_type', help='Browser type.', required=True,
+                  type=click.Choice(['chrome', 'firefox', 'edge', 'opera'], case_sensitive=False),
+                  default='chrome')
+    @click.option('--host', help='Host the server listens on.', required=False, type=str, default='127.0.0.1')
+    @click.option('--port', help='Port the server listens on.', required=False, type=int, default=8765)
+    @click.option('--workers', help='Number of concurrently executed jobs.', required=False,
+                  type=click.IntRange(min=1), default=2)
+    @click.option('--queue_size', help='Maximum number of queued jobs.', required=False,
+                  type=click.IntRange(min=1), default=100)
+    @click.option('--isolation', help='Isolation of concurrently executed jobs: a browser process per job (process) '
+                                      'or a browser context per job in shared browser processes (context, '
+                                      'Chrome only).', required=False,
+                  type=click.Choice(['process', 'context'], case_sensitive=False), default='process')
+    @click.option('--metrics/--no_metrics', help='Collect metrics exposed on the /metrics endpoint.', default=True)
+    @click.option('--max_per_host', help='Politeness: maximum number of concurrent jobs per host.', required=False,
+                  type=click.IntRange(min=1))
+    @click.option('--min_delay', help='Politeness: minimum time (in seconds) between the starts of jobs per host.',
+                  required=False, type=click.FloatRange(min=0))
+    @click.option('--rate', help='Politeness: maximum number of jobs started per second per host.', required=False,
+                  type=click.FloatRange(min=0, min_open=True))
+    @click.option('--burst', help='Politeness: number of jobs per host that can be started at once despite the rate.',
+                  required=False, type=click.IntRange(min=1), default=1)
+    @click.option('--wait_timeout', help='Maximum time (in seconds) a job submitted with "wait" is waited for, '
+                                         'before the job is returned as accepted.',
+                  required=False, type=click.FloatRange(min=0), default=DEFAULT_WAIT_TIMEOUT)
+    def serve(web_driver_path, browser_type, host, port, workers, queue_size, isolation, metrics, max_per_host,
+              min_delay, rate, burst, wait_timeout):
+        try:
+            if metrics:
+                set_metrics_registry(PrometheusMetricsRegistry())
+            options = create_wash_options(web_driver_path=web_driver_path, browser_type=browser_type)
+            scheduler = create_scheduler(max_per_host=max_per_host, min_delay=min_delay, rate=rate, burst=burst,
+                                         concurrency=workers)
+            server = WashServer(options=options, host=host, port=port, workers=workers, queue_size=queue_size,
+                                isolation=isolation.lower(), scheduler=scheduler, wait_timeout=wait_timeout)
+        except Exception as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"WASH server listening on http://{server.address[0]}:{server.address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            click.echo("WASH server stopped.")
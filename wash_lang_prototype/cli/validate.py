@@ -1,8 +1,5 @@
-import codecs
 import os
 
-from textx import metamodel_for_language
-
 
 try:
     import click
@@ -13,23 +10,42 @@ except ImportError:
 
 def validate(wash_lang_prototype):
     @wash_lang_prototype.command()
-    @click.argument('wash_file', type=click.Path(), required=True)
+    @click.argument('wash_files', type=click.Path(), required=True, nargs=-1)
+    @click.option('--processes', help='Number of worker processes the files are validated in.',
+                  required=False, type=click.IntRange(min=1), default=os.cpu_count() or 1)
+    @click.option('--watch', help='Keep watching the files and re-validate the files affected by changes.',
+                  is_flag=True, default=False)
     @click.pass_context
-    def validate(context, wash_file):
-        from wash_lang_prototype.core.exceptions import WashError, WashLanguageError
+    def validate(context, wash_files, processes, watch):
+        """
+        Validates WASH script files. WASH_FILES can be files, directories (searched recursively) or glob patterns.
+        """
+        from wash_lang_prototype.core.exceptions import WashError
+        from wash_lang_prototype.core.validation import ValidationWatcher
 
         debug = context.obj['debug']
         try:
-            script_file_path = os.path.abspath(wash_file)
-            with codecs.open(script_file_path, 'r') as script_file:
-                script = script_file.read()
-
-                metamodel = metamodel_for_language('wash')
-                _ = metamodel.model_from_str(script, file_name=wash_file, debug=debug)
-
-            click.echo(f"WASH Script is validated successfully. ({os.path.abspath(wash_file)})")
+            watcher = ValidationWatcher(list(wash_files), processes=processes, debug=debug)
+            errors = watcher.validate()
         except WashError as wex:
             raise click.ClickException(str(wex))
-        except Exception as ex:
-            message = ex.message if hasattr(ex, 'message') else str(ex)
-            raise click.ClickException(str(WashLanguageError(message)))
+
+        report_validation_errors(errors)
+        if watch:
+            click.echo('Watching for changes. Press Ctrl+C to stop.')
+            try:
+                watcher.watch(on_validated=report_validation_errors)
+            except KeyboardInterrupt:
+                return
+
+        failed_files = [wash_file for wash_file, error in errors.items() if error is not None]
+        if failed_files:
+            raise click.ClickException(f'{len(failed_files)} of {len(errors)} WASH Script(s) failed validation.')
+
+
+def report_validation_errors(errors: dict):
+    for wash_file, error in errors.items():
+        if error is None:
+            click.echo(f"WASH Script is validated successfully. ({wash_file})")
+        else:
+            click.echo(f"WASH Script validation failed. ({wash_file})\n{error}", err=True)
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlparse
+
+
+logger = logging.getLogger(__name__)
+
+
+class ImageAsset:
+    """
+    Describes an image referenced by a web element, as returned by the 'image' DataQuery.
+    """
+    def __init__(self, url: Optional[str]):
+        self.url = url
+
+
+class ScreenshotAsset:
+    """
+    Describes a screenshot of a web element, as returned by the 'screenshot' DataQuery.
+    The screenshot itself is captured only once the asset is collected by the executor.
+    """
+    def __init__(self, element):
+        self.element = element
+
+
+class AssetReference:
+    """
+    Represents a reference to an asset file stored by the AssetPipeline.
+    The location of the file is known only once the asset has been fully written to disk.
+    """
+    def __init__(self, future: Future, source: str = None):
+        self.__future = future                              # type: Future
+        self.__source = source                              # type: Optional[str]  (URL of downloaded assets)
+
+    def __repr__(self):
+        return repr(self.location)
+
+    @property
+    def location(self) -> Optional[str]:
+        """
+        Gets the path of the stored asset file, waiting for the asset to be stored if necessary.
+        In case the asset could not be retrieved, the error is logged and None is returned.
+        """
+        try:
+            return self.__future.result()
+        except Exception as e:
+            logger.warning('Unable to store asset%s: %s', f' {self.__source}' if self.__source else '', e)
+            return None
+
+
+class AssetPipeline:
+    """
+    Stores image and screenshot assets extracted during WASH script execution.
+
+    Downloads run on a bounded pool of worker threads and are streamed to disk chunk by chunk.
+    Each asset is stored only once under the name derived from the SHA-256 hash of its content,
+    so the same image referenced on multiple pages (or under multiple URLs) is deduplicated.
+
+    The paths of the most recently downloaded URLs are remembered (up to max_downloads), so that these URLs are not
+    downloaded again. Failed downloads are forgotten, so they are retried when the URL is referenced again.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, directory: str, max_workers: int = 8, timeout: float = 30, max_downloads: int = 10000):
+        self.__directory = directory                                            # type: str
+        self.__timeout = timeout                                                # type: float
+        self.__thread_pool = ThreadPoolExecutor(max_workers=max_workers,
+                                                thread_name_prefix='wash-assets')
+        self.__pending = threading.BoundedSemaphore(max_workers * 4)            # Bounds queued downloads
+        self.__max_downloads = max_downloads                                    # type: int
+        self.__downloads = OrderedDict()                    # type: OrderedDict[str, [Future, str]] (future or path)
+        self.__lock = threading.Lock()
+
+        os.makedirs(self.__directory, exist_ok=True)
+
+    def download(self, url: str, cookies: list[dict] = None, user_agent: str = None) -> AssetReference:
+        """
+        Schedules the download of the asset on the given URL and returns a reference to the stored file.
+        URLs that are being downloaded or were downloaded recently are not downloaded again.
+
+        Args:
+            url(str): URL of the asset.
+            cookies(list[dict]): Browser cookies (as returned by WebDriver) to be sent with the request.
+            user_agent(str): User agent of the browser to be sent with the request.
+        """
+        submitted = False
+        with self.__lock:
+            download = self.__downloads.get(url)
+            if isinstance(download, Future) and download.done() and not self.__is_successful(download):
+                # NOTE: A failed download whose callback has not run yet.
+                download = None
+            if download is None:
+                download = self.__submit(self.__download, url, cookies or [], user_agent)
+                submitted = True
+                self.__downloads[url] = download
+                # NOTE: Beyond the bound, URLs are downloaded again and deduplicated by the hash of their content.
+                while len(self.__downloads) > self.__max_downloads:
+                    self.__downloads.popitem(last=False)
+            else:
+                self.__downloads.move_to_end(url)
+
+        if isinstance(download, str):
+            future = Future()
+            future.set_result(download)
+            return AssetReference(future, source=url)
+        if submitted:
+            # NOTE: Added outside of the lock, since the callback runs right away if the download has already finished.
+            download.add_done_callback(lambda _: self.__finish_download(url, download))
+
+        return AssetReference(download, source=url)
+
+    def store(self, content: bytes, extension: str) -> AssetReference:
+        """
+        Schedules storing of the given asset content and returns a reference to the stored file.
+
+        Args:
+            content(bytes): Content of the asset (e.g. a PNG screenshot).
+            extension(str): File extension of the asset, including the leading dot.
+        """
+        return AssetReference(self.__submit(self.__store, [content], extension))
+
+    def close(self):
+        """
+        Waits for all scheduled assets to be stored and releases the worker threads.
+        """
+        self.__thread_pool.shutdown(wait=True)
+
+    def __submit(self, function, *args) -> Future:
+        self.__pending.acquire()
+        future = self.__thread_pool.submit(function, *args)
+        future.add_done_callback(lambda _: self.__pending.release())
+
+        return future
+
+    def __finish_download(self, url: str, future: Future):
+        """
+        Replaces the future of a finished download with the path of the stored file, or forgets a failed download.
+        """
+        with self.__lock:
+            if self.__downloads.get(url) is not future:
+                return
+            if self.__is_successful(future):
+                self.__downloads[url] = future.result()
+            else:
+                del self.__downloads[url]
+
+    @staticmethod
+    def __is_successful(future: Future) -> bool:
+        return not future.cancelled() and future.exception() is None
+
+    def __download(self, url: str, cookies: list[dict], user_agent: str) -> str:
+        request = urllib.request.Request(url)
+        if user_agent:
+            request.add_header('User-Agent', user_agent)
+        cookie_header = self.__create_cookie_header(url, cookies)
+        if cookie_header:
+            request.add_header('Cookie', cookie_header)
+
+        with urllib.request.urlopen(request, timeout=self.__timeout) as response:
+            content_type = response.headers.get_content_type() if response.headers else None
+            extension = mimetypes.guess_extension(content_type) if content_type else None
+            extension = extension or os.path.splitext(urlparse(url).path)[1] or ''
+
+            return self.__store(iter(lambda: response.read(self.CHUNK_SIZE), b''), extension)
+
+    def __store(self, chunks, extension: str) -> str:
+        """
+        Streams the given chunks into a temporary file while hashing the content,
+        and moves the file to its content-addressed location unless it is already stored.
+        """
+        content_hash = hashlib.sha256()
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.__directory, suffix='.part')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                for chunk in chunks:
+                    content_hash.update(chunk)
+                    temporary_file.write(chunk)
+
+            digest = content_hash.hexdigest()
+            asset_path = os.path.join(self.__directory, digest[:2], digest + extension)
+            os.makedirs(os.path.dirname(asset_path), exist_ok=True)
+            if os.path.exists(asset_path):
+                os.remove(temporary_path)
+            else:
+                os.replace(temporary_path, asset_path)
+
+            return asset_path
+        except Exception:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    @staticmethod
+    def __create_cookie_header(url: str, cookies: list[dict]) -> str:
+        parsed_url = urlparse(url)
+        host = parsed_url.hostname or ''
+        path = parsed_url.path or '/'
+
+        matching_cookies = []
+        for cookie in cookies:
+            domain = cookie.get('domain', host).lstrip('.')
+            if host != domain and not host.endswith('.' + domain):
+                continue
+            if not path.startswith(cookie.get('path', '/')):
+                continue
+            if cookie.get('secure') and parsed_url.scheme != 'https':
+                continue
+            matching_cookies.append(f"{cookie['name']}={cookie['value']}")
+
+        return '; '.join(matching_cookies)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import copy
+import statistics
+import time
+from typing import Iterable
+
+from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.pool import WebDriverPool
+
+
+class BenchmarkResult:
+    """
+    Durations (in seconds) of the measured executions of a WASH script using a single automation protocol.
+    """
+    def __init__(self, automation_protocol: str, durations: list[float]):
+        self.automation_protocol = automation_protocol      # type: str
+        self.durations = durations                          # type: list[float]
+
+    @property
+    def mean(self) -> float:
+        return statistics.mean(self.durations)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.durations)
+
+    @property
+    def minimum(self) -> float:
+        return min(self.durations)
+
+    def to_dict(self) -> dict:
+        return {'automation_protocol': self.automation_protocol, 'durations': self.durations,
+                'mean': self.mean, 'median': self.median, 'min': self.minimum}
+
+
+def benchmark_script(script_file_path: str, options: WashOptions,
+                     automation_protocols: Iterable[str] = ('webdriver', 'cdp'), runs: int = 5, warmup_runs: int = 1,
+                     debug: bool = False) -> list[BenchmarkResult]:
+    """
+    Executes the given (Chrome) WASH script repeatedly using each of the given automation protocols,
+    and measures the duration of each execution.
+
+    The browser of each protocol is kept warm between executions (see WebDriverPool) and is started by the warmup
+    runs, so that the measured durations consist of loading the document and executing the script's expressions.
+
+    Args:
+        script_file_path(str): The path of the WASH script file.
+        options(WashOptions): The options the script is executed with (the automation protocol is overridden).
+        automation_protocols(Iterable[str]): The automation protocols to be compared ('webdriver', 'cdp').
+        runs(int): The number of measured executions per protocol.
+        warmup_runs(int): The number of executions per protocol before the measured ones.
+        debug(bool): Indicates whether debug messages should be printed or not.
+    """
+    from wash_lang_prototype.wash import Wash
+
+    results = []
+    for automation_protocol in automation_protocols:
+        protocol_options = copy.copy(options)
+        protocol_options.automation_protocol = automation_protocol
+        webdriver_pool = WebDriverPool(max_idle_instances=1)
+        try:
+            wash_script = Wash.from_file(script_file_path=script_file_path, options=protocol_options, debug=debug,
+                                         webdriver_pool=webdriver_pool)
+            for _ in range(warmup_runs):
+                wash_script.execute()
+
+            durations = []
+            for _ in range(runs):
+                start_time = time.perf_counter()
+                wash_script.execute()
+                durations.append(time.perf_counter() - start_time)
+        finally:
+            webdriver_pool.close()
+
+        results.append(BenchmarkResult(automation_protocol=automation_protocol, durations=durations))
+
+    return results
@@ -0,0 +1,488 @@
+from __future__ import annotations
+
+import codecs
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+from textx import metamodel_for_language
+from textx.exceptions import TextXError
+
+from wash_lang_prototype.core.exceptions import WashError, WashLanguageError
+from wash_lang_prototype.core.metrics import get_metrics_registry
+from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.politeness import HostState, PolitenessScheduler, get_throttling
+from wash_lang_prototype.core.pool import WebDriverPool
+
+
+DEFAULT_LEASE_DURATION = 300                                # NOTE: Seconds
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_MAX_POSTPONEMENTS = 10
+
+
+class BrokerJob:
+    """
+    Represents a single (script, URL) job leased from a JobBroker.
+    The lease token identifies the lease: operations with the token of an expired lease are rejected.
+    """
+    def __init__(self, id: str, script: str, script_file_path: Optional[str], url: Optional[str], attempts: int,
+                 lease_token: str):
+        self.id = id                                        # type: str
+        self.script = script                                # type: str
+        self.script_file_path = script_file_path            # type: Optional[str]
+        self.url = url                                      # type: Optional[str]
+        self.attempts = attempts                            # type: int
+        self.lease_token = lease_token                      # type: str
+
+
+class JobBroker(ABC):
+    """
+    Queue of WASH jobs shared by a coordinator and workers (possibly running on different nodes).
+
+    Jobs are delivered at least once: a worker leases a job for a limited time and extends the lease while
+    the job is running. If the worker does not complete the job before its lease expires (e.g. because the
+    worker crashed), the job is handed out again, until it has been attempted max_attempts times.
+    Results of an expired lease are rejected, so a job is completed only once.
+    """
+
+    @abstractmethod
+    def enqueue(self, script: str, script_file_path: Optional[str] = None, url: Optional[str] = None) -> str:
+        """
+        Adds a new job to the queue and returns its identifier.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_duration: float = DEFAULT_LEASE_DURATION,
+              url_filter: Callable[[Optional[str]], bool] = None,
+              scheduler: PolitenessScheduler = None) -> Optional[BrokerJob]:
+        """
+        Leases the oldest available job (i.e. a queued job or a job whose lease has expired) to the given worker.
+        If a URL filter is specified, the oldest available job whose URL is accepted by the filter is leased.
+
+        With a PolitenessScheduler, jobs of hosts that are not ready according to the policies of the scheduler
+        are skipped. The states of the hosts (running jobs, last start, token bucket and pause) are stored in
+        the broker, so the limits apply to all workers together.
+        Returns None if no job is available.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    @abstractmethod
+    def release_host(self, url: Optional[str], scheduler: PolitenessScheduler, throttled: bool = False,
+                     retry_after: float = None):
+        """
+        Records the end of a job leased with the given scheduler in the shared state of the host of the given URL.
+        A throttled host is paused for all workers (see PolitenessScheduler.finish_request).
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    @abstractmethod
+    def extend_lease(self, job: BrokerJob, lease_duration: float = DEFAULT_LEASE_DURATION) -> bool:
+        """
+        Extends the lease of the given job. Returns False if the lease has already expired.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    @abstractmethod
+    def complete(self, job: BrokerJob, result: str) -> bool:
+        """
+        Stores the result (JSON) of the given job. Returns False if the lease of the job has already expired.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    @abstractmethod
+    def fail(self, job: BrokerJob, error: str, retry: bool = True) -> bool:
+        """
+        Releases the given job after a failed attempt. The job is queued again if retry is True and it has been
+        attempted less than max_attempts times, otherwise it is marked as failed.
+        Returns False if the lease of the job has already expired.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    @abstractmethod
+    def postpone(self, job: BrokerJob, delay: float, error: str = None) -> bool:
+        """
+        Returns the given job to the queue without counting the attempt (e.g. because the host asked the client
+        to slow down). The job is not leased again before the delay (in seconds) has elapsed.
+        A job that has already been postponed max_postponements times is marked as failed with the given error.
+        Returns False if the lease of the job has already expired.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    @abstractmethod
+    def count_queued_jobs(self) -> int:
+        """
+        Returns the number of queued jobs, including postponed jobs and jobs that are not available yet.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    @abstractmethod
+    def get_jobs(self, job_ids: Iterable[str]) -> list[dict]:
+        """
+        Returns the status (queued, leased, succeeded or failed), result and error of the given jobs.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
+    def close(self):
+        pass
+
+
+class SQLiteJobBroker(JobBroker):
+    """
+    JobBroker backed by a SQLite database file, shared by processes of a single host (or a network file system
+    with working file locks). Leases are granted in write transactions, so a job is leased by a single worker.
+
+    Scripts are stored once (in the wash_scripts table, keyed by their hash), regardless of the number of jobs
+    (URLs) they are submitted with, and only the script of the leased job is loaded.
+    """
+
+    def __init__(self, path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 max_postponements: int = DEFAULT_MAX_POSTPONEMENTS, timeout: float = 30.0):
+        """
+        Args:
+            path(str): The path of the database file (created if it does not exist).
+            max_attempts(int): The number of times a job enqueued by this broker is leased before it is marked
+                               as failed (stored per job).
+            max_postponements(int): The number of times a job is postponed by this broker before it is marked
+                                    as failed (e.g. a host that keeps throttling).
+            timeout(float): Time (in seconds) to wait for locks held by other processes.
+        """
+        self.__max_attempts = max_attempts                  # type: int
+        self.__max_postponements = max_postponements        # type: int
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('CREATE TABLE IF NOT EXISTS wash_jobs ('
+                                  'id TEXT PRIMARY KEY, script_hash TEXT NOT NULL, script_file_path TEXT, url TEXT, '
+                                  'host TEXT NOT NULL DEFAULT \'\', status TEXT NOT NULL, '
+                                  'attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, '
+                                  'postponements INTEGER NOT NULL DEFAULT 0, worker_id TEXT, lease_token TEXT, '
+                                  'lease_expires_at REAL, available_at REAL, result TEXT, error TEXT, '
+                                  'created_at REAL NOT NULL, updated_at REAL NOT NULL)')
+        self.__connection.execute('CREATE INDEX IF NOT EXISTS wash_jobs_status ON wash_jobs (status, created_at)')
+        self.__connection.execute('CREATE TABLE IF NOT EXISTS wash_scripts ('
+                                  'hash TEXT PRIMARY KEY, script TEXT NOT NULL)')
+        self.__connection.execute('CREATE TABLE IF NOT EXISTS wash_hosts ('
+                                  'host TEXT PRIMARY KEY, last_start REAL, tokens REAL, tokens_updated_at REAL, '
+                                  'paused_until REAL NOT NULL DEFAULT 0, '
+                                  'throttled_responses INTEGER NOT NULL DEFAULT 0)')
+
+    def enqueue(self, script: str, script_file_path: Optional[str] = None, url: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        script_hash = hashlib.sha256(script.encode('utf-8')).hexdigest()
+        now = time.time()
+        with self.__lock, self.__transaction():
+            self.__connection.execute('INSERT OR IGNORE INTO wash_scripts (hash, script) VALUES (?, ?)',
+                                      (script_hash, script))
+            self.__connection.execute('INSERT INTO wash_jobs (id, script_hash, script_file_path, url, host, status, '
+                                      'max_attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                      (job_id, script_hash, script_file_path, url, PolitenessScheduler.get_host(url),
+                                       'queued', self.__max_attempts, now, now))
+
+        return job_id
+
+    def lease(self, worker_id: str, lease_duration: float = DEFAULT_LEASE_DURATION,
+              url_filter: Callable[[Optional[str]], bool] = None,
+              scheduler: PolitenessScheduler = None) -> Optional[BrokerJob]:
+        now = time.time()
+        with self.__lock, self.__transaction():
+            # NOTE: Jobs whose last lease expired after the final attempt are not handed out again.
+            self.__connection.execute("UPDATE wash_jobs SET status = 'failed', error = 'Lease expired.', "
+                                      "lease_token = NULL, updated_at = ? "
+                                      "WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= max_attempts",
+                                      (now, now))
+            in_flight = dict(self.__connection.execute("SELECT host, COUNT(*) FROM wash_jobs WHERE status = 'leased' "
+                                                       "AND lease_expires_at >= ? GROUP BY host", (now,)).fetchall()) \
+                if scheduler else {}
+            host_states = {}                                # type: dict[str, HostState]
+            # NOTE: Candidates are read lazily and without their scripts, and without a filter or scheduler
+            #       the oldest available job is leased.
+            limit = ' LIMIT 1' if url_filter is None and scheduler is None else ''
+            candidates = self.__connection.execute("SELECT id, url, host, attempts FROM wash_jobs "
+                                                   "WHERE (status = 'queued' AND (available_at IS NULL "
+                                                   "OR available_at <= ?)) OR (status = 'leased' "
+                                                   f"AND lease_expires_at < ?) ORDER BY created_at{limit}", (now, now))
+            row = None
+            for candidate in candidates:
+                if url_filter is not None and not url_filter(candidate[1]):
+                    continue
+                if scheduler is not None:
+                    host = candidate[2]
+                    if host not in host_states:
+                        host_states[host] = self.__load_host_state(host, scheduler, in_flight=in_flight.get(host, 0))
+                    if scheduler.get_state_delay(host, host_states[host], now) > 0:
+                        continue
+                    scheduler.start_request(host, host_states[host], now)
+                    self.__save_host_state(host, host_states[host])
+                row = candidate
+                break
+            candidates.close()
+            if row is None:
+                return None
+
+            job_id, url, _, attempts = row
+            script, script_file_path = self.__connection.execute(
+                'SELECT wash_scripts.script, wash_jobs.script_file_path FROM wash_jobs '
+                'JOIN wash_scripts ON wash_scripts.hash = wash_jobs.script_hash WHERE wash_jobs.id = ?',
+                (job_id,)).fetchone()
+            lease_token = uuid.uuid4().hex
+            self.__connection.execute("UPDATE wash_jobs SET status = 'leased', attempts = ?, worker_id = ?, "
+                                      "lease_token = ?, lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                                      (attempts + 1, worker_id, lease_token, now + lease_duration, now, job_id))
+
+        return BrokerJob(id=job_id, script=script, script_file_path=script_file_path, url=url,
+                         attempts=attempts + 1, lease_token=lease_token)
+
+    def extend_lease(self, job: BrokerJob, lease_duration: float = DEFAULT_LEASE_DURATION) -> bool:
+        now = time.time()
+        return self.__update_leased_job(job, 'lease_expires_at = ?', (now + lease_duration,), now)
+
+    def complete(self, job: BrokerJob, result: str) -> bool:
+        return self.__update_leased_job(job, "status = 'succeeded', result = ?, error = NULL, lease_token = NULL",
+                                        (result,), time.time())
+
+    def fail(self, job: BrokerJob, error: str, retry: bool = True) -> bool:
+        return self.__update_leased_job(job, "status = CASE WHEN ? AND attempts < max_attempts THEN 'queued' "
+                                             "ELSE 'failed' END, error = ?, lease_token = NULL",
+                                        (retry, error), time.time())
+
+    def release_host(self, url: Optional[str], scheduler: PolitenessScheduler, throttled: bool = False,
+                     retry_after: float = None):
+        host = PolitenessScheduler.get_host(url)
+        now = time.time()
+        with self.__lock, self.__transaction():
+            # NOTE: Running jobs are counted from the leased jobs, so the state is released with in_flight of 1.
+            state = self.__load_host_state(host, scheduler, in_flight=1)
+            scheduler.finish_request(host, state, now, throttled=throttled, retry_after=retry_after)
+            self.__save_host_state(host, state)
+
+    def postpone(self, job: BrokerJob, delay: float, error: str = None) -> bool:
+        now = time.time()
+        return self.__update_leased_job(job, "status = CASE WHEN postponements < ? THEN 'queued' ELSE 'failed' END, "
+                                             "attempts = CASE WHEN postponements < ? THEN attempts - 1 "
+                                             "ELSE attempts END, postponements = postponements + 1, "
+                                             "available_at = ?, error = ?, lease_token = NULL",
+                                        (self.__max_postponements, self.__max_postponements, now + delay, error), now)
+
+    def count_queued_jobs(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM wash_jobs WHERE status = 'queued'").fetchone()[0]
+
+    def get_jobs(self, job_ids: Iterable[str]) -> list[dict]:
+        job_ids = list(job_ids)
+        with self.__lock:
+            rows = self.__connection.execute(
+                f"SELECT id, status, url, attempts, worker_id, result, error FROM wash_jobs "
+                f"WHERE id IN ({', '.join('?' * len(job_ids))})", job_ids).fetchall() if job_ids else []
+
+        jobs = {row[0]: {'id': row[0], 'status': row[1], 'url': row[2], 'attempts': row[3], 'worker_id': row[4],
+                         'result': json.loads(row[5]) if row[5] else None, 'error': row[6]}
+                for row in rows}
+        return [jobs.get(job_id, {'id': job_id, 'status': 'unknown'}) for job_id in job_ids]
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+    def __load_host_state(self, host: str, scheduler: PolitenessScheduler, in_flight: int) -> HostState:
+        row = self.__connection.execute('SELECT last_start, tokens, tokens_updated_at, paused_until, '
+                                        'throttled_responses FROM wash_hosts WHERE host = ?', (host,)).fetchone()
+        policy = scheduler.get_policy(host)
+        if row is None:
+            return HostState(policy, in_flight=in_flight)
+
+        last_start, tokens, tokens_updated_at, paused_until, throttled_responses = row
+        return HostState(policy, in_flight=in_flight, last_start=last_start, tokens=tokens,
+                         tokens_updated_at=tokens_updated_at, paused_until=paused_until,
+                         throttled_responses=throttled_responses)
+
+    def __save_host_state(self, host: str, state: HostState):
+        self.__connection.execute('INSERT OR REPLACE INTO wash_hosts (host, last_start, tokens, tokens_updated_at, '
+                                  'paused_until, throttled_responses) VALUES (?, ?, ?, ?, ?, ?)',
+                                  (host, state.last_start, state.tokens, state.tokens_updated_at, state.paused_until,
+                                   state.throttled_responses))
+
+    def __update_leased_job(self, job: BrokerJob, assignments: str, parameters: tuple, now: float) -> bool:
+        """
+        Updates the given job, provided that it is still leased with the lease token of the job
+        (and the lease has not expired).
+        """
+        with self.__lock:
+            cursor = self.__connection.execute(f"UPDATE wash_jobs SET {assignments}, updated_at = ? "
+                                               f"WHERE id = ? AND status = 'leased' AND lease_token = ? "
+                                               f"AND lease_expires_at >= ?",
+                                               parameters + (now, job.id, job.lease_token, now))
+            return cursor.rowcount == 1
+
+    @contextmanager
+    def __transaction(self):
+        """
+        Runs the enclosed statements in a write transaction, so that no other process can lease the same job.
+        """
+        self.__connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.__connection.execute('ROLLBACK')
+            raise
+        self.__connection.execute('COMMIT')
+
+
+class WashCoordinator:
+    """
+    Enqueues WASH jobs into a JobBroker and collects their results, which are executed by WashWorker instances.
+    """
+
+    def __init__(self, broker: JobBroker):
+        self.__broker = broker                              # type: JobBroker
+
+    def submit(self, script: str = None, script_file_path: str = None, urls: Iterable[str] = None) -> list[str]:
+        """
+        Enqueues a job per URL (or a single job for the document of the script, if no URLs are given)
+        and returns the identifiers of the jobs.
+
+        Args:
+            script(str): The contents of the WASH script. If not specified, the script is read from script_file_path.
+            script_file_path(str): The path of the WASH script file. Imports are resolved relative to this path
+                                   on the worker nodes.
+            urls(Iterable[str]): URLs of the documents the script is executed against.
+        """
+        if script is None:
+            if not script_file_path:
+                raise WashError('Either a script or a script path must be specified.')
+            script_file_path = os.path.abspath(script_file_path)
+            with codecs.open(script_file_path, 'r', 'utf-8') as script_file:
+                script = script_file.read()
+
+        return [self.__broker.enqueue(script=script, script_file_path=script_file_path, url=url)
+                for url in (list(urls or []) or [None])]
+
+    def wait(self, job_ids: list[str], timeout: float = None, poll_interval: float = 1.0) -> list[dict]:
+        """
+        Waits until all given jobs are succeeded or failed, and returns the jobs (see JobBroker.get_jobs).
+        If the timeout (in seconds) elapses first, the jobs are returned in their current state.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            jobs = self.__broker.get_jobs(job_ids)
+            if all(job['status'] in ('succeeded', 'failed') for job in jobs) or \
+                    (deadline is not None and time.monotonic() >= deadline):
+                return jobs
+            time.sleep(poll_interval)
+
+
+class WashWorker:
+    """
+    Pulls jobs from a JobBroker and executes them on a number of threads using a local WebDriverPool,
+    pushing the results back to the broker. The leases of running jobs are extended periodically.
+
+    Failures caused by the script itself (WashLanguageError) are not retried. Other failures (e.g. a crashed
+    browser or a network error) release the job, so that it can be retried by any worker.
+
+    With a PolitenessScheduler, only jobs whose host is ready are leased, so the jobs of different hosts
+    are interleaved. The states of the hosts are stored in the broker, so the policies limit all workers
+    together. Jobs that are throttled by their host (429 or 503) are postponed without counting the attempt
+    (up to the max_postponements of the broker), and the host is paused for all workers.
+    """
+
+    def __init__(self, broker: JobBroker, options: WashOptions, concurrency: int = 1,
+                 lease_duration: float = DEFAULT_LEASE_DURATION, poll_interval: float = 1.0,
+                 worker_id: str = None, scheduler: PolitenessScheduler = None):
+        from wash_lang_prototype.core.server import CompiledScriptCache
+
+        self.__broker = broker                              # type: JobBroker
+        self.__options = options                            # type: WashOptions
+        self.__concurrency = concurrency                    # type: int
+        self.__lease_duration = lease_duration              # type: float
+        self.__poll_interval = poll_interval                # type: float
+        self.__scheduler = scheduler                        # type: Optional[PolitenessScheduler]
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'   # type: str
+        self.__script_cache = CompiledScriptCache()
+        self.__webdriver_pool = WebDriverPool(max_idle_instances=concurrency)
+        self.__stopped = threading.Event()
+
+    def run(self, stop_when_idle: bool = False):
+        """
+        Executes jobs until stop() is called or, if stop_when_idle is True, until no job is queued.
+        """
+        threads = [threading.Thread(target=self.__work, args=(stop_when_idle,), name=f'wash-worker-{index}',
+                                    daemon=True)
+                   for index in range(self.__concurrency)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1.0)
+        finally:
+            self.__stopped.set()
+            self.__webdriver_pool.close()
+
+    def stop(self):
+        self.__stopped.set()
+
+    def __work(self, stop_when_idle: bool):
+        while not self.__stopped.is_set():
+            job = self.__broker.lease(self.worker_id, lease_duration=self.__lease_duration,
+                                      scheduler=self.__scheduler)
+            if job is None:
+                if stop_when_idle and not self.__broker.count_queued_jobs():
+                    return
+                self.__stopped.wait(self.__poll_interval)
+                continue
+            self.__run(job)
+
+    def __run(self, job: BrokerJob):
+        from wash_lang_prototype.core.executor import create_executor_instance
+
+        metrics = get_metrics_registry()
+        job_finished = threading.Event()
+        heartbeat = threading.Thread(target=self.__extend_lease, args=(job, job_finished), daemon=True)
+        heartbeat.start()
+        status = 'failed'
+        throttled, retry_after = False, None
+        host_released = False
+        try:
+            model = self.__script_cache.get(job.script, job.script_file_path)
+            executor = create_executor_instance(script=job.script, options=self.__options,
+                                                metamodel=metamodel_for_language('wash'), model=model,
+                                                webdriver_pool=self.__webdriver_pool)
+            result = executor.execute(url=job.url).to_json()
+            job_finished.set()
+            if self.__broker.complete(job, result):
+                status = 'succeeded'
+        except (WashLanguageError, TextXError) as e:
+            job_finished.set()
+            message = e.message if hasattr(e, 'message') else str(e)
+            self.__broker.fail(job, error=str(e) if isinstance(e, WashError) else str(WashLanguageError(message)),
+                               retry=False)
+        except Exception as e:
+            job_finished.set()
+            throttled, retry_after = get_throttling(e)
+            if throttled and self.__scheduler:
+                # NOTE: The host is paused before the job is queued again, so that no worker leases it right away.
+                host_released = True
+                self.__broker.release_host(job.url, self.__scheduler, throttled=True, retry_after=retry_after)
+                status = 'postponed'
+                self.__broker.postpone(job, delay=retry_after or 0, error=str(e))
+            else:
+                self.__broker.fail(job, error=str(e), retry=True)
+        finally:
+            job_finished.set()
+            heartbeat.join()
+            if self.__scheduler and not host_released:
+                self.__broker.release_host(job.url, self.__scheduler, throttled=throttled, retry_after=retry_after)
+            metrics.increment('wash_worker_jobs_total', status=status)
+
+    def __extend_lease(self, job: BrokerJob, job_finished: threading.Event):
+        while not job_finished.wait(self.__lease_duration / 3):
+            if not self.__broker.extend_lease(job, lease_duration=self.__lease_duration):
+                return
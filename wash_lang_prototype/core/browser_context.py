@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Callable
+
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from wash_lang_prototype.core.exceptions import WashError
+
+
+class BrowserContextWebDriver(WebDriver):
+    """
+    WebDriver session attached to a shared browser process, whose commands are executed in a single isolated
+    browser context (i.e. an incognito-like context with its own cookies, storage and cache).
+    """
+
+    def __init__(self, command_executor_url: str, debugger_address: str):
+        super().__init__(command_executor=ChromeRemoteConnection(remote_server_addr=command_executor_url),
+                         desired_capabilities={'browserName': 'chrome',
+                                               'goog:chromeOptions': {'debuggerAddress': debugger_address}})
+        self.browser_context_id = None                      # type: [str, None]
+        self.target_id = None                               # type: [str, None]
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict) -> dict:
+        """
+        Executes the given Chrome DevTools Protocol command (see selenium.webdriver.Chrome.execute_cdp_cmd).
+        """
+        return self.execute('executeCdpCommand', {'cmd': cmd, 'params': cmd_args})['value']
+
+    def open_browser_context(self):
+        """
+        Creates a new browser context with a single blank tab and switches the session to the tab.
+        """
+        self.browser_context_id = self.execute_cdp_cmd('Target.createBrowserContext',
+                                                       {'disposeOnDetach': True})['browserContextId']
+        self.target_id = self.execute_cdp_cmd('Target.createTarget', {
+            'url': 'about:blank',
+            'browserContextId': self.browser_context_id
+        })['targetId']
+
+        # NOTE: Depending on the ChromeDriver version, window handles are either target IDs or prefixed target IDs.
+        window_handle = next((handle for handle in self.window_handles if handle.endswith(self.target_id)),
+                             self.target_id)
+        self.switch_to.window(window_handle)
+
+    def quit(self):
+        """
+        Closes the browser context and ends the session. The shared browser process keeps running.
+        """
+        try:
+            if self.target_id:
+                self.execute_cdp_cmd('Target.closeTarget', {'targetId': self.target_id})
+            if self.browser_context_id:
+                self.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': self.browser_context_id})
+        finally:
+            self.target_id = None
+            self.browser_context_id = None
+            super().quit()
+
+
+class SharedBrowser:
+    """
+    Browser process shared by WASH script executions, each running in its own browser context.
+    """
+
+    def __init__(self, webdriver_instance: WebDriver):
+        if not isinstance(webdriver_instance, WebDriver):
+            raise WashError('Browser context isolation is supported only for browsers controlled over WebDriver '
+                            '(not with the "cdp" automation protocol or static execution).')
+
+        capabilities = webdriver_instance.capabilities or {}
+        debugger_address = (capabilities.get('goog:chromeOptions') or {}).get('debuggerAddress')
+        if not debugger_address:
+            raise WashError('Browser context isolation is supported only by Chrome '
+                            '(the browser does not expose a DevTools debugger address).')
+
+        self.webdriver_instance = webdriver_instance        # type: WebDriver
+        self.debugger_address = debugger_address            # type: str
+        self.active_contexts = 0                            # type: int
+
+    def open_context(self) -> BrowserContextWebDriver:
+        """
+        Attaches a new WebDriver session (served by the WebDriver process of the browser) to the browser
+        and opens an isolated browser context in it.
+        """
+        context_webdriver_instance = BrowserContextWebDriver(
+            command_executor_url=self.webdriver_instance.command_executor._url,
+            debugger_address=self.debugger_address)
+        try:
+            context_webdriver_instance.open_browser_context()
+        except Exception:
+            context_webdriver_instance.quit()
+            raise
+
+        return context_webdriver_instance
+
+
+class BrowserContextPool:
+    """
+    Runs WASH script executions in isolated browser contexts of shared browser processes instead of
+    starting a browser process per execution. Each execution gets its own context (with its own cookies,
+    storage and cache), which is disposed once the execution is finished.
+
+    The pool is interchangeable with WebDriverPool: browser processes are keyed the same way (i.e. by browser type
+    and browser options), and a new browser process is started once all browser processes of a key host
+    max_contexts_per_browser contexts. Only Chrome is supported, since contexts are managed using the
+    Chrome DevTools Protocol.
+    """
+
+    def __init__(self, max_contexts_per_browser: int = 8):
+        self.__max_contexts_per_browser = max_contexts_per_browser          # type: int
+        self.__browsers = defaultdict(list)                                 # type: dict[str, list[SharedBrowser]]
+        self.__contexts = {}                                                # type: dict[int, SharedBrowser]
+        self.__lock = threading.Lock()
+        self.__closed = False
+
+    def acquire(self, key: str, factory: Callable[[], WebDriver]) -> WebDriver:
+        """
+        Opens a new browser context in a browser process for the given key, starting the browser process
+        using the given factory if needed, and returns the WebDriver session controlling the context.
+
+        Args:
+            key(str): The key identifying compatible browser processes.
+            factory: Callable that creates a new webdriver instance (i.e. starts a new browser process).
+        """
+        with self.__lock:
+            if self.__closed:
+                raise WashError('Browser context pool is closed.')
+            browser = min((browser for browser in self.__browsers[key]
+                           if browser.active_contexts < self.__max_contexts_per_browser),
+                          key=lambda browser: browser.active_contexts, default=None)
+            if browser:
+                browser.active_contexts += 1
+
+        if browser is None:
+            browser = self.__start_browser(factory)
+            with self.__lock:
+                browser.active_contexts += 1
+                self.__browsers[key].append(browser)
+
+        try:
+            context_webdriver_instance = browser.open_context()
+        except Exception:
+            with self.__lock:
+                browser.active_contexts -= 1
+            raise
+
+        with self.__lock:
+            self.__contexts[id(context_webdriver_instance)] = browser
+
+        return context_webdriver_instance
+
+    def release(self, key: str, webdriver_instance: WebDriver):
+        """
+        Disposes the browser context controlled by the given WebDriver session.
+
+        Args:
+            key(str): The key identifying compatible browser processes.
+            webdriver_instance(WebDriver): The WebDriver session returned by acquire().
+        """
+        try:
+            webdriver_instance.quit()
+        except Exception:
+            pass
+
+        with self.__lock:
+            browser = self.__contexts.pop(id(webdriver_instance), None)
+            if browser:
+                browser.active_contexts -= 1
+
+    def idle_instance_count(self) -> int:
+        """
+        Returns the number of browser processes that currently host no browser context.
+        """
+        with self.__lock:
+            return sum(1 for browsers in self.__browsers.values() for browser in browsers
+                       if browser.active_contexts == 0)
+
+    def context_count(self) -> int:
+        with self.__lock:
+            return len(self.__contexts)
+
+    def close(self):
+        """
+        Quits all browser processes.
+        """
+        with self.__lock:
+            self.__closed = True
+            browsers = [browser for browsers in self.__browsers.values() for browser in browsers]
+            self.__browsers.clear()
+
+        for browser in browsers:
+            try:
+                browser.webdriver_instance.quit()
+            except Exception:
+                pass
+
+    @staticmethod
+    def __start_browser(factory: Callable[[], WebDriver]) -> SharedBrowser:
+        webdriver_instance = factory()
+        try:
+            return SharedBrowser(webdriver_instance)
+        except Exception:
+            webdriver_instance.quit()
+            raise
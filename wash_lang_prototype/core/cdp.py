@@ -0,0 +1,609 @@
+from __future__ import annotations
+
+import base64
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import deque
+from typing import Any, Iterable, Optional
+
+from selenium.common.exceptions import ElementNotInteractableException, JavascriptException, \
+    NoSuchElementException, StaleElementReferenceException, TimeoutException, WebDriverException
+
+from wash_lang_prototype.core.exceptions import WashError
+
+try:
+    import websocket
+except ImportError:
+    raise WashError('Missing Chrome DevTools Protocol dependencies. To execute WASH scripts over the Chrome DevTools '
+                    'Protocol, please run following command: pip install wash-lang-prototype[cdp]')
+
+
+DEFAULT_STARTUP_TIMEOUT = 30                                # Seconds
+DEFAULT_PAGE_LOAD_TIMEOUT = 300                             # Seconds
+DEFAULT_SCRIPT_TIMEOUT = 30                                 # Seconds
+
+# NOTE: Web element identifier of the W3C WebDriver protocol, used to mark elements in script arguments and results.
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+CHROME_BINARY_NAMES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+CHROME_BINARY_PATHS = {
+    'darwin': ('/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',),
+    'win32': (r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+              r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe'),
+}
+
+# NOTE: Elements returned by scripts are kept in a per-document registry (like the element cache of WebDriver), so that
+# scripts are evaluated in a single round trip and their results are transferred by value. The token of the registry
+# identifies the document, so elements of previous documents are reported as stale. Cyclic results (e.g. window)
+# cannot be transferred by value and raise an error, like in WebDriver.
+ELEMENT_REGISTRY_SCRIPT = """
+(function () {
+    if (window.__washElements) return window.__washElements;
+    var key = '%s', token = Math.random().toString(36).slice(2), nodes = [], ids = new WeakMap();
+
+    function encode(value, ancestors) {
+        if (value === undefined || value === null || typeof value === 'function') return null;
+        if (typeof value !== 'object') return value;
+        if (value.nodeType === 1) {
+            var id = ids.get(value);
+            if (id === undefined) {
+                id = nodes.push(value) - 1;
+                ids.set(value, id);
+            }
+            var marker = {};
+            marker[key] = token + ':' + id;
+            return marker;
+        }
+
+        ancestors = ancestors || [];
+        if (ancestors.indexOf(value) !== -1) throw new Error('The script result contains a cyclic reference.');
+        ancestors.push(value);
+        try {
+            var encodeItem = function (item) { return encode(item, ancestors); };
+            if (Array.isArray(value) || value instanceof NodeList || value instanceof HTMLCollection) {
+                return Array.prototype.map.call(value, encodeItem);
+            }
+            var result = {};
+            Object.keys(value).forEach(function (name) { result[name] = encodeItem(value[name]); });
+            return result;
+        } finally {
+            ancestors.pop();
+        }
+    }
+
+    function decode(value) {
+        if (value === null || typeof value !== 'object') return value;
+        if (Array.isArray(value)) return value.map(decode);
+        if (key in value) {
+            var parts = value[key].split(':'), node = parts[0] === token ? nodes[+parts[1]] : undefined;
+            if (!node || !node.isConnected) {
+                var error = new Error('The element is no longer attached to the document.');
+                error.name = 'StaleElementReferenceError';
+                throw error;
+            }
+            return node;
+        }
+        var result = {};
+        Object.keys(value).forEach(function (name) { result[name] = decode(value[name]); });
+        return result;
+    }
+
+    Object.defineProperty(window, '__washElements', {value: {encode: encode, decode: decode}});
+    return window.__washElements;
+})()
+""" % ELEMENT_KEY
+
+EXECUTE_SCRIPT_TEMPLATE = """
+(function () {
+    var registry = %s;
+    return registry.encode((function () {
+%s
+    }).apply(null, registry.decode(%s)));
+})()
+"""
+
+EXECUTE_ASYNC_SCRIPT_TEMPLATE = """
+(function () {
+    var registry = %s, args = registry.decode(%s);
+    return new Promise(function (resolve, reject) {
+        var timer = setTimeout(function () {
+            var error = new Error('Timed out waiting for the asynchronous script to finish.');
+            error.name = 'ScriptTimeoutError';
+            reject(error);
+        }, %d);
+        args.push(function (result) { clearTimeout(timer); resolve(result); });
+        try {
+            (function () {
+%s
+            }).apply(null, args);
+        } catch (error) {
+            clearTimeout(timer);
+            reject(error);
+        }
+    }).then(function (result) { return registry.encode(result); });
+})()
+"""
+
+FIND_ELEMENTS_SCRIPT = """
+var root = arguments[0] || document, by = arguments[1], value = arguments[2];
+switch (by) {
+    case 'id': return root.querySelectorAll('#' + CSS.escape(value));
+    case 'name': return root.querySelectorAll('[name="' + CSS.escape(value) + '"]');
+    case 'tag name': return root.getElementsByTagName(value);
+    case 'class name': return root.getElementsByClassName(value);
+    case 'css selector': return root.querySelectorAll(value);
+    case 'xpath':
+        var snapshot = document.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var elements = [];
+        for (var i = 0; i < snapshot.snapshotLength; i++) {
+            if (snapshot.snapshotItem(i).nodeType === 1) elements.push(snapshot.snapshotItem(i));
+        }
+        return elements;
+}
+"""
+
+GET_ATTRIBUTE_SCRIPT = """
+var element = arguments[0], name = arguments[1], value = element[name];
+if (typeof value === 'boolean') return value ? 'true' : null;
+if (value === undefined || value === null || typeof value === 'object' || typeof value === 'function') {
+    value = element.getAttribute(name);
+}
+return value === null || value === undefined ? null : String(value);
+"""
+
+ELEMENT_RECT_SCRIPT = """
+var element = arguments[0];
+element.scrollIntoView({block: 'center', inline: 'center'});
+var rect = element.getClientRects()[0];
+if (!rect) return null;
+return {x: rect.left, y: rect.top, width: rect.width, height: rect.height,
+        scrollX: window.scrollX, scrollY: window.scrollY};
+"""
+
+CLEAR_SCRIPT = """
+var element = arguments[0];
+if ('value' in element) {
+    element.value = '';
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+} else if (element.isContentEditable) {
+    element.textContent = '';
+}
+"""
+
+
+def find_chrome_binary() -> str:
+    """
+    Returns the path of the Chrome (or Chromium) executable found on PATH or in the default installation location.
+
+    Raises:
+        WashError: If Chrome cannot be found.
+    """
+    for name in CHROME_BINARY_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in CHROME_BINARY_PATHS.get(sys.platform, ()):
+        if os.path.exists(path):
+            return path
+
+    raise WashError('Unable to find Chrome executable. Please specify its path in options (chrome_binary_path).')
+
+
+class CdpConnection:
+    """
+    Synchronous connection to a Chrome DevTools Protocol endpoint (i.e. a page target).
+    Events received while waiting for command responses are buffered until they are waited for.
+    """
+
+    def __init__(self, websocket_url: str, max_buffered_events: int = 1000):
+        self.__websocket = websocket.create_connection(websocket_url, suppress_origin=True)
+        self.__message_ids = itertools.count(1)
+        self.__events = deque(maxlen=max_buffered_events)               # type: deque[dict]
+
+    def send(self, method: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        """
+        Sends the given command and returns its result.
+
+        Raises:
+            WebDriverException: If the command fails.
+            TimeoutException: If no response is received within the timeout.
+        """
+        message_id = next(self.__message_ids)
+        self.__websocket.send(json.dumps({'id': message_id, 'method': method, 'params': params or {}}))
+        while True:
+            message = self.__receive(timeout, description=f'the response to {method}')
+            if message.get('id') == message_id:
+                if 'error' in message:
+                    raise WebDriverException(f"{method} failed: {message['error'].get('message')}")
+                return message.get('result', {})
+            if 'method' in message:
+                self.__events.append(message)
+
+    def discard_events(self, method: str):
+        self.__events = deque((event for event in self.__events if event['method'] != method),
+                              maxlen=self.__events.maxlen)
+
+    def take_events(self, method: str) -> list[dict]:
+        """
+        Removes the buffered events of the given method and returns their parameters (oldest first).
+        """
+        events = [event.get('params', {}) for event in self.__events if event['method'] == method]
+        self.discard_events(method)
+
+        return events
+
+    def wait_for_event(self, method: str, timeout: float) -> dict:
+        """
+        Waits for the given event and returns its parameters.
+
+        Raises:
+            TimeoutException: If the event is not received within the timeout.
+        """
+        for event in list(self.__events):
+            if event['method'] == method:
+                self.__events.remove(event)
+                return event.get('params', {})
+
+        deadline = time.monotonic() + timeout
+        while True:
+            message = self.__receive(max(deadline - time.monotonic(), 0.001), description=method)
+            if message.get('method') == method:
+                return message.get('params', {})
+            if 'method' in message:
+                self.__events.append(message)
+
+    def close(self):
+        self.__websocket.close()
+
+    def __receive(self, timeout: Optional[float], description: str) -> dict:
+        self.__websocket.settimeout(timeout)
+        try:
+            return json.loads(self.__websocket.recv())
+        except websocket.WebSocketTimeoutException:
+            raise TimeoutException(f'Timed out after {timeout} seconds waiting for {description}.')
+
+
+class CdpElement:
+    """
+    Provides the subset of the WebElement interface used by WASH queries on top of an element of a CdpDocument.
+    """
+
+    def __init__(self, element_id: str, document: CdpDocument):
+        self.id = element_id                                # type: str
+        self.parent = document                              # NOTE: Matches WebElement.parent (i.e. the driver)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.id})'
+
+    def __eq__(self, other):
+        return isinstance(other, CdpElement) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def tag_name(self) -> str:
+        return self.parent.execute_script('return arguments[0].tagName.toLowerCase();', self)
+
+    @property
+    def text(self) -> str:
+        return (self.parent.execute_script('return arguments[0].innerText;', self) or '').strip()
+
+    @property
+    def screenshot_as_png(self) -> bytes:
+        rect = self.__get_rect()
+        screenshot = self.parent.execute_cdp_cmd('Page.captureScreenshot', {
+            'format': 'png',
+            'captureBeyondViewport': True,
+            'clip': {'x': rect['x'] + rect['scrollX'], 'y': rect['y'] + rect['scrollY'],
+                     'width': rect['width'], 'height': rect['height'], 'scale': 1}
+        })
+        return base64.b64decode(screenshot['data'])
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        return self.parent.execute_script(GET_ATTRIBUTE_SCRIPT, self, name)
+
+    def click(self):
+        rect = self.__get_rect()
+        x, y = rect['x'] + rect['width'] / 2, rect['y'] + rect['height'] / 2
+        for event_type in ('mouseMoved', 'mousePressed', 'mouseReleased'):
+            self.parent.execute_cdp_cmd('Input.dispatchMouseEvent', {
+                'type': event_type, 'x': x, 'y': y, 'button': 'left', 'clickCount': 1
+            })
+
+    def clear(self):
+        self.parent.execute_script(CLEAR_SCRIPT, self)
+
+    def send_keys(self, value: str):
+        self.parent.execute_script('arguments[0].focus();', self)
+        self.parent.execute_cdp_cmd('Input.insertText', {'text': value})
+
+    def find_element_by_id(self, id_: str) -> CdpElement:
+        elements = self.parent.find_elements('id', id_, root=self)
+        if not elements:
+            raise NoSuchElementException(f'Unable to locate element: [id="{id_}"]')
+        return elements[0]
+
+    def find_elements_by_name(self, name: str) -> list[CdpElement]:
+        return self.parent.find_elements('name', name, root=self)
+
+    def find_elements_by_tag_name(self, name: str) -> list[CdpElement]:
+        return self.parent.find_elements('tag name', name, root=self)
+
+    def find_elements_by_class_name(self, name: str) -> list[CdpElement]:
+        return self.parent.find_elements('class name', name, root=self)
+
+    def find_elements_by_css_selector(self, css_selector: str) -> list[CdpElement]:
+        return self.parent.find_elements('css selector', css_selector, root=self)
+
+    def find_elements_by_xpath(self, xpath: str) -> list[CdpElement]:
+        return self.parent.find_elements('xpath', xpath, root=self)
+
+    def __get_rect(self) -> dict:
+        rect = self.parent.execute_script(ELEMENT_RECT_SCRIPT, self)
+        if not rect:
+            raise ElementNotInteractableException('The element has no size and location.')
+        return rect
+
+
+class CdpDocument:
+    """
+    Provides the subset of the WebDriver interface used by WASH scripts on top of a Chrome page controlled directly
+    over the Chrome DevTools Protocol (instead of ChromeDriver's HTTP interface). Queries, data extraction and
+    scripts are evaluated in the page using Runtime.evaluate, so each of them takes a single websocket round trip.
+    """
+
+    def __init__(self, connection: CdpConnection, process: Optional[subprocess.Popen] = None,
+                 user_data_directory: Optional[str] = None):
+        self.__connection = connection                      # type: CdpConnection
+        self.__process = process                            # type: Optional[subprocess.Popen]
+        self.__user_data_directory = user_data_directory    # type: Optional[str]
+        self.__implicit_wait = 0                            # type: float
+        self.__script_timeout = DEFAULT_SCRIPT_TIMEOUT      # type: float
+        self.__navigation_response = None                   # type: Optional[dict]
+
+    def __getattr__(self, name: str):
+        raise AttributeError(f'"{name}" is not supported by the Chrome DevTools Protocol executor.')
+
+    @staticmethod
+    def launch(binary_location: Optional[str] = None, arguments: Iterable[str] = (),
+               startup_timeout: float = DEFAULT_STARTUP_TIMEOUT) -> CdpDocument:
+        """
+        Starts a new Chrome process with remote debugging enabled and connects to its initial page.
+
+        Args:
+            binary_location(str): The path of the Chrome executable (see find_chrome_binary if not specified).
+            arguments(Iterable[str]): Additional command line arguments of Chrome (e.g. from ChromeOptions).
+            startup_timeout(float): Time (in seconds) to wait for Chrome to start.
+        """
+        user_data_directory = tempfile.mkdtemp(prefix='wash-chrome-')
+        process = subprocess.Popen([binary_location or find_chrome_binary(), '--remote-debugging-port=0',
+                                    f'--user-data-dir={user_data_directory}', '--no-first-run',
+                                    '--no-default-browser-check', *arguments, 'about:blank'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            port = CdpDocument.__wait_for_debugging_port(process, user_data_directory, startup_timeout)
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/json/list') as response:
+                targets = json.load(response)
+            page = next((target for target in targets if target['type'] == 'page'), None)
+            if not page:
+                raise WashError('Chrome did not open an initial page.')
+
+            connection = CdpConnection(page['webSocketDebuggerUrl'])
+            connection.send('Page.enable')
+        except Exception:
+            process.kill()
+            shutil.rmtree(user_data_directory, ignore_errors=True)
+            raise
+
+        return CdpDocument(connection, process=process, user_data_directory=user_data_directory)
+
+    @property
+    def current_url(self) -> str:
+        return self.execute_script('return window.location.href;')
+
+    @property
+    def page_source(self) -> str:
+        return self.execute_script('return document.documentElement.outerHTML;')
+
+    def implicitly_wait(self, time_to_wait: float):
+        self.__implicit_wait = time_to_wait or 0
+
+    def set_script_timeout(self, time_to_wait: float):
+        self.__script_timeout = time_to_wait
+
+    @property
+    def navigation_response(self) -> Optional[dict]:
+        """
+        The response of the last document loaded by get (Network.Response, with the status and the headers),
+        or None if it was not received (e.g. same-document navigations).
+        """
+        return self.__navigation_response
+
+    def get(self, url: str):
+        """
+        Loads the document on the given URL and waits until it is loaded.
+        The response of the document is kept (see navigation_response), so that its headers can be read.
+        """
+        self.__navigation_response = None
+        self.__connection.discard_events('Page.loadEventFired')
+        self.__connection.send('Network.enable')
+        try:
+            self.__connection.discard_events('Network.responseReceived')
+            result = self.__connection.send('Page.navigate', {'url': url})
+            if result.get('errorText'):
+                raise WebDriverException(f'Unable to load "{url}": {result["errorText"]}')
+            if result.get('loaderId'):                      # NOTE: Same-document navigations do not load a document.
+                self.__connection.wait_for_event('Page.loadEventFired', timeout=DEFAULT_PAGE_LOAD_TIMEOUT)
+                self.__navigation_response = next(
+                    (event.get('response') for event in self.__connection.take_events('Network.responseReceived')
+                     if event.get('type') == 'Document' and event.get('loaderId') == result['loaderId']), None)
+        finally:
+            self.__connection.send('Network.disable')
+            self.__connection.discard_events('Network.responseReceived')
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict) -> dict:
+        return self.__connection.send(cmd, cmd_args)
+
+    def execute_script(self, script: str, *args) -> Any:
+        """
+        Executes the given script (i.e. the body of a function receiving the arguments) in the document.
+        Elements can be passed as arguments and returned, like in WebDriver.
+
+        Raises:
+            TimeoutException: If the script does not finish within DEFAULT_SCRIPT_TIMEOUT (e.g. an endless loop).
+        """
+        expression = EXECUTE_SCRIPT_TEMPLATE % (ELEMENT_REGISTRY_SCRIPT, script, self.__encode(args))
+        return self.__evaluate(expression, await_promise=False, timeout=DEFAULT_SCRIPT_TIMEOUT)
+
+    def execute_async_script(self, script: str, *args) -> Any:
+        """
+        Executes the given asynchronous script, which signals completion by calling the callback
+        passed as its last argument, and returns the value passed to the callback.
+
+        Raises:
+            TimeoutException: If the callback is not called within the script timeout.
+        """
+        expression = EXECUTE_ASYNC_SCRIPT_TEMPLATE % (ELEMENT_REGISTRY_SCRIPT, self.__encode(args),
+                                                      int(self.__script_timeout * 1000), script)
+        return self.__evaluate(expression, await_promise=True, timeout=self.__script_timeout + 5)
+
+    def find_elements(self, by: str, value: str, root: Optional[CdpElement] = None) -> list[CdpElement]:
+        """
+        Returns the elements located by the given strategy (see selenium.webdriver.common.by.By) within the given
+        root element (or the document). In case no element is found, the search is repeated until the implicit
+        wait timeout passes.
+        """
+        deadline = time.monotonic() + self.__implicit_wait
+        while True:
+            elements = self.execute_script(FIND_ELEMENTS_SCRIPT, root, by, value)
+            if elements or time.monotonic() >= deadline:
+                return elements
+            time.sleep(0.1)
+
+    def find_element_by_id(self, id_: str) -> CdpElement:
+        elements = self.find_elements('id', id_)
+        if not elements:
+            raise NoSuchElementException(f'Unable to locate element: [id="{id_}"]')
+        return elements[0]
+
+    def find_elements_by_name(self, name: str) -> list[CdpElement]:
+        return self.find_elements('name', name)
+
+    def find_elements_by_tag_name(self, name: str) -> list[CdpElement]:
+        return self.find_elements('tag name', name)
+
+    def find_elements_by_class_name(self, name: str) -> list[CdpElement]:
+        return self.find_elements('class name', name)
+
+    def find_elements_by_css_selector(self, css_selector: str) -> list[CdpElement]:
+        return self.find_elements('css selector', css_selector)
+
+    def find_elements_by_xpath(self, xpath: str) -> list[CdpElement]:
+        return self.find_elements('xpath', xpath)
+
+    def get_cookies(self) -> list[dict]:
+        cookies = self.__connection.send('Network.getCookies', {'urls': [self.current_url]}).get('cookies', [])
+        return [CdpDocument.__to_webdriver_cookie(cookie) for cookie in cookies]
+
+    def add_cookie(self, cookie: dict):
+        cdp_cookie = {key: value for key, value in cookie.items() if key != 'expiry'}
+        if 'expiry' in cookie:
+            cdp_cookie['expires'] = cookie['expiry']
+        if not cdp_cookie.get('domain'):
+            cdp_cookie['url'] = self.current_url
+        self.__connection.send('Network.setCookie', cdp_cookie)
+
+    def delete_all_cookies(self):
+        self.__connection.send('Network.clearBrowserCookies')
+
+    def quit(self):
+        """
+        Closes the browser and removes its temporary profile.
+        """
+        try:
+            self.__connection.send('Browser.close', timeout=5)
+        except Exception:
+            pass
+        finally:
+            self.__connection.close()
+
+        if self.__process:
+            try:
+                self.__process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.__process.kill()
+            self.__process = None
+        if self.__user_data_directory:
+            shutil.rmtree(self.__user_data_directory, ignore_errors=True)
+            self.__user_data_directory = None
+
+    def __evaluate(self, expression: str, await_promise: bool, timeout: Optional[float]) -> Any:
+        result = self.__connection.send('Runtime.evaluate', {
+            'expression': expression,
+            'returnByValue': True,
+            'awaitPromise': await_promise
+        }, timeout=timeout)
+
+        exception_details = result.get('exceptionDetails')
+        if exception_details:
+            description = (exception_details.get('exception') or {}).get('description') or exception_details['text']
+            if description.startswith('StaleElementReferenceError'):
+                raise StaleElementReferenceException(description)
+            if description.startswith('ScriptTimeoutError'):
+                raise TimeoutException(description)
+            raise JavascriptException(description)
+
+        return self.__decode(result['result'].get('value'))
+
+    def __encode(self, value: Any) -> str:
+        def to_serializable(item):
+            if isinstance(item, CdpElement):
+                return {ELEMENT_KEY: item.id}
+            raise TypeError(f'Unsupported script argument type: {item.__class__.__name__}')
+
+        return json.dumps(list(value), default=to_serializable)
+
+    def __decode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self.__decode(item) for item in value]
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return CdpElement(value[ELEMENT_KEY], self)
+            return {key: self.__decode(item) for key, item in value.items()}
+
+        return value
+
+    @staticmethod
+    def __wait_for_debugging_port(process: subprocess.Popen, user_data_directory: str, timeout: float) -> int:
+        port_file = os.path.join(user_data_directory, 'DevToolsActivePort')
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise WashError(f'Chrome exited during startup (exit code {process.returncode}).')
+            try:
+                with open(port_file, 'r', encoding='utf-8') as file:
+                    port = file.readline().strip()
+                if port:
+                    return int(port)
+            except OSError:
+                pass
+            time.sleep(0.05)
+
+        raise WashError(f'Chrome did not start within {timeout} seconds.')
+
+    @staticmethod
+    def __to_webdriver_cookie(cookie: dict) -> dict:
+        result = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+                  if key in cookie}
+        if not cookie.get('session') and cookie.get('expires', -1) > 0:
+            result['expiry'] = int(cookie['expires'])
+        return result
@@ -5,7 +5,8 @@ from typing import Any, Type
 
 from wash_lang_prototype.core.common import Handler
 from wash_lang_prototype.core.exceptions import WashError
-from wash_lang_prototype.core.executor import WashExecutor, ChromeExecutor, FirefoxExecutor, EdgeExecutor, OperaExecutor
+from wash_lang_prototype.core.executor import WashExecutor, ChromeExecutor, CdpChromeExecutor, FirefoxExecutor, \
+    EdgeExecutor, OperaExecutor, StaticExecutor
 from wash_lang_prototype.lang.wash import Configuration
 
 
@@ -64,8 +65,12 @@ class ConfigurationHandler(Handler):
         raise WashError('Unsupported browser type')
 
     @classmethod
-    def _extract_browser_type(cls, configuration: Configuration) -> str:
-        return configuration.get_browser_type()
+    def _extract_browser_type(cls, configuration: [Configuration, None]) -> str:
+        """
+        Returns the configured browser type, or an empty string if the script has no configuration
+        or the browser type is not configured (see DefaultConfigurationHandler).
+        """
+        return (configuration.get_browser_type() if configuration else None) or ''
 
     @abstractmethod
     def _create_options(self, configuration: Configuration):
@@ -75,23 +80,36 @@ class ConfigurationHandler(Handler):
 class ChromeConfigurationHandler(ConfigurationHandler):
     """
     Concrete implementation of ConfigurationHandler that handles configuration for Chrome browser.
+    Chrome is controlled either over WebDriver (ChromeExecutor) or directly over the Chrome DevTools Protocol
+    (CdpChromeExecutor), depending on the configured automation protocol.
     """
 
+    def __init__(self, automation_protocol: str = None):
+        self.__automation_protocol = automation_protocol    # type: [str, None]  (Overrides the configured protocol)
+
     def handle(self, configuration: Configuration) -> ConfigurationHandlingResult:
         browser_type = self._extract_browser_type(configuration)
         if browser_type.casefold() != "chrome":
             return super().handle(configuration)
+        return self.create_result(configuration)
+
+    def create_result(self, configuration: [Configuration, None]) -> ConfigurationHandlingResult:
+        """
+        Creates the result of handling the given Chrome configuration (or of the default configuration, if None).
+        """
         return ConfigurationHandlingResult(
-            executor_type=ChromeExecutor,
+            executor_type=self.__get_executor_type(configuration),
             browser_options=self._create_options(configuration),
-            implicit_wait_value=configuration.get_wait_timeout())
+            implicit_wait_value=configuration.get_wait_timeout() if configuration else None)
 
-    def _create_options(self, configuration: Configuration):
+    def _create_options(self, configuration: [Configuration, None]):
         from selenium.webdriver import ChromeOptions
 
         options = ChromeOptions()
         options.headless = False
         options.add_experimental_option('excludeSwitches', ['enable-logging'])
+        if configuration is None:
+            return options
 
         user_agent = configuration.get_user_agent()
         access_as_mobile_device = configuration.get_access_as_mobile_device()
@@ -105,6 +123,17 @@ class ChromeConfigurationHandler(ConfigurationHandler):
 
         return options
 
+    def __get_executor_type(self, configuration: [Configuration, None]) -> Type[WashExecutor]:
+        automation_protocol = self.__automation_protocol or \
+            (configuration.get_automation_protocol() if configuration else None) or 'webdriver'
+        if automation_protocol.casefold() == 'webdriver':
+            return ChromeExecutor
+        if automation_protocol.casefold() == 'cdp':
+            return CdpChromeExecutor
+
+        raise WashError(f'Unsupported automation protocol "{automation_protocol}". '
+                        f'Supported protocols are "webdriver" and "cdp".')
+
 
 class FirefoxConfigurationHandler(ConfigurationHandler):
     """
@@ -180,3 +209,40 @@ class OperaConfigurationHandler(ConfigurationHandler):
         options.add_argument("--window-size=1920,1080")
 
         return options
+
+
+class StaticConfigurationHandler(ConfigurationHandler):
+    """
+    Concrete implementation of ConfigurationHandler that handles configuration for static (browserless) execution.
+    """
+
+    def handle(self, configuration: Configuration) -> ConfigurationHandlingResult:
+        browser_type = self._extract_browser_type(configuration)
+        if browser_type.casefold() != "static":
+            return super().handle(configuration)
+        return ConfigurationHandlingResult(
+            executor_type=StaticExecutor,
+            browser_options=self._create_options(configuration),
+            implicit_wait_value=configuration.get_wait_timeout())
+
+    def _create_options(self, configuration: Configuration):
+        return None
+
+
+class DefaultConfigurationHandler(ConfigurationHandler):
+    """
+    Concrete implementation of ConfigurationHandler that handles scripts without a configuration,
+    and configurations that do not specify the browser type, using Chrome with the default options.
+    This handler is the last one in the chain.
+    """
+
+    def __init__(self, automation_protocol: str = None):
+        self.__chrome_handler = ChromeConfigurationHandler(automation_protocol=automation_protocol)
+
+    def handle(self, configuration: [Configuration, None]) -> ConfigurationHandlingResult:
+        if self._extract_browser_type(configuration):
+            return super().handle(configuration)
+        return self.__chrome_handler.create_result(configuration)
+
+    def _create_options(self, configuration: [Configuration, None]):
+        return None
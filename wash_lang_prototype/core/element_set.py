@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from typing import Any
+
+from selenium.common.exceptions import WebDriverException
+
+from wash_lang_prototype.core.exceptions import WashRuntimeError
+from wash_lang_prototype.core.metrics import get_metrics_registry
+
+
+COMPOSITE_SELECTOR_SCRIPT = """
+var root = arguments[0], steps = arguments[1];
+var current = root === null ? [document] : (Array.isArray(root) ? root : [root]);
+for (var s = 0; s < steps.length; s++) {
+    var step = steps[s], next = [];
+    if (step.type === 'index') {
+        if (Math.abs(step.value) > current.length) {
+            return {error: {value: step.value, size: current.length}};
+        }
+        next = step.value > 0 ? [current[step.value - 1]] : current.slice(-step.value);
+    } else if (step.type === 'slice') {
+        var size = current.length;
+        var start = step.start === null ? 0 : (step.start < 0 ? Math.max(size + step.start, 0) : Math.min(step.start, size));
+        var stop = step.stop === null ? size : (step.stop < 0 ? Math.max(size + step.stop, 0) : Math.min(step.stop, size));
+        for (var k = start; k < stop; k += step.step) next.push(current[k]);
+    } else {
+        for (var i = 0; i < current.length; i++) {
+            var node = current[i], j;
+            if (step.type === 'xpath') {
+                var snapshot = document.evaluate(step.value, node, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                for (j = 0; j < snapshot.snapshotLength; j++) {
+                    if (snapshot.snapshotItem(j).nodeType === 1) next.push(snapshot.snapshotItem(j));
+                }
+            } else if (step.first) {
+                var element = node.querySelector(step.value);
+                if (element) next.push(element);
+            } else {
+                var elements = node.querySelectorAll(step.value);
+                for (j = 0; j < elements.length; j++) next.push(elements[j]);
+            }
+        }
+    }
+    current = next;
+}
+return arguments[2] ? {count: current.length} : {elements: current};
+"""
+
+
+class LazyElementSet:
+    """
+    Represents a lazily evaluated set of web elements described by a chain of selector queries
+    applied to an execution context (i.e. a WebDriver, a WebElement or a list of WebElement instances).
+
+    Selector queries only extend the description of the set. The set is resolved the first time
+    its elements are needed (e.g. by a DataQuery, an interaction or by iterating over the set).
+    Chains of multiple selector queries are resolved in the browser using a single composite query,
+    so that only the handles of the resulting elements are transferred over the wire.
+    """
+
+    def __init__(self, execution_context, selector_queries: list):
+        self.__execution_context = execution_context        # type: Any
+        self.__selector_queries = selector_queries          # type: list
+        self.__elements = None                              # type: [list, None]
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __getitem__(self, index):
+        return self.resolve()[index]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(queries={[query.__class__.__name__ for query in self.__selector_queries]})'
+
+    @property
+    def execution_context(self) -> Any:
+        return self.__execution_context
+
+    @property
+    def selector_queries(self) -> list:
+        return list(self.__selector_queries)
+
+    def select(self, selector_query) -> LazyElementSet:
+        """
+        Returns a new LazyElementSet that extends the description of the current set with the given selector query.
+
+        Args:
+            selector_query(SelectorQuery): The selector query to be applied to the elements of the current set.
+        """
+        return LazyElementSet(execution_context=self.__execution_context,
+                              selector_queries=self.__selector_queries + [selector_query])
+
+    def slice(self, start: int, stop: int) -> LazyElementSet:
+        """
+        Returns a new LazyElementSet that contains only the elements of the current set in the range [start, stop).
+        """
+        return self.select(ElementRange(start=start, stop=stop))
+
+    def count(self) -> int:
+        """
+        Returns the number of elements in the set. Unless the set is already resolved,
+        the elements are counted in the browser without transferring their handles.
+        """
+        if self.__elements is None:
+            webdriver_instance = self.__get_webdriver_instance()
+            if webdriver_instance is not None:
+                try:
+                    result = webdriver_instance.execute_script(COMPOSITE_SELECTOR_SCRIPT, self.__get_browser_root(),
+                                                               self.__get_browser_steps(), True)
+                    # NOTE: Empty sets are counted by resolving them, so that the implicit wait applies.
+                    if not result.get('error') and result['count']:
+                        return result['count']
+                except WebDriverException:
+                    pass
+
+        return len(self.resolve())
+
+    def resolve(self) -> list:
+        """
+        Executes the described selector chain (only once) and returns the resulting list of WebElement instances.
+        """
+        if self.__elements is None:
+            metrics = get_metrics_registry()
+            elements = None
+            if len(self.__selector_queries) > 1:
+                with metrics.timer('wash_query_duration_seconds', query_type='CompositeSelectorQuery'):
+                    elements = self.__resolve_in_browser()
+            if not elements:
+                # NOTE: An empty composite result is re-evaluated eagerly, because only
+                #       WebDriver find methods take the implicit wait timeout into account.
+                if len(self.__selector_queries) > 1:
+                    metrics.increment('wash_query_retries_total', query_type='CompositeSelectorQuery')
+                elements = self.__resolve_eagerly()
+            metrics.increment('wash_elements_extracted_total', len(elements))
+            self.__elements = elements
+
+        return self.__elements
+
+    def __resolve_eagerly(self) -> list:
+        query_result = self.__execution_context
+        for selector_query in self.__selector_queries:
+            query_result = selector_query.execute_eagerly(execution_context=query_result)
+
+        return query_result if isinstance(query_result, list) else [query_result]
+
+    def __resolve_in_browser(self) -> [list, None]:
+        webdriver_instance = self.__get_webdriver_instance()
+        if webdriver_instance is None:
+            return None
+
+        try:
+            result = webdriver_instance.execute_script(COMPOSITE_SELECTOR_SCRIPT, self.__get_browser_root(),
+                                                       self.__get_browser_steps())
+        except WebDriverException:
+            return None
+
+        if result.get('error'):
+            raise WashRuntimeError(f"Index accessor value out of range: given value {result['error']['value']} "
+                                   f"exceeds collection size ({result['error']['size']}).")
+
+        return result['elements']
+
+    def __get_browser_root(self):
+        return None if self.__get_webdriver_instance() is self.__execution_context else self.__execution_context
+
+    def __get_browser_steps(self) -> list[dict]:
+        return [selector_query.get_browser_step() for selector_query in self.__selector_queries]
+
+    def __get_webdriver_instance(self):
+        """
+        Returns the WebDriver instance that owns the current execution context,
+        or None in case the execution context does not support script execution.
+        """
+        execution_context = self.__execution_context
+        if isinstance(execution_context, list):
+            if not execution_context:
+                return None
+            execution_context = execution_context[0]
+
+        webdriver_instance = getattr(execution_context, 'parent', execution_context)
+        return webdriver_instance if hasattr(webdriver_instance, 'execute_script') else None
+
+
+class ElementRange:
+    """
+    Selects the elements of an element set in the range [start, stop).
+    Used to split a large context into slices processed independently (e.g. by separate processes).
+    """
+    def __init__(self, start: int, stop: int):
+        self.start = start                                  # type: int
+        self.stop = stop                                    # type: int
+
+    def execute_eagerly(self, execution_context) -> list:
+        if not isinstance(execution_context, list):
+            execution_context = [execution_context]
+
+        return execution_context[self.start:self.stop]
+
+    def get_browser_step(self) -> dict:
+        return {'type': 'slice', 'start': self.start, 'stop': self.stop, 'step': 1}
@@ -37,3 +37,15 @@ class WashRuntimeError(WashError):
 
     def __init__(self, message):
         super(WashRuntimeError, self).__init__(message)
+
+
+class WashThrottledError(WashRuntimeError):
+    """
+    Raised when a document is loaded with a status code asking the client to slow down (429 or 503).
+    """
+
+    def __init__(self, message, status_code: int, retry_after: Optional[float] = None):
+        super(WashThrottledError, self).__init__(message)
+
+        self.status_code = status_code
+        self.retry_after = retry_after
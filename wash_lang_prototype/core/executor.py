@@ -1,43 +1,119 @@
 from __future__ import annotations
 
+import functools
+import itertools
+import json
+import multiprocessing
 import os
+import time
 from abc import ABC
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
 
 from selenium import webdriver
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
-from textx import textx_isinstance
+from textx import metamodel_for_language, textx_isinstance
 from textx.metamodel import TextXMetaModel
 
-from wash_lang_prototype.core.exceptions import WashError
+from wash_lang_prototype.core.assets import AssetPipeline, ImageAsset, ScreenshotAsset
+from wash_lang_prototype.core.element_set import LazyElementSet
+from wash_lang_prototype.core.exceptions import WashError, WashThrottledError
+from wash_lang_prototype.core.inline_document import get_inline_document_server
+from wash_lang_prototype.core.incremental import IncrementalChanges, IncrementalStateStore, fingerprint_elements, \
+    get_item_identity, get_key_identity
+from wash_lang_prototype.core.launch import BrowserLaunch
+from wash_lang_prototype.core.metrics import get_metrics_registry
 from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.politeness import THROTTLING_STATUS_CODES, get_navigation_status, \
+    get_navigation_retry_after
+from wash_lang_prototype.core.pool import WebDriverPool
+from wash_lang_prototype.core.scroll import DEFAULT_IDLE_SCROLL_ROUNDS, DEFAULT_IDLE_SCROLL_TIMEOUT, scroll_past
+from wash_lang_prototype.core.selection import ResultSelection
+from wash_lang_prototype.core.sinks import ResultSink
+from wash_lang_prototype.core.storage_state import StorageState
+from wash_lang_prototype.core.tracing import get_tracer
+from wash_lang_prototype.core.transforms import convert_value
+from wash_lang_prototype.core.wait import install_network_tracker, uninstall_network_tracker
 from wash_lang_prototype.lang.wash import *
 
 
 def create_executor_instance(script: str, options: WashOptions, metamodel: TextXMetaModel,
-                             model: WashScript, debug=False, **kwargs):
+                             model: WashScript, debug=False, browser_launch: BrowserLaunch = None, **kwargs):
     from wash_lang_prototype.core.configuration_handler import ChromeConfigurationHandler, \
-        FirefoxConfigurationHandler, EdgeConfigurationHandler, OperaConfigurationHandler
+        FirefoxConfigurationHandler, EdgeConfigurationHandler, OperaConfigurationHandler, StaticConfigurationHandler, \
+        DefaultConfigurationHandler
 
-    root_handler = ChromeConfigurationHandler()
+    root_handler = ChromeConfigurationHandler(automation_protocol=options.automation_protocol)
     firefox_handler = FirefoxConfigurationHandler()
     edge_handler = EdgeConfigurationHandler()
     opera_handler = OperaConfigurationHandler()
-    # TODO: default_configuration_handler = DefaultConfigurationHandler()
+    static_handler = StaticConfigurationHandler()
+    default_configuration_handler = DefaultConfigurationHandler(automation_protocol=options.automation_protocol)
 
     root_handler.set_next(firefox_handler)\
                 .set_next(edge_handler)\
-                .set_next(opera_handler)
-    # TODO: .set_next(default_configuration_handler)
+                .set_next(opera_handler)\
+                .set_next(static_handler)\
+                .set_next(default_configuration_handler)
 
-    configuration_handling_result = root_handler.handle(configuration=model.configuration)
+    with get_tracer().span('wash.configure') as span:
+        try:
+            configuration_handling_result = root_handler.handle(configuration=model.configuration)
+        except Exception:
+            if browser_launch:
+                browser_launch.discard()
+            raise
+        if span:
+            span.attributes['wash.executor'] = configuration_handling_result.executor_type.__name__
 
-    return configuration_handling_result.executor_type(
+    executor = configuration_handling_result.executor_type(
         browser_options=configuration_handling_result.browser_options,
         **dict(kwargs, script=script, options=options,
                metamodel=metamodel, model=model, debug=debug,
                implicit_wait_value=configuration_handling_result.implicit_wait_value))
 
+    if options.prelaunch_browser and not kwargs.get('webdriver_pool'):
+        executor.prepare_browser(browser_launch=browser_launch)
+    elif browser_launch:
+        browser_launch.discard()
+
+    return executor
+
+
+def launch_default_browser(options: WashOptions) -> [BrowserLaunch, None]:
+    """
+    Speculatively starts the browser used by scripts that do not configure one (see DefaultConfigurationHandler)
+    on a background thread, before the script is parsed. The launch is used by the executor if the configuration
+    of the script resolves to the same browser and browser options, and discarded otherwise.
+    Returns None if the default browser cannot be started with the given options.
+    """
+    from wash_lang_prototype.core.configuration_handler import DefaultConfigurationHandler
+
+    configuration_handling_result = DefaultConfigurationHandler(
+        automation_protocol=options.automation_protocol).handle(configuration=None)
+    if configuration_handling_result.executor_type is ChromeExecutor and not options.chrome_webdriver_path:
+        return None
+
+    executor = configuration_handling_result.executor_type(
+        browser_options=configuration_handling_result.browser_options, options=options, script=None,
+        metamodel=None, model=None, debug=False, implicit_wait_value=configuration_handling_result.implicit_wait_value)
+
+    return executor.launch_browser()
+
+
+def execute_shard(script: str, script_file_path: str, options: WashOptions, url: str, expression_index: int,
+                  start: int, stop: int, select: list[str] = None) -> list:
+    """
+    Executes a slice of the top-level context of a static expression in a worker process.
+    See WashExecutor.execute_shard for details.
+    """
+    metamodel = metamodel_for_language('wash')
+    model = metamodel.model_from_str(script, file_name=script_file_path)
+    executor = create_executor_instance(script=script, options=options, metamodel=metamodel, model=model)
+
+    return executor.execute_shard(url=url, expression_index=expression_index, start=start, stop=stop, select=select)
+
 
 class WashExecutor(ABC):
     """
@@ -45,22 +121,98 @@ class WashExecutor(ABC):
     """
 
     def __init__(self, **kwargs):
+        self._browser_options = kwargs.pop('browser_options')       # type: Any
         self._options = kwargs.pop('options')                       # type: WashOptions
         self.__script = kwargs.pop('script')                        # type: str
         self.__metamodel = kwargs.pop('metamodel')                  # type: TextXMetaModel
         self.__model = kwargs.pop('model')                          # type: WashScript
         self.__debug = kwargs.pop('debug')                          # type: bool
         self._time_to_wait = kwargs.pop('implicit_wait_value')      # type: int
+        self._webdriver_pool = kwargs.pop('webdriver_pool', None)   # type: [WebDriverPool, None]
+        self.__asset_pipeline = None                                # type: [AssetPipeline, None]
+        self.__incremental_state_store = None                       # type: [IncrementalStateStore, None]
+        self.__inline_document_location = None                     # type: [str, None]
+        self.__storage_state = None                                 # type: [StorageState, None]
+        self.__network_tracker_script = None                        # type: [str, None]
+        self.__browser_launch = None                                # type: [BrowserLaunch, None]
+
+    def prepare_browser(self, browser_launch: BrowserLaunch = None):
+        """
+        Starts the webdriver instance used by the next execution on a background thread.
 
-    def execute(self) -> ExecutionResult:
+        Args:
+            browser_launch(BrowserLaunch): Optional launch started in advance (see launch_default_browser),
+                                           used if it started the browser of this executor with the same options,
+                                           and discarded otherwise.
+        """
+        self.close()
+        if browser_launch and not browser_launch.claim(self._get_webdriver_pool_key()):
+            browser_launch.discard()
+            browser_launch = None
+        self.__browser_launch = browser_launch or self.launch_browser()
+
+    def launch_browser(self) -> BrowserLaunch:
+        """
+        Starts a webdriver instance of the browser used by the executor on a background thread and returns
+        the launch, so that the startup overlaps with the remaining preparation of the execution.
+        """
+        get_metrics_registry().increment('wash_webdriver_prelaunches_total', executor=self.__class__.__name__)
+
+        return BrowserLaunch(key=self._get_webdriver_pool_key(), factory=self.__create_timed_webdriver_instance)
+
+    def close(self):
+        """
+        Releases the resources held by the executor between executions, i.e. quits the prelaunched
+        webdriver instance that has not been used by an execution.
+        """
+        if self.__browser_launch:
+            self.__browser_launch.discard()
+            self.__browser_launch = None
+
+    def execute(self, result_sink: ResultSink = None, url: str = None, select: list[str] = None) -> ExecutionResult:
         """
         Executes a WASH script and returns an ExecutionResult instance.
+
+        Args:
+            result_sink(ResultSink): Optional sink the items of top-level result keys are written to
+                                     as soon as they are extracted.
+            url(str): Optional URL of the document to be used instead of the one specified in the script.
+            select(list[str]): Optional dot-separated paths of the result keys to be extracted
+                               (e.g. 'top_ten.link.link_url'). Expressions of other keys are not executed,
+                               while commands are always executed (see ResultSelection).
         """
-        document_location = self.__extract_document_location(self.__model.open_statement)
+        selection = ResultSelection.resolve(self.__model, select)
+        if self._options.sample_size and self._options.incremental_state_path:
+            raise WashError('Sampling cannot be combined with incremental execution, because the state of the items '
+                            'that are not sampled would be lost.')
+        if selection and self._options.incremental_state_path:
+            raise WashError('Selection of result keys cannot be combined with incremental execution, because the '
+                            'stored state would mark the items as extracted without their other result keys.')
+        document_location = url or self.__extract_document_location(self.__model.open_statement)
+        if document_location is None:
+            document_location = get_inline_document_server().register(self.__model.open_statement.html)
+            self.__inline_document_location = document_location
+        metrics = get_metrics_registry()
+        execution_status = 'failure'
+        webdriver_instance = None
+        if self._options.asset_directory:
+            self.__asset_pipeline = AssetPipeline(directory=self._options.asset_directory,
+                                                  max_workers=self._options.asset_download_workers)
+        if self._options.incremental_state_path:
+            self.__incremental_state_store = IncrementalStateStore(path=self._options.incremental_state_path)
         try:
-            webdriver_instance = self._start_webdriver_instance(url=document_location)
-
-            execution_result = self.__execute_internal(webdriver_instance=webdriver_instance)
+            with metrics.timer('wash_script_duration_seconds', executor=self.__class__.__name__), \
+                    get_tracer().span('wash.execute', executor=self.__class__.__name__, url=document_location):
+                webdriver_instance = self._start_webdriver_instance(url=document_location)
+
+                execution_result, incremental_changes = self.__execute_internal(webdriver_instance=webdriver_instance,
+                                                                                result_sink=result_sink,
+                                                                                selection=selection)
+                if self._options.storage_state_path:
+                    self.__storage_state.capture(webdriver_instance)
+                    self.__storage_state.save(self._options.storage_state_path)
+            if result_sink:
+                result_sink.flush()
 
             wash_result = ExecutionResult(
                 parent=None,
@@ -68,25 +220,119 @@ class WashExecutor(ABC):
                 current_url=webdriver_instance.current_url,
                 execution_result=execution_result)
 
+            if self.__incremental_state_store:
+                wash_result.add_attributes(**{'incremental_changes': incremental_changes})
+
             if self.__debug:
                 wash_result.add_attributes(**{'script': self.__script})
 
+            execution_status = 'success'
             return wash_result
         except Exception:
             raise
         finally:
-            webdriver_instance.quit()
+            metrics.increment('wash_scripts_executed_total', executor=self.__class__.__name__, status=execution_status)
+            if webdriver_instance:
+                self._stop_webdriver_instance(webdriver_instance)
+            if self.__inline_document_location:
+                get_inline_document_server().unregister(self.__inline_document_location)
+                self.__inline_document_location = None
+            if self.__asset_pipeline:
+                self.__asset_pipeline.close()
+                self.__asset_pipeline = None
+            if self.__incremental_state_store:
+                self.__incremental_state_store.close()
+                self.__incremental_state_store = None
 
-    @abstractmethod
     def _start_webdriver_instance(self, url: str) -> WebDriver:
         """
-        Starts a new webdriver instance on the given URL.
-        
+        Starts a new webdriver instance (or acquires an idle one from the WebDriver pool) on the given URL.
+
         Args:
             url(str): URL of the page the webdriver instance should load.
+
+        Raises:
+            WashThrottledError: If the server responded with a throttling status (429 or 503).
+        """
+        tracer = get_tracer()
+        browser_launch, self.__browser_launch = self.__browser_launch, None
+        with tracer.span('wash.webdriver.start', pooled=self._webdriver_pool is not None,
+                         prelaunched=browser_launch is not None):
+            if browser_launch:
+                webdriver_instance = browser_launch.result()
+            elif self._webdriver_pool:
+                webdriver_instance = self._webdriver_pool.acquire(key=self._get_webdriver_pool_key(),
+                                                                  factory=self.__create_timed_webdriver_instance)
+            else:
+                webdriver_instance = self.__create_timed_webdriver_instance()
+            webdriver_instance.implicitly_wait(time_to_wait=self._time_to_wait or 0)
+            restore_script = self.__apply_storage_state(webdriver_instance, url=url)
+            if any(self.__is(expression, PageStateWaitCommand.__name__) and expression.state == 'network idle'
+                   for expression in self.__model.expressions):
+                self.__network_tracker_script = install_network_tracker(webdriver_instance)
+
+        try:
+            with get_metrics_registry().timer('wash_page_load_seconds'), tracer.span('wash.open', url=url):
+                webdriver_instance.get(url)
+            if urlparse(url).scheme in ('http', 'https'):
+                status_code = get_navigation_status(webdriver_instance)
+                if status_code in THROTTLING_STATUS_CODES:
+                    raise WashThrottledError(f'Loading {url} failed with status {status_code}.',
+                                             status_code=status_code,
+                                             retry_after=get_navigation_retry_after(webdriver_instance))
+        except Exception:
+            self._stop_webdriver_instance(webdriver_instance)
+            raise
+        StorageState.remove_restore_script(webdriver_instance, restore_script)
+
+        return webdriver_instance
+
+    def _stop_webdriver_instance(self, webdriver_instance: WebDriver):
+        """
+        Quits the given webdriver instance, or returns it to the WebDriver pool for reuse.
+        """
+        if self.__network_tracker_script:
+            try:
+                uninstall_network_tracker(webdriver_instance, self.__network_tracker_script)
+            except Exception:
+                pass
+            self.__network_tracker_script = None
+
+        if self._webdriver_pool:
+            self._webdriver_pool.release(key=self._get_webdriver_pool_key(), webdriver_instance=webdriver_instance)
+        else:
+            webdriver_instance.quit()
+
+    def __apply_storage_state(self, webdriver_instance: WebDriver, url: str) -> [str, None]:
+        """
+        Sets the cookies specified in the configuration and the persisted session state (see StorageState)
+        in a single batch, before the document on the given URL is loaded.
+        """
+        self.__storage_state = StorageState.load(self._options.storage_state_path) \
+            if self._options.storage_state_path else StorageState()
+        cookies = self.__model.configuration.get_cookies() if self.__model.configuration else None
+
+        return self.__storage_state.apply(webdriver_instance, url=url, cookies=cookies)
+
+    def __create_timed_webdriver_instance(self) -> WebDriver:
+        with get_metrics_registry().timer('wash_webdriver_start_seconds', executor=self.__class__.__name__):
+            return self._create_webdriver_instance()
+
+    @abstractmethod
+    def _create_webdriver_instance(self) -> WebDriver:
+        """
+        Creates a new webdriver instance of the browser used by the executor.
         """
         pass
 
+    def _get_webdriver_pool_key(self) -> str:
+        """
+        Returns the key identifying webdriver instances (in a WebDriver pool) that can be reused by this executor,
+        i.e. instances of the same browser started with the same browser options.
+        """
+        capabilities = self._browser_options.to_capabilities() if self._browser_options else None
+        return f'{self.__class__.__name__}:{json.dumps(capabilities, sort_keys=True, default=str)}'
+
     def __is(self, object_instance: WashBase, rule_class) -> bool:
         """
         Determines whether a WASH object is an instance of a specific WASH class supported by the metamodel.
@@ -103,6 +349,8 @@ class WashExecutor(ABC):
         """
         Extracts the location value of the document that should be used for execution,
         and returns it in a format acceptable by the WebDriver class.
+        Inline HTML documents have no location until they are registered with the inline document server,
+        in which case None is returned.
         
         Args:
             open_statement: Statement from the parsed model that contains location value for opening a HTML file.
@@ -112,68 +360,456 @@ class WashExecutor(ABC):
         elif self.__is(open_statement, OpenFileStatement.__name__):
             return 'file:///' + open_statement.file_path
         elif self.__is(open_statement, OpenStringStatement.__name__):
-            return 'data:text/html;charset=utf-8,' + open_statement.html
+            return None
         else:
             raise WashError(f'Unexpected object "{open_statement}" of type "{type(open_statement)}"')
             
-    def __execute_internal(self, webdriver_instance: WebDriver) -> ExecutionResult:
+    def __execute_internal(self, webdriver_instance: WebDriver, result_sink: ResultSink = None,
+                           selection: ResultSelection = None) -> tuple[ExecutionResult, dict]:
         """
-        Runs the actual execution of the current WASH script  and returns an ExecutionResult instance.
+        Runs the actual execution of the current WASH script  and returns an ExecutionResult instance,
+        along with the changes detected per result key in incremental mode.
 
         Args:
             webdriver_instance(WebDriver): WebDriver instance to be used for script execution.
+            result_sink(ResultSink): Optional sink the items of top-level result keys are written to.
+            selection(ResultSelection): Optional selection of the result keys to be extracted.
         """
-        for expression in self.__model.expressions:
+        document_location = webdriver_instance.current_url
+        if self.__inline_document_location:
+            # NOTE: The port of the inline document server differs between runs,
+            #       so inline documents are identified only by their content-addressed path.
+            document_location = urlparse(document_location).path
+        incremental_scope = IncrementalStateStore.create_scope(
+            script_location=self.__model._tx_filename or self.__script,
+            document_location=document_location) if self.__incremental_state_store else None
+        incremental_changes = {}
+        execution_result = ExecutionResult()
+        tracer = get_tracer()
+        document_modified = False
+
+        for expression_index, expression in enumerate(self.__model.expressions):
             if self.__is(expression, DynamicExpression.__name__):
-                expression.execute(execution_context=webdriver_instance)
+                with tracer.span('wash.command', command=expression.__class__.__name__):
+                    expression.execute(execution_context=webdriver_instance)
+                document_modified = True
+            elif selection and not selection.is_selected(expression.result_key):
+                continue
             elif self.__is(expression, StaticExpression.__name__):
-                root_context = self.__prepare_context(execution_context=webdriver_instance, queries=expression.queries)
-
-                context_expression = expression.context_expression if expression.context_expression \
-                    else expression.context_expression_ref.context_expression
-
-                result = self.__execute_context_expression(context=root_context, context_expression=context_expression)
-                self.__model.execution_result.add_attributes(**{expression.result_key: result})
+                with tracer.span('wash.static_expression', result_key=expression.result_key):
+                    # NOTE: Sharding requires every worker process to see the same document by simply opening it,
+                    #       which is not the case once commands have interacted with the page.
+                    shard_expression_index = None if document_modified else expression_index
+                    result = self.__execute_static_expression(expression, webdriver_instance=webdriver_instance,
+                                                              incremental_scope=incremental_scope,
+                                                              incremental_changes=incremental_changes,
+                                                              result_sink=result_sink,
+                                                              shard_expression_index=shard_expression_index,
+                                                              selection=selection.get_nested_selection(
+                                                                  expression.result_key) if selection else None)
+                execution_result.add_attributes(**{expression.result_key: result})
+            elif self.__is(expression, ScrollCollectExpression.__name__):
+                with tracer.span('wash.scroll_collect', result_key=expression.result_key):
+                    result = self.__execute_scroll_collect_expression(
+                        expression, webdriver_instance=webdriver_instance, result_sink=result_sink,
+                        selection=selection.get_nested_selection(expression.result_key) if selection else None)
+                execution_result.add_attributes(**{expression.result_key: result})
+                document_modified = True
             else:
                 raise WashError(f'Unsupported expression type: {expression.__class__}')
 
-        return self.__model.execution_result
+        return execution_result, incremental_changes
+
+    def __execute_static_expression(self, expression: StaticExpression, webdriver_instance: WebDriver,
+                                    incremental_scope: str, incremental_changes: dict, result_sink: ResultSink = None,
+                                    shard_expression_index: int = None, selection: ResultSelection = None):
+        """
+        Executes a top-level static expression against the document and returns the expression result.
+        In case the expression can be sharded (see WashOptions.shard_processes), large contexts
+        are processed by multiple worker processes.
+
+        Only the keys of the given selection (or all keys, if not specified) of the context expression are extracted.
+        With a result sink, the items are written as soon as they are extracted and not kept in memory,
+        so the number of items is returned instead of the items (like for scroll and collect expressions).
+        """
+        context_expression = expression.context_expression if expression.context_expression \
+            else expression.context_expression_ref.context_expression
+
+        # NOTE: Incremental execution iterates over the context items twice (fingerprinting and extraction).
+        root_context = self._prepare_root_context(webdriver_instance=webdriver_instance, queries=expression.queries,
+                                                  context_expression=context_expression,
+                                                  single_pass=not self.__incremental_state_store)
+
+        on_item_executed = functools.partial(result_sink.write, expression.result_key) if result_sink else None
+        shardable = shard_expression_index is not None and self._options.shard_processes > 1 \
+            and not self.__incremental_state_store and not self._options.sample_size \
+            and isinstance(root_context, LazyElementSet)
+        item_count = root_context.count() if shardable else 0
+        if self.__incremental_state_store:
+            result, changes = self.__execute_context_expression_incrementally(
+                context=root_context, context_expression=context_expression, scope=incremental_scope,
+                result_key=expression.result_key, on_item_executed=on_item_executed, selection=selection)
+            incremental_changes[expression.result_key] = changes.to_dict()
+        elif shardable and item_count >= max(self._options.shard_min_items, 2):
+            select = [f'{expression.result_key}.{path}' for path in selection.to_paths()] if selection else None
+            result = self.__execute_sharded(document_location=webdriver_instance.current_url,
+                                            expression_index=shard_expression_index,
+                                            item_count=item_count, on_item_executed=on_item_executed, select=select)
+        else:
+            result = self.__execute_context_expression(context=root_context,
+                                                       context_expression=context_expression,
+                                                       on_item_executed=on_item_executed, selection=selection,
+                                                       stream_items=result_sink is not None)
 
-    def __execute_context_expression(self, context: list[WebElement],
-                                     context_expression: ContextExpression, parent=None) -> ExecutionResult:
+        return result
+
+    def __execute_scroll_collect_expression(self, expression: ScrollCollectExpression, webdriver_instance: WebDriver,
+                                            result_sink: ResultSink = None,
+                                            selection: ResultSelection = None) -> [list, int]:
+        """
+        Executes a top-level scroll and collect expression: the document is scrolled past the last item rendered
+        so far until the configured number of items is collected, or (with the "no new items" condition or without
+        an item count) until no new items appear after DEFAULT_IDLE_SCROLL_ROUNDS scrolls. With only an item count,
+        scrolling continues until no new items appear for DEFAULT_IDLE_SCROLL_TIMEOUT seconds (e.g. slow feeds).
+        Only items that appeared since the previous scroll are extracted.
+
+        Items are deduplicated by the value of the key expression (or, without a key or if it is empty, by their
+        fingerprint), so items rendered again (e.g. by recycled nodes of virtualized lists) are not extracted twice.
+        The value of the key expression is reused as the result of the key.
+        Only the identities of collected items are kept, so with a result sink the items are written
+        as soon as they are extracted and the number of collected items is returned instead of the items.
+        """
+        context_expression = expression.get_context_expression()
+        key_expression = next((sub_expression for sub_expression in context_expression.expressions
+                               if sub_expression.result_key == expression.key), None)
+        max_count = expression.max_count
+        if self._options.sample_size:
+            max_count = min(max_count, self._options.sample_size) if max_count else self._options.sample_size
+
+        collected_items = []
+        on_item_executed = functools.partial(result_sink.write, expression.result_key) if result_sink \
+            else collected_items.extend
+        seen_fingerprints = set()
+        seen_keys = set()
+        collected_count = 0
+        idle_rounds = 0
+        last_new_item_time = time.monotonic()
+        while True:
+            context_items = list(self.__prepare_context(execution_context=webdriver_instance,
+                                                        queries=expression.queries))
+            new_items = []
+            known_results = []
+            for context_item, fingerprint in zip(context_items, fingerprint_elements(context_items)):
+                if fingerprint in seen_fingerprints:
+                    continue
+                seen_fingerprints.add(fingerprint)
+                if key_expression:
+                    key = self.__execute_expression(key_expression, context_item)
+                    identity = get_key_identity(key)
+                    if identity is not None:                # NOTE: Items without a key are new by fingerprint.
+                        if identity in seen_keys:
+                            continue
+                        seen_keys.add(identity)
+                    known_results.append({key_expression.result_key: key})
+                new_items.append(context_item)
+
+            if max_count is not None:
+                new_items = new_items[:max_count - collected_count]
+            if new_items:
+                self.__execute_context_expression(context=new_items, context_expression=context_expression,
+                                                  on_item_executed=on_item_executed, selection=selection,
+                                                  known_results=known_results or None,
+                                                  stream_items=result_sink is not None)
+                collected_count += len(new_items)
+                last_new_item_time = time.monotonic()
+
+            idle_rounds = 0 if new_items else idle_rounds + 1
+            if max_count is not None and collected_count >= max_count:
+                break
+            if idle_rounds >= DEFAULT_IDLE_SCROLL_ROUNDS and (expression.stops_when_idle or
+                                                              time.monotonic() - last_new_item_time >=
+                                                              DEFAULT_IDLE_SCROLL_TIMEOUT):
+                break
+            if not scroll_past(webdriver_instance, context_items[-1] if context_items else None):
+                break
+
+        return collected_count if result_sink else collected_items
+
+    def __execute_sharded(self, document_location: str, expression_index: int, item_count: int,
+                          on_item_executed=None, select: list[str] = None) -> [list, int]:
+        """
+        Splits the items of a top-level context into contiguous slices processed by separate worker processes,
+        each of which opens the same document using its own webdriver instance.
+        The results of the slices are merged in document order. With the on_item_executed callback, the results
+        are only passed to it, and the number of items is returned instead.
+        """
+        process_count = min(self._options.shard_processes, item_count)
+        bounds = [item_count * index // process_count for index in range(process_count + 1)]
+
+        # NOTE: Worker processes are spawned (instead of forked), because webdriver connections
+        #       and the parsed model of the parent process cannot be shared safely.
+        with ProcessPoolExecutor(max_workers=process_count, mp_context=multiprocessing.get_context('spawn')) as pool:
+            shards = [pool.submit(execute_shard, script=self.__script, script_file_path=self.__model._tx_filename,
+                                  options=self._options, url=document_location, expression_index=expression_index,
+                                  start=start, stop=stop, select=select)
+                      for start, stop in zip(bounds, bounds[1:])]
+
+            execution_result = []
+            processed_item_count = 0
+            for shard in shards:
+                shard_result = [ExecutionResult(**item) if isinstance(item, dict) else item for item in shard.result()]
+                processed_item_count += len(shard_result)
+                if on_item_executed:
+                    on_item_executed(shard_result)
+                else:
+                    execution_result.extend(shard_result)
+
+        return processed_item_count if on_item_executed else execution_result
+
+    def execute_shard(self, url: str, expression_index: int, start: int, stop: int,
+                      select: list[str] = None) -> list:
+        """
+        Executes the top-level static expression with the given index only against the context items
+        in the range [start, stop), and returns the JSON-compatible execution results of the items.
+
+        Args:
+            url(str): URL of the document.
+            expression_index(int): The index of the static expression within the script.
+            start(int): Index of the first context item to be processed.
+            stop(int): Index of the context item at which processing stops (exclusive).
+            select(list[str]): Optional paths of the result keys to be extracted (see execute).
+        """
+        expression = self.__model.expressions[expression_index]
+        selection = ResultSelection.resolve(self.__model, select)
+        context_expression = expression.context_expression if expression.context_expression \
+            else expression.context_expression_ref.context_expression
+        execution_result = []
+        webdriver_instance = None
+        if self._options.asset_directory:
+            self.__asset_pipeline = AssetPipeline(directory=self._options.asset_directory,
+                                                  max_workers=self._options.asset_download_workers)
+        try:
+            webdriver_instance = self._start_webdriver_instance(url=url)
+            root_context = self.__prepare_context(execution_context=webdriver_instance, queries=expression.queries)
+            self.__execute_context_expression(context=root_context.slice(start, stop),
+                                              context_expression=context_expression,
+                                              on_item_executed=execution_result.extend,
+                                              selection=selection.get_nested_selection(expression.result_key)
+                                              if selection else None,
+                                              stream_items=True)
+        finally:
+            if webdriver_instance:
+                self._stop_webdriver_instance(webdriver_instance)
+            if self.__asset_pipeline:
+                self.__asset_pipeline.close()
+                self.__asset_pipeline = None
+
+        return json.loads(ExecutionResult(items=execution_result).to_json())['items']
+
+    def __execute_context_expression(self, context: LazyElementSet, context_expression: ContextExpression,
+                                     parent=None, on_item_executed=None, selection: ResultSelection = None,
+                                     known_results: list[dict] = None,
+                                     stream_items: bool = False) -> [ExecutionResult, int]:
         """
         Recursively executes the given context_expression using the given context.
 
         A context represents the current part(s) of the document (i.e. DOM tree) that is/are used for execution.
         In other words, contexts represent the execution result of the queries in the parent context.
         The root context is always the document that is currently being processed.
+
+        The optional on_item_executed callback is called with a list containing the execution result
+        of each context item, as soon as the item is processed. If stream_items is set, the execution results
+        of the items are only passed to the callback (e.g. written to a result sink) and not kept,
+        and the number of processed items is returned instead.
+
+        If a selection is specified, only the selected expressions are executed (see ResultSelection).
+        In sampling mode, only the first WashOptions.sample_size items of the context are processed.
+
+        The optional known_results contain the results of expressions already executed against each context item
+        (e.g. the values of keys), which are reused instead of executing the expressions again.
         """
+        context = self.__sample_context(context)
+        expressions = [expression for expression in context_expression.expressions
+                       if not selection or selection.is_selected(expression.result_key)]
         execution_result = []
-        for context_item in context:                                            # Each web element in current context
-            context_item_execution_result = ExecutionResult(parent=parent)
-            for expression in context_expression.expressions:                   # Each expression to be executed on
-                expression_result = None
-                if expression.context_expression:
-                    sub_context = self.__prepare_context(execution_context=context_item, queries=expression.queries)
-                    expression_result = self.__execute_context_expression(sub_context, expression.context_expression,
-                                                                          parent=execution_result)
+        item_count = 0
+        with get_tracer().span('wash.context_expression') as span:
+            for index, context_item in enumerate(context):                      # Each web element in current context
+                context_item_execution_result = ExecutionResult(parent=parent)
+                item_known_results = known_results[index] if known_results else {}
+                for expression in expressions:                                  # Each expression to be executed on
+                    if expression.result_key in item_known_results:
+                        expression_result = item_known_results[expression.result_key]
+                    else:
+                        expression_result = self.__execute_expression(
+                            expression, context_item, parent=execution_result,
+                            selection=selection.get_nested_selection(expression.result_key) if selection else None)
+                    context_item_execution_result.add_attributes(**{expression.result_key: expression_result})
+                item_count += 1
+                if not stream_items:
+                    execution_result.append(context_item_execution_result)
+                if on_item_executed:
+                    on_item_executed([context_item_execution_result])
+            if span:
+                span.attributes['items'] = item_count
+
+        if stream_items:
+            return item_count
+
+        return execution_result[0] if len(execution_result) == 1 else execution_result
+
+    def __execute_expression(self, expression: StaticExpression, context_item: WebElement, parent=None,
+                             selection: ResultSelection = None):
+        """
+        Executes a single static expression of a context expression against the given context item
+        and returns the expression result. Only the selected keys of its context expression are extracted.
+        """
+        expression_result = None
+        if expression.context_expression:
+            with get_tracer().span('wash.static_expression', result_key=expression.result_key):
+                sub_context = self.__prepare_context(execution_context=context_item, queries=expression.queries)
+                expression_result = self.__execute_context_expression(sub_context, expression.context_expression,
+                                                                      parent=parent, selection=selection)
+        else:
+            for query in expression.queries:
+                if expression_result is not None:
+                    expression_result = query.execute(execution_context=expression_result)
                 else:
-                    for query in expression.queries:
-                        if expression_result:
-                            expression_result = query.execute(execution_context=expression_result)
-                        else:
-                            expression_result = query.execute(execution_context=context_item)
+                    expression_result = query.execute(execution_context=context_item)
+            expression_result = self.__collect_assets(expression_result, execution_context=context_item)
+            if expression.result_type:
+                expression_result = convert_value(expression_result, expression.result_type)
+
+        return expression_result
+
+    def __execute_context_expression_incrementally(self, context: LazyElementSet,
+                                                   context_expression: ContextExpression,
+                                                   scope: str, result_key: str,
+                                                   on_item_executed=None, selection: ResultSelection = None
+                                                   ) -> tuple[ExecutionResult, IncrementalChanges]:
+        """
+        Executes the given top-level context_expression in incremental mode, comparing the fingerprints of
+        the context items with the fingerprints stored during the previous execution.
+        Only new and changed items are extracted and part of the returned execution result
+        (or, with the on_item_executed callback, passed to it and counted, see __execute_context_expression).
+
+        Items are identified either by the value of the configured incremental key expression (which is reused
+        as the result of the key) or, if the key is not configured, empty or not unique, by their fingerprint
+        (in which case changed items are reported as a pair of a new and a removed item).
+        """
+        context_items = list(context)
+        fingerprints = fingerprint_elements(context_items)
+        previous_fingerprints = self.__incremental_state_store.load(scope, result_key)
+
+        key_expression = next((expression for expression in context_expression.expressions
+                               if expression.result_key == self._options.incremental_key), None)
+        if self._options.incremental_key and not key_expression:
+            raise WashError(f'Incremental key "{self._options.incremental_key}" is not defined '
+                            f'in the context expression of the result key "{result_key}".')
+
+        changes = IncrementalChanges()
+        current_fingerprints = {}
+        items_to_execute = []
+        known_results = []
+        for context_item, fingerprint in zip(context_items, fingerprints):
+            key = self.__execute_expression(key_expression, context_item) if key_expression else None
+            identity = get_item_identity(key, fingerprint, current_fingerprints)
+            current_fingerprints[identity] = fingerprint
+
+            previous_fingerprint = previous_fingerprints.get(identity)
+            if previous_fingerprint is None:
+                changes.new.append(identity)
+            elif previous_fingerprint != fingerprint:
+                changes.changed.append(identity)
+            else:
+                changes.unchanged += 1
+                continue
+            items_to_execute.append(context_item)
+            known_results.append({key_expression.result_key: key} if key_expression else {})
 
-                context_item_execution_result.add_attributes(**{expression.result_key: expression_result})
-            execution_result.append(context_item_execution_result)
+        changes.removed = [identity for identity in previous_fingerprints if identity not in current_fingerprints]
 
-        return execution_result[0] if len(execution_result) == 1 else execution_result
+        execution_result = self.__execute_context_expression(context=items_to_execute,
+                                                             context_expression=context_expression,
+                                                             on_item_executed=on_item_executed, selection=selection,
+                                                             known_results=known_results,
+                                                             stream_items=on_item_executed is not None)
+        self.__incremental_state_store.save(scope, result_key, current_fingerprints)
+
+        return execution_result, changes
+
+    def __sample_context(self, context):
+        """
+        Limits the given context to its first WashOptions.sample_size items (if sampling is enabled).
+        The limit of a LazyElementSet is applied as part of its selector chain, so that the handles
+        of the remaining elements are never transferred from the browser.
+        """
+        sample_size = self._options.sample_size
+        if not sample_size:
+            return context
+        if isinstance(context, LazyElementSet):
+            return context.slice(0, sample_size)
+        if isinstance(context, list):
+            return context[:sample_size]
+
+        return itertools.islice(context, sample_size)
+
+    def __collect_assets(self, expression_result, execution_context: [WebElement or WebDriver]):
+        """
+        Replaces image and screenshot assets in the given expression result with references to stored asset files.
+        Without a configured asset directory, images are represented by their URLs.
+
+        Args:
+            expression_result: The result of the expression that may contain assets.
+            execution_context: The web element (or WebDriver instance) the expression has been executed against.
+        """
+        assets = expression_result if isinstance(expression_result, list) else [expression_result]
+        if not any(isinstance(asset, (ImageAsset, ScreenshotAsset)) for asset in assets):
+            return expression_result
+
+        if not self.__asset_pipeline:
+            if any(isinstance(asset, ScreenshotAsset) for asset in assets):
+                raise WashError('Screenshot data query requires the asset directory to be specified in options.')
+            collected_assets = [asset.url for asset in assets]
+        else:
+            webdriver_instance = getattr(execution_context, 'parent', execution_context)
+            cookies, user_agent = None, None
+            collected_assets = []
+            for asset in assets:
+                if isinstance(asset, ScreenshotAsset):
+                    collected_assets.append(self.__asset_pipeline.store(asset.element.screenshot_as_png, '.png'))
+                elif not asset.url:
+                    collected_assets.append(None)
+                else:
+                    if cookies is None:
+                        cookies = webdriver_instance.get_cookies()
+                        user_agent = webdriver_instance.execute_script('return navigator.userAgent;') \
+                            if hasattr(webdriver_instance, 'execute_script') else None
+                    collected_assets.append(self.__asset_pipeline.download(asset.url, cookies, user_agent))
+
+        return collected_assets if isinstance(expression_result, list) else collected_assets[0]
+
+    def _prepare_root_context(self, webdriver_instance: WebDriver, queries: list[Query],
+                              context_expression: ContextExpression = None, single_pass: bool = False):
+        """
+        Prepares the context of a top-level static expression, i.e. executes the given queries against the document.
+        Returns an iterable of context items (a LazyElementSet by default).
+
+        Args:
+            webdriver_instance(WebDriver): The webdriver instance the document is loaded in.
+            queries(list[Query]): The queries of the static expression.
+            context_expression(ContextExpression): The context expression executed against the context items.
+            single_pass(bool): Indicates whether the context items are iterated over only once, so that
+                               executors may release each item once it has been processed.
+        """
+        return self.__prepare_context(execution_context=webdriver_instance, queries=queries)
 
     @staticmethod
-    def __prepare_context(execution_context: [WebElement or WebDriver], queries: list[Query]) -> list[WebElement]:
+    def __prepare_context(execution_context: [WebElement or WebDriver], queries: list[Query]) -> LazyElementSet:
         """
         Executes a list of queries against a given execution_context and returns the result
-        in form of a list of WebElement instances which represent a new context.
+        in form of a LazyElementSet which represents a new context. The elements of the new context
+        are retrieved only once the context is iterated over.
 
         A context represents the current part(s) of the document (i.e. DOM tree) that is/are used for execution.
         In other words, contexts represent the execution result of the queries in the parent context.
@@ -183,7 +819,7 @@ class WashExecutor(ABC):
         query_result = None
         for query in queries:
             query_result = query.execute(execution_context=execution_context) \
-                if not query_result else query.execute(execution_context=query_result)
+                if query_result is None else query.execute(execution_context=query_result)
 
         return query_result
 
@@ -192,11 +828,10 @@ class ChromeExecutor(WashExecutor):
     """
     WASH script executor that uses Chrome browser.
     """
-    def __init__(self, browser_options, **kwargs):
+    def __init__(self, **kwargs):
         super(ChromeExecutor, self).__init__(**kwargs)
-        self.__chrome_options = browser_options
 
-    def _start_webdriver_instance(self, url: str):
+    def _create_webdriver_instance(self) -> WebDriver:
         if not self._options.chrome_webdriver_path:
             raise WashError('Current WASH configuration uses Chrome WebDriver,'
                             ' but the path was not specified in options.')
@@ -204,23 +839,38 @@ class ChromeExecutor(WashExecutor):
             raise FileNotFoundError('Unable to find Chrome WebDriver on specified path: "{}"'
                                     .format(self._options.chrome_webdriver_path))
 
-        webdriver_instance = webdriver.Chrome(options=self.__chrome_options,
+        webdriver_instance = webdriver.Chrome(options=self._browser_options,
                                               executable_path=self._options.chrome_webdriver_path)
-        webdriver_instance.implicitly_wait(time_to_wait=self._time_to_wait)
-        webdriver_instance.get(url)
 
         return webdriver_instance
 
 
+class CdpChromeExecutor(WashExecutor):
+    """
+    WASH script executor that controls Chrome directly over the Chrome DevTools Protocol (see CdpDocument),
+    instead of sending every command over ChromeDriver's HTTP interface. Chrome is started from the location
+    specified in options (or found on PATH), so Chrome WebDriver is not required.
+    """
+    def __init__(self, **kwargs):
+        super(CdpChromeExecutor, self).__init__(**kwargs)
+
+    def _create_webdriver_instance(self):
+        from wash_lang_prototype.core.cdp import CdpDocument
+
+        browser_options = self._browser_options
+        return CdpDocument.launch(
+            binary_location=self._options.chrome_binary_path or getattr(browser_options, 'binary_location', None),
+            arguments=browser_options.arguments if browser_options else ())
+
+
 class FirefoxExecutor(WashExecutor):
     """
     WASH script executor that uses Firefox browser.
     """
-    def __init__(self, browser_options, **kwargs):
+    def __init__(self, **kwargs):
         super(FirefoxExecutor, self).__init__(**kwargs)
-        self.__firefox_options = browser_options
 
-    def _start_webdriver_instance(self, url: str):
+    def _create_webdriver_instance(self) -> WebDriver:
         if not self._options.firefox_webdriver_path:
             raise WashError('Current WASH configuration uses Firefox WebDriver,'
                             ' but the path was not specified in options.')
@@ -228,10 +878,8 @@ class FirefoxExecutor(WashExecutor):
             raise FileNotFoundError('Unable to find Firefox WebDriver on specified path: "{}"'
                                     .format(self._options.firefox_webdriver_path))
 
-        webdriver_instance = webdriver.Firefox(options=self.__firefox_options,
+        webdriver_instance = webdriver.Firefox(options=self._browser_options,
                                                executable_path=self._options.firefox_webdriver_path)
-        webdriver_instance.implicitly_wait(time_to_wait=self._time_to_wait)
-        webdriver_instance.get(url)
 
         return webdriver_instance
 
@@ -240,11 +888,10 @@ class EdgeExecutor(WashExecutor):
     """
     WASH script executor that uses Edge browser.
     """
-    def __init__(self, browser_options, **kwargs):
+    def __init__(self, **kwargs):
         super(EdgeExecutor, self).__init__(**kwargs)
-        self.__edge_options = browser_options
 
-    def _start_webdriver_instance(self, url: str):
+    def _create_webdriver_instance(self) -> WebDriver:
 
         # TODO (fivkovic): Use additional library to set options
         # https://stackoverflow.com/questions/65171183/how-to-run-microsoft-edge-headless-with-selenium-python
@@ -257,8 +904,6 @@ class EdgeExecutor(WashExecutor):
                                     .format(self._options.edge_webdriver_path))
 
         webdriver_instance = webdriver.Edge(executable_path=self._options.edge_webdriver_path)
-        webdriver_instance.implicitly_wait(time_to_wait=self._time_to_wait)
-        webdriver_instance.get(url)
 
         return webdriver_instance
 
@@ -267,11 +912,10 @@ class OperaExecutor(WashExecutor):
     """
     WASH script executor that uses Opera browser.
     """
-    def __init__(self, browser_options, **kwargs):
+    def __init__(self, **kwargs):
         super(OperaExecutor, self).__init__(**kwargs)
-        self.__opera_options = browser_options
 
-    def _start_webdriver_instance(self, url: str):
+    def _create_webdriver_instance(self) -> WebDriver:
         if not self._options.opera_webdriver_path:
             raise WashError('Current WASH configuration uses Opera WebDriver,'
                             ' but the path was not specified in options.')
@@ -279,10 +923,8 @@ class OperaExecutor(WashExecutor):
             raise FileNotFoundError('Unable to find Opera WebDriver on specified path: "{}"'
                                     .format(self._options.opera_webdriver_path))
 
-        webdriver_instance = webdriver.Opera(options=self.__opera_options,
+        webdriver_instance = webdriver.Opera(options=self._browser_options,
                                              executable_path=self._options.opera_webdriver_path)
-        webdriver_instance.implicitly_wait(time_to_wait=self._time_to_wait)
-        webdriver_instance.get(url)
 
         return webdriver_instance
 
@@ -291,11 +933,10 @@ class SafariExecutor(WashExecutor):
     """
     WASH script executor that uses Safari browser.
     """
-    def __init__(self, browser_options, **kwargs):
+    def __init__(self, **kwargs):
         super(SafariExecutor, self).__init__(**kwargs)
-        self.__safari_options = browser_options
 
-    def _start_webdriver_instance(self, url: str):
+    def _create_webdriver_instance(self) -> WebDriver:
 
         # TODO (fivkovic): Safari still does not support headless mode in 2021. Disable support for now.
         # Reference: https://github.com/SeleniumHQ/selenium/issues/5985
@@ -308,7 +949,57 @@ class SafariExecutor(WashExecutor):
                                     .format(self._options.safari_webdriver_path))
 
         webdriver_instance = webdriver.Safari(executable_path=self._options.safari_webdriver_path)
-        webdriver_instance.implicitly_wait(time_to_wait=self._time_to_wait)
-        webdriver_instance.get(url)
 
         return webdriver_instance
+
+
+class StaticExecutor(WashExecutor):
+    """
+    WASH script executor that parses documents statically (using lxml) instead of using a browser.
+    Intended for large static documents (e.g. local HTML archives): JavaScript is not executed
+    and commands (interactions, navigation) are not supported.
+
+    Top-level contexts of local files that are selected using a single streamable selector
+    (e.g. '?c .table-entry') are streamed, i.e. the file is parsed incrementally and
+    each context item is released once it has been processed. Contexts are streamed only if they are
+    iterated over once (i.e. not in incremental execution) and their context expression queries only
+    the subtrees of the items (i.e. does not use XPath queries, which may select ancestors or preceding
+    siblings of the items).
+    """
+    def __init__(self, **kwargs):
+        super(StaticExecutor, self).__init__(**kwargs)
+
+    def _create_webdriver_instance(self):
+        from wash_lang_prototype.core.static import StaticDocument
+
+        return StaticDocument()
+
+    def _prepare_root_context(self, webdriver_instance, queries: list[Query],
+                              context_expression: ContextExpression = None, single_pass: bool = False):
+        from wash_lang_prototype.core.static import is_streamable_css_selector
+
+        if single_pass and context_expression and self.__queries_item_subtrees_only(context_expression) \
+                and webdriver_instance.is_memory_mapped and len(queries) == 1 \
+                and isinstance(queries[0], SelectorQuery) and not isinstance(queries[0], IndexSelectorQuery):
+            browser_step = queries[0].get_browser_step()
+            if browser_step['type'] == 'css' and is_streamable_css_selector(browser_step['value']):
+                return webdriver_instance.stream_elements(browser_step['value'], first=browser_step.get('first', False))
+
+        return super(StaticExecutor, self)._prepare_root_context(webdriver_instance=webdriver_instance,
+                                                                 queries=queries)
+
+    @classmethod
+    def __queries_item_subtrees_only(cls, context_expression: ContextExpression) -> bool:
+        """
+        Determines whether the expressions of the given context expression (including nested context expressions)
+        query only the subtrees of the context items. XPath queries may select ancestors or siblings of the items.
+        """
+        for expression in context_expression.expressions:
+            if any(isinstance(query, XPathSelectorQuery) for query in expression.queries):
+                return False
+            nested_context_expression = expression.context_expression or \
+                (expression.context_expression_ref.context_expression if expression.context_expression_ref else None)
+            if nested_context_expression and not cls.__queries_item_subtrees_only(nested_context_expression):
+                return False
+
+        return True
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+from typing import Any, Container, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+
+# NOTE: SHA-1 of the UTF-8 encoded outer HTML, i.e. the same fingerprint as fingerprint_html computes in Python,
+# so that fingerprints stored by executions with and without a browser (or its scripting) can be compared.
+ELEMENT_FINGERPRINTS_SCRIPT = """
+function sha1(bytes) {
+    var length = bytes.length, words = new Uint32Array((((length + 8) >> 6) + 1) * 16), w = new Uint32Array(80);
+    for (var i = 0; i < length; i++) {
+        words[i >> 2] |= bytes[i] << (24 - (i & 3) * 8);
+    }
+    words[length >> 2] |= 0x80 << (24 - (length & 3) * 8);
+    words[words.length - 2] = Math.floor(length / 0x20000000);
+    words[words.length - 1] = length * 8;
+
+    var h0 = 0x67452301, h1 = 0xefcdab89, h2 = 0x98badcfe, h3 = 0x10325476, h4 = 0xc3d2e1f0;
+    for (var block = 0; block < words.length; block += 16) {
+        for (var t = 0; t < 80; t++) {
+            if (t < 16) {
+                w[t] = words[block + t];
+            } else {
+                var x = w[t - 3] ^ w[t - 8] ^ w[t - 14] ^ w[t - 16];
+                w[t] = (x << 1) | (x >>> 31);
+            }
+        }
+        var a = h0, b = h1, c = h2, d = h3, e = h4;
+        for (t = 0; t < 80; t++) {
+            var f, k;
+            if (t < 20) { f = (b & c) | (~b & d); k = 0x5a827999; }
+            else if (t < 40) { f = b ^ c ^ d; k = 0x6ed9eba1; }
+            else if (t < 60) { f = (b & c) | (b & d) | (c & d); k = 0x8f1bbcdc; }
+            else { f = b ^ c ^ d; k = 0xca62c1d6; }
+            var temp = (((a << 5) | (a >>> 27)) + f + e + k + w[t]) | 0;
+            e = d; d = c; c = (b << 30) | (b >>> 2); b = a; a = temp;
+        }
+        h0 = (h0 + a) | 0; h1 = (h1 + b) | 0; h2 = (h2 + c) | 0; h3 = (h3 + d) | 0; h4 = (h4 + e) | 0;
+    }
+
+    return [h0, h1, h2, h3, h4].map(function (h) { return ('0000000' + (h >>> 0).toString(16)).slice(-8); }).join('');
+}
+
+var encoder = new TextEncoder();
+return arguments[0].map(function (element) { return sha1(encoder.encode(element.outerHTML)); });
+"""
+
+
+def fingerprint_html(html: str) -> str:
+    """
+    Computes the content fingerprint of an element with the given outer HTML (see fingerprint_elements).
+    """
+    return hashlib.sha1(html.encode('utf-8')).hexdigest()
+
+
+def fingerprint_elements(elements: list) -> list[str]:
+    """
+    Computes content fingerprints (based on the outer HTML) of the given web elements.
+    The fingerprints are computed in the browser when possible, so that the HTML itself is not transferred.
+    Both ways compute the same fingerprint (see fingerprint_html).
+    """
+    if not elements:
+        return []
+
+    webdriver_instance = getattr(elements[0], 'parent', None)
+    if hasattr(webdriver_instance, 'execute_script'):
+        try:
+            return webdriver_instance.execute_script(ELEMENT_FINGERPRINTS_SCRIPT, elements)
+        except WebDriverException:
+            pass
+
+    return [fingerprint_html(element.get_attribute('outerHTML')) for element in elements]
+
+
+def get_key_identity(key: Any) -> Optional[str]:
+    """
+    Returns the identity of an item with the given key value, or None if the key is empty
+    (i.e. the key expression matched nothing in the item).
+    """
+    if key is None or (isinstance(key, (str, list, tuple, dict)) and not key):
+        return None
+
+    return str(key)
+
+
+def get_item_identity(key: Any, fingerprint: str, identities: Container[str]) -> str:
+    """
+    Returns the identity of a context item that is not one of the given identities: the value of its key or,
+    if the key is empty or already identifies another item, its fingerprint. Identical items (i.e. items with
+    the same fingerprint) are numbered by their occurrence.
+    """
+    identity = get_key_identity(key)
+    if identity is not None and identity not in identities:
+        return identity
+
+    identity, occurrence = fingerprint, 1
+    while identity in identities:
+        identity = f'{fingerprint}#{occurrence}'
+        occurrence += 1
+
+    return identity
+
+
+class IncrementalChanges:
+    """
+    Encapsulates the identities of new, changed and removed items of a single result key,
+    detected by comparing the current execution with the previous one.
+    """
+    def __init__(self):
+        self.new = []               # type: list[str]
+        self.changed = []           # type: list[str]
+        self.removed = []           # type: list[str]
+        self.unchanged = 0          # type: int
+
+    def to_dict(self) -> dict:
+        return {'new': self.new, 'changed': self.changed, 'removed': self.removed, 'unchanged': self.unchanged}
+
+
+class IncrementalStateStore:
+    """
+    Stores fingerprints of extracted context items in a local SQLite database,
+    keyed by the scope (i.e. script and URL), result key and identity of the item.
+    """
+
+    def __init__(self, path: str):
+        self.__connection = sqlite3.connect(path)
+        self.__connection.execute('CREATE TABLE IF NOT EXISTS wash_incremental_state ('
+                                  'scope TEXT NOT NULL, result_key TEXT NOT NULL, identity TEXT NOT NULL, '
+                                  'fingerprint TEXT NOT NULL, last_seen REAL NOT NULL, '
+                                  'PRIMARY KEY (scope, result_key, identity))')
+        self.__connection.commit()
+
+    @staticmethod
+    def create_scope(script_location: str, document_location: str) -> str:
+        """
+        Creates the scope identifier for the given script (file path or contents) and document location.
+        """
+        return hashlib.sha256(f'{script_location}\n{document_location}'.encode('utf-8')).hexdigest()
+
+    def load(self, scope: str, result_key: str) -> dict[str, str]:
+        """
+        Returns the fingerprints of all items stored for the given scope and result key, mapped by item identity.
+        """
+        rows = self.__connection.execute('SELECT identity, fingerprint FROM wash_incremental_state '
+                                         'WHERE scope = ? AND result_key = ?', (scope, result_key))
+        return dict(rows.fetchall())
+
+    def save(self, scope: str, result_key: str, fingerprints: dict[str, str]):
+        """
+        Replaces the stored fingerprints for the given scope and result key with the given ones.
+        """
+        with self.__connection:
+            self.__connection.execute('DELETE FROM wash_incremental_state WHERE scope = ? AND result_key = ?',
+                                      (scope, result_key))
+            last_seen = time.time()
+            self.__connection.executemany('INSERT INTO wash_incremental_state VALUES (?, ?, ?, ?, ?)',
+                                          ((scope, result_key, identity, fingerprint, last_seen)
+                                           for identity, fingerprint in fingerprints.items()))
+
+    def close(self):
+        self.__connection.close()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class InlineDocumentServer:
+    """
+    Serves inline HTML documents (specified using the 'html' open statement) to the browser
+    from an ephemeral HTTP server bound to the loopback interface.
+
+    Loading inline documents over HTTP avoids the URL length limits and the escaping issues ('#', '%')
+    of data URLs. Documents are addressed by the hash of their content and reference counted,
+    so concurrent executions of the same script share a single document.
+    """
+
+    def __init__(self, host: str = '127.0.0.1'):
+        self.__documents = {}                                   # type: dict[str, list]  [content, reference count]
+        self.__lock = threading.Lock()
+        self.__http_server = ThreadingHTTPServer((host, 0), self.__create_request_handler())
+        self.__http_server.daemon_threads = True
+        threading.Thread(target=self.__http_server.serve_forever, name='wash-inline-documents', daemon=True).start()
+
+    def register(self, html: str) -> str:
+        """
+        Registers the given HTML document and returns the URL it is served on.
+        """
+        content = html.encode('utf-8')
+        token = hashlib.sha256(content).hexdigest()
+        with self.__lock:
+            document = self.__documents.setdefault(token, [content, 0])
+            document[1] += 1
+
+        host, port = self.__http_server.server_address[:2]
+        return f'http://{host}:{port}/{token}.html'
+
+    def unregister(self, url: str):
+        """
+        Releases the document served on the given URL. The document is no longer served once all
+        executions that registered it have released it.
+        """
+        token = url.rsplit('/', 1)[-1][:-len('.html')]
+        with self.__lock:
+            document = self.__documents.get(token)
+            if document:
+                document[1] -= 1
+                if document[1] <= 0:
+                    del self.__documents[token]
+
+    def get_document(self, token: str) -> [bytes, None]:
+        with self.__lock:
+            document = self.__documents.get(token)
+            return document[0] if document else None
+
+    def __create_request_handler(self):
+        server = self
+
+        class InlineDocumentRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0].lstrip('/')
+                content = server.get_document(path[:-len('.html')]) if path.endswith('.html') else None
+                if content is None:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                    return
+
+                self.send_response(HTTPStatus.OK)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return InlineDocumentRequestHandler
+
+
+_inline_document_server = None
+_inline_document_server_lock = threading.Lock()
+
+
+def get_inline_document_server() -> InlineDocumentServer:
+    """
+    Returns the inline document server of the current process, starting it on first use.
+    """
+    global _inline_document_server
+    with _inline_document_server_lock:
+        if _inline_document_server is None:
+            _inline_document_server = InlineDocumentServer()
+
+        return _inline_document_server
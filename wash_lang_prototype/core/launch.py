@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+class BrowserLaunch:
+    """
+    A webdriver instance being started on a background thread, so that the browser startup overlaps with the
+    work done before the instance is needed (parsing the script, handling the configuration, preparing the
+    execution). The launched instance is handed over to at most one executor, which uses it only if the key
+    of the launch matches its own WebDriver pool key (i.e. the same browser started with the same options).
+    Launches that are not used have to be discarded, which quits the instance once it is started.
+    """
+
+    def __init__(self, key: str, factory: Callable[[], WebDriver]):
+        """
+        Args:
+            key(str): The key identifying compatible webdriver instances (see WashExecutor._get_webdriver_pool_key).
+            factory: Callable that creates the webdriver instance (called on the background thread).
+        """
+        self.__key = key                                    # type: str
+        self.__future = Future()                            # type: Future
+        self.__lock = threading.Lock()
+        self.__claimed = False
+        self.__discarded = False
+        threading.Thread(target=self.__launch, args=(factory,), name='wash-browser-launch', daemon=True).start()
+
+    @property
+    def key(self) -> str:
+        return self.__key
+
+    def claim(self, key: str) -> bool:
+        """
+        Claims the launched instance for an executor using webdriver instances identified by the given key.
+        Returns False if the keys do not match or the instance has already been claimed or discarded.
+        """
+        with self.__lock:
+            if self.__claimed or self.__discarded or key != self.__key:
+                return False
+            self.__claimed = True
+            return True
+
+    def result(self, timeout: float = None) -> WebDriver:
+        """
+        Waits until the webdriver instance is started and returns it.
+        Raises the exception raised while starting the instance, if any.
+        """
+        return self.__future.result(timeout=timeout)
+
+    def discard(self):
+        """
+        Quits the launched instance once it is started (e.g. if the launch is not used by an execution).
+        """
+        with self.__lock:
+            if self.__discarded:
+                return
+            self.__discarded = True
+        self.__future.add_done_callback(self.__quit)
+
+    def __launch(self, factory: Callable[[], WebDriver]):
+        try:
+            self.__future.set_result(factory())
+        except BaseException as e:
+            self.__future.set_exception(e)
+
+    @staticmethod
+    def __quit(future: Future):
+        if future.exception() is None:
+            try:
+                future.result().quit()
+            except Exception:
+                pass
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_NO_OP_TIMER = nullcontext()
+
+
+class MetricsRegistry:
+    """
+    Collects counters and histograms reported during WASH script execution.
+
+    This is the no-op registry used by default: all methods return immediately, so collecting
+    metrics costs nothing unless a registry that records them is installed using set_metrics_registry().
+    """
+
+    enabled = False
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """
+        Increments the counter with the given name and labels.
+        """
+        pass
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Records an observation (e.g. a duration in seconds) in the histogram with the given name and labels.
+        """
+        pass
+
+    def timer(self, name: str, **labels):
+        """
+        Records the duration of the enclosed block in the histogram with the given name and labels.
+        """
+        return _NO_OP_TIMER
+
+    def export(self) -> str:
+        """
+        Returns the collected metrics in the Prometheus text exposition format.
+        """
+        return ''
+
+
+class PrometheusMetricsRegistry(MetricsRegistry):
+    """
+    Registry that keeps counters and histograms in memory and exports them
+    in the Prometheus text exposition format.
+    """
+
+    enabled = True
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.__buckets = tuple(sorted(buckets))                 # type: tuple[float]
+        self.__counters = {}                                    # type: dict[str, dict[tuple, float]]
+        self.__histograms = {}                                  # type: dict[str, dict[tuple, list]]
+        self.__lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels):
+        label_values = tuple(sorted(labels.items()))
+        with self.__lock:
+            counter = self.__counters.setdefault(name, {})
+            counter[label_values] = counter.get(label_values, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        label_values = tuple(sorted(labels.items()))
+        with self.__lock:
+            histogram = self.__histograms.setdefault(name, {})
+            # NOTE: Histogram state is [bucket counts..., sum, count].
+            state = histogram.setdefault(label_values, [0] * (len(self.__buckets) + 2))
+            bucket_index = bisect.bisect_left(self.__buckets, value)
+            if bucket_index < len(self.__buckets):
+                state[bucket_index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start_time, **labels)
+
+    def export(self) -> str:
+        lines = []
+        with self.__lock:
+            for name, counter in sorted(self.__counters.items()):
+                lines.append(f'# TYPE {name} counter')
+                for label_values, value in counter.items():
+                    lines.append(f'{name}{self.__format_labels(label_values)} {value}')
+
+            for name, histogram in sorted(self.__histograms.items()):
+                lines.append(f'# TYPE {name} histogram')
+                for label_values, state in histogram.items():
+                    cumulative_count = 0
+                    for bucket, bucket_count in zip(self.__buckets, state):
+                        cumulative_count += bucket_count
+                        bucket_labels = label_values + (('le', str(bucket)),)
+                        lines.append(f'{name}_bucket{self.__format_labels(bucket_labels)} {cumulative_count}')
+                    infinity_labels = label_values + (('le', '+Inf'),)
+                    lines.append(f'{name}_bucket{self.__format_labels(infinity_labels)} {state[-1]}')
+                    lines.append(f'{name}_sum{self.__format_labels(label_values)} {state[-2]}')
+                    lines.append(f'{name}_count{self.__format_labels(label_values)} {state[-1]}')
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def __format_labels(label_values: tuple) -> str:
+        if not label_values:
+            return ''
+
+        formatted_labels = ','.join('{}="{}"'.format(
+            label, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for label, value in label_values)
+        return '{' + formatted_labels + '}'
+
+
+_metrics_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Returns the metrics registry used by WASH executors and queries.
+    """
+    return _metrics_registry
+
+
+def set_metrics_registry(metrics_registry: MetricsRegistry = None):
+    """
+    Installs the given metrics registry. If None is given, the no-op registry is restored.
+    """
+    global _metrics_registry
+    _metrics_registry = metrics_registry or MetricsRegistry()
@@ -10,6 +10,17 @@ class WashOptions:
         self._edge_webdriver_path = None
         self._opera_webdriver_path = None
         self._safari_webdriver_path = None
+        self._asset_directory = None
+        self._asset_download_workers = 8
+        self._incremental_state_path = None
+        self._incremental_key = None
+        self._shard_processes = 1
+        self._shard_min_items = 1000
+        self._storage_state_path = None
+        self._chrome_binary_path = None
+        self._automation_protocol = None
+        self._sample_size = None
+        self._prelaunch_browser = False
 
     @property
     def chrome_webdriver_path(self) -> str:
@@ -60,3 +71,113 @@ class WashOptions:
     def safari_webdriver_path(self, value: str):
         """ Sets the path of the Safari WebDriver executable to be used """
         self._safari_webdriver_path = value
+
+    @property
+    def asset_directory(self) -> str:
+        """ Gets the directory used to store images and screenshots extracted during execution """
+        return self._asset_directory
+
+    @asset_directory.setter
+    def asset_directory(self, value: str):
+        """ Sets the directory used to store images and screenshots extracted during execution """
+        self._asset_directory = value
+
+    @property
+    def asset_download_workers(self) -> int:
+        """ Gets the maximum number of concurrent asset downloads """
+        return self._asset_download_workers
+
+    @asset_download_workers.setter
+    def asset_download_workers(self, value: int):
+        """ Sets the maximum number of concurrent asset downloads """
+        self._asset_download_workers = value
+
+    @property
+    def incremental_state_path(self) -> str:
+        """ Gets the path of the state database used for incremental execution """
+        return self._incremental_state_path
+
+    @incremental_state_path.setter
+    def incremental_state_path(self, value: str):
+        """ Sets the path of the state database used for incremental execution (enables incremental execution) """
+        self._incremental_state_path = value
+
+    @property
+    def incremental_key(self) -> str:
+        """ Gets the result key used to identify items of top-level contexts in incremental execution """
+        return self._incremental_key
+
+    @incremental_key.setter
+    def incremental_key(self, value: str):
+        """ Sets the result key used to identify items of top-level contexts in incremental execution """
+        self._incremental_key = value
+
+    @property
+    def shard_processes(self) -> int:
+        """ Gets the number of worker processes large top-level contexts of static documents are sharded across """
+        return self._shard_processes
+
+    @shard_processes.setter
+    def shard_processes(self, value: int):
+        """ Sets the number of worker processes large top-level contexts of static documents are sharded across """
+        self._shard_processes = value
+
+    @property
+    def shard_min_items(self) -> int:
+        """ Gets the minimum number of context items required for a top-level context to be sharded """
+        return self._shard_min_items
+
+    @shard_min_items.setter
+    def shard_min_items(self, value: int):
+        """ Sets the minimum number of context items required for a top-level context to be sharded """
+        self._shard_min_items = value
+
+    @property
+    def storage_state_path(self) -> str:
+        """ Gets the path of the file the browser session state (cookies, local storage) is persisted in """
+        return self._storage_state_path
+
+    @storage_state_path.setter
+    def storage_state_path(self, value: str):
+        """ Sets the path of the file the browser session state is restored from and saved to after execution """
+        self._storage_state_path = value
+
+    @property
+    def chrome_binary_path(self) -> str:
+        """ Gets the location of the Chrome executable started by the Chrome DevTools Protocol executor """
+        return self._chrome_binary_path
+
+    @chrome_binary_path.setter
+    def chrome_binary_path(self, value: str):
+        """ Sets the location of the Chrome executable started by the Chrome DevTools Protocol executor """
+        self._chrome_binary_path = value
+
+    @property
+    def automation_protocol(self) -> str:
+        """ Gets the protocol used to control Chrome (overrides the automation protocol of the configuration) """
+        return self._automation_protocol
+
+    @automation_protocol.setter
+    def automation_protocol(self, value: str):
+        """ Sets the protocol used to control Chrome: webdriver or cdp (Chrome DevTools Protocol) """
+        self._automation_protocol = value
+
+    @property
+    def sample_size(self) -> int:
+        """ Gets the maximum number of items processed per context in sampling (preview) mode """
+        return self._sample_size
+
+    @sample_size.setter
+    def sample_size(self, value: int):
+        """ Sets the maximum number of items processed per context (None processes all items) """
+        self._sample_size = value
+
+    @property
+    def prelaunch_browser(self) -> bool:
+        """ Gets the value indicating whether the browser is started while the script is being prepared """
+        return self._prelaunch_browser
+
+    @prelaunch_browser.setter
+    def prelaunch_browser(self, value: bool):
+        """ Sets whether the browser is started on a background thread while the script is parsed and configured """
+        self._prelaunch_browser = value
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import threading
+import time
+import urllib.error
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+
+# NOTE: Status codes of responses that ask the client to slow down.
+THROTTLING_STATUS_CODES = (429, 503)
+DEFAULT_MAX_BACKOFF = 300                                   # Seconds
+
+NAVIGATION_STATUS_SCRIPT = """
+var entry = performance.getEntriesByType('navigation')[0];
+return entry && entry.responseStatus ? entry.responseStatus : null;
+"""
+
+
+class HostPolicy:
+    """
+    Limits of the requests sent to a single host.
+    """
+    def __init__(self, max_concurrency: int = 2, min_delay: float = 1.0, requests_per_second: float = None,
+                 burst: int = 1, max_backoff: float = DEFAULT_MAX_BACKOFF):
+        """
+        Args:
+            max_concurrency(int): Maximum number of concurrent requests to the host.
+            min_delay(float): Minimum time (in seconds) between the starts of two requests to the host.
+            requests_per_second(float): Rate at which the token bucket of the host is refilled (None for no limit).
+            burst(int): Capacity of the token bucket, i.e. the number of requests that can be sent at once
+                        after the host has been idle.
+            max_backoff(float): Maximum time (in seconds) the host is paused after throttling responses
+                                without a Retry-After header.
+        """
+        self.max_concurrency = max_concurrency              # type: int
+        self.min_delay = min_delay                          # type: float
+        self.requests_per_second = requests_per_second      # type: Optional[float]
+        self.burst = max(burst, 1)                          # type: int
+        self.max_backoff = max_backoff                      # type: float
+
+
+class HostState:
+    """
+    Politeness state of a single host. The state is kept in memory by a PolitenessScheduler, or stored in
+    a JobBroker (see SQLiteJobBroker), so that it is shared by the workers of a distributed run.
+    Times are wall-clock timestamps (time.time()), so that they can be compared across processes.
+    """
+    def __init__(self, policy: HostPolicy, in_flight: int = 0, last_start: float = None, tokens: float = None,
+                 tokens_updated_at: float = None, paused_until: float = 0.0, throttled_responses: int = 0):
+        self.in_flight = in_flight                                                  # type: int
+        self.last_start = last_start                                                # type: Optional[float]
+        self.tokens = float(policy.burst) if tokens is None else tokens             # type: float
+        self.tokens_updated_at = tokens_updated_at or time.time()                   # type: float
+        self.paused_until = paused_until                                            # type: float
+        self.throttled_responses = throttled_responses                              # type: int
+
+
+class PolitenessScheduler:
+    """
+    Schedules requests (i.e. executions against a URL) so that each host is accessed politely: the number of
+    concurrent requests, the delay between requests and the request rate (token bucket) are limited per host
+    (see HostPolicy), and a host is paused after it responds with 429 or 503 - for the time given by its
+    Retry-After header or, without the header, for an exponentially growing time.
+
+    Hosts are independent, so requests to other hosts proceed while a host is limited.
+
+    The states of the hosts are kept in memory (i.e. per process), and the jobs of a WashServer wait until
+    their host is ready (see acquire and release). Distributed runs keep the states in the job broker instead,
+    and use the scheduler only to apply the policies to them (see get_state_delay, start_request and
+    finish_request), so that workers lease the oldest job whose host is ready, which interleaves the hosts.
+    """
+
+    def __init__(self, default_policy: HostPolicy = None, policies: dict[str, HostPolicy] = None):
+        """
+        Args:
+            default_policy(HostPolicy): Policy of the hosts without a policy of their own.
+            policies(dict[str, HostPolicy]): Policies by host name (e.g. 'example.com').
+        """
+        self.__default_policy = default_policy or HostPolicy()
+        self.__policies = dict(policies or {})              # type: dict[str, HostPolicy]
+        self.__hosts = {}                                   # type: dict[str, HostState]
+        self.__condition = threading.Condition()
+        self.__statistics = defaultdict(int)                # type: dict[str, int]
+
+    @staticmethod
+    def get_host(url: Optional[str]) -> str:
+        return (urlparse(url).hostname or '').lower() if url else ''
+
+    def acquire(self, url: Optional[str], timeout: float = None) -> bool:
+        """
+        Waits until a request to the host of the given URL can be started, and reserves it.
+        Every reserved request has to be released (see release).
+        Returns False if the timeout (in seconds) elapses first.
+        """
+        host = self.get_host(url)
+        deadline = None if timeout is None else time.time() + timeout
+        with self.__condition:
+            while True:
+                now = time.time()
+                state = self.__get_state(host)
+                delay = self.get_state_delay(host, state, now)
+                if delay <= 0:
+                    self.start_request(host, state, now)
+                    return True
+                if deadline is not None:
+                    if now >= deadline:
+                        return False
+                    delay = min(delay, deadline - now)
+                self.__condition.wait(None if delay == float('inf') else delay)
+
+    def release(self, url: Optional[str], throttled: bool = False, retry_after: float = None):
+        """
+        Releases a request reserved by acquire.
+
+        Args:
+            url(str): The URL of the request.
+            throttled(bool): Indicates whether the host responded with a throttling status (429 or 503).
+            retry_after(float): The time (in seconds) after which the host accepts requests again (Retry-After).
+        """
+        host = self.get_host(url)
+        with self.__condition:
+            self.finish_request(host, self.__get_state(host), time.time(), throttled=throttled, retry_after=retry_after)
+            self.__condition.notify_all()
+
+    def statistics(self) -> dict:
+        with self.__condition:
+            return dict(self.__statistics, hosts=len(self.__hosts),
+                        in_flight=sum(state.in_flight for state in self.__hosts.values()))
+
+    def get_policy(self, host: str) -> HostPolicy:
+        return self.__policies.get(host, self.__default_policy)
+
+    def get_state_delay(self, host: str, state: HostState, now: float) -> float:
+        """
+        Returns the time (in seconds) until a request to the given host (in the given state) can be started,
+        0 if it can be started right away, or infinity if it has to wait for a running request to finish.
+        """
+        policy = self.get_policy(host)
+        if state.in_flight >= policy.max_concurrency:
+            return float('inf')
+
+        delay = state.paused_until - now
+        if state.last_start is not None:
+            delay = max(delay, state.last_start + policy.min_delay - now)
+        if policy.requests_per_second:
+            self.__refill(state, policy, now)
+            delay = max(delay, (1 - state.tokens) / policy.requests_per_second)
+
+        return max(delay, 0.0)
+
+    def start_request(self, host: str, state: HostState, now: float):
+        """
+        Records the start of a request to the given host in the given state.
+        """
+        policy = self.get_policy(host)
+        state.in_flight += 1
+        state.last_start = now
+        if policy.requests_per_second:
+            self.__refill(state, policy, now)
+            state.tokens -= 1
+        with self.__condition:
+            self.__statistics['requests'] += 1
+
+    def finish_request(self, host: str, state: HostState, now: float, throttled: bool = False,
+                       retry_after: float = None):
+        """
+        Records the end of a request to the given host in the given state. A throttled host is paused for the
+        Retry-After time or, without it, for an exponentially growing time (see release).
+        """
+        state.in_flight = max(state.in_flight - 1, 0)
+        if throttled:
+            policy = self.get_policy(host)
+            state.throttled_responses += 1
+            with self.__condition:
+                self.__statistics['throttled_responses'] += 1
+            pause = retry_after if retry_after is not None \
+                else min(max(policy.min_delay, 1.0) * 2 ** (state.throttled_responses - 1), policy.max_backoff)
+            state.paused_until = max(state.paused_until, now + pause)
+        else:
+            state.throttled_responses = 0
+
+    def __get_state(self, host: str) -> HostState:
+        state = self.__hosts.get(host)
+        if state is None:
+            state = self.__hosts[host] = HostState(self.get_policy(host))
+
+        return state
+
+    @staticmethod
+    def __refill(state: HostState, policy: HostPolicy, now: float):
+        state.tokens = min(state.tokens + (now - state.tokens_updated_at) * policy.requests_per_second,
+                           float(policy.burst))
+        state.tokens_updated_at = now
+
+
+def get_navigation_status(webdriver_instance) -> Optional[int]:
+    """
+    Returns the HTTP status code of the document loaded by the given webdriver instance,
+    or None if it is not available (e.g. the browser does not report it).
+    """
+    if not hasattr(webdriver_instance, 'execute_script'):
+        return None
+    try:
+        return webdriver_instance.execute_script(NAVIGATION_STATUS_SCRIPT)
+    except WebDriverException:
+        return None
+
+
+def get_navigation_retry_after(webdriver_instance) -> Optional[float]:
+    """
+    Returns the time (in seconds) given by the Retry-After header of the document loaded by the given webdriver
+    instance, or None if it is not available. Only instances that keep the response of the document
+    (see CdpDocument.navigation_response) provide the header - WebDriver does not expose response headers,
+    so hosts throttling ChromeDriver-based executions are paused with an exponential backoff instead.
+    """
+    response = getattr(webdriver_instance, 'navigation_response', None)
+    if not isinstance(response, dict):
+        return None
+    headers = response.get('headers') or {}
+
+    return parse_retry_after(next((value for name, value in headers.items() if name.casefold() == 'retry-after'),
+                                  None))
+
+
+def get_throttling(exception: BaseException) -> tuple[bool, Optional[float]]:
+    """
+    Returns whether the given exception was caused by a throttling response (429 or 503) and, if known,
+    the time (in seconds) after which the request can be retried.
+    """
+    from wash_lang_prototype.core.exceptions import WashThrottledError
+
+    if isinstance(exception, WashThrottledError):
+        return True, exception.retry_after
+    if isinstance(exception, urllib.error.HTTPError) and exception.code in THROTTLING_STATUS_CODES:
+        return True, parse_retry_after(exception.headers.get('Retry-After') if exception.headers else None)
+
+    return False, None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses the value of a Retry-After header (delay in seconds or an HTTP date) into a delay in seconds.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
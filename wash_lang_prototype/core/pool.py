@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Callable
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+CLEAR_WEB_STORAGE_SCRIPT = """
+try {
+    window.localStorage.clear();
+    window.sessionStorage.clear();
+} catch (e) {
+    // NOTE: Documents without web storage (e.g. opaque origins).
+}
+"""
+
+
+class WebDriverPool:
+    """
+    Keeps started webdriver instances warm between WASH script executions.
+
+    Instances are pooled by key (i.e. browser type and browser options), so that an executor only reuses
+    instances started with the same configuration. Released instances are reset (cookies, and the local and
+    session storage of the last loaded origin are cleared, and a blank page is loaded) before they are handed
+    out again. Web storage of other origins visited by the script is kept, as WebDriver only accesses the
+    storage of the loaded document.
+    """
+
+    def __init__(self, max_idle_instances: int = 4):
+        self.__max_idle_instances = max_idle_instances                  # type: int
+        self.__idle_instances = defaultdict(list)                       # type: dict[str, list[WebDriver]]
+        self.__lock = threading.Lock()
+        self.__closed = False
+
+    def acquire(self, key: str, factory: Callable[[], WebDriver]) -> WebDriver:
+        """
+        Returns an idle webdriver instance for the given key, or creates a new one using the given factory.
+
+        Args:
+            key(str): The key identifying compatible webdriver instances.
+            factory: Callable that creates a new webdriver instance.
+        """
+        with self.__lock:
+            idle_instances = self.__idle_instances[key]
+            webdriver_instance = idle_instances.pop() if idle_instances else None
+
+        return webdriver_instance or factory()
+
+    def release(self, key: str, webdriver_instance: WebDriver):
+        """
+        Resets the given webdriver instance and returns it to the pool.
+        The instance is quit in case it cannot be reset or the pool is full.
+
+        Args:
+            key(str): The key identifying compatible webdriver instances.
+            webdriver_instance(WebDriver): The webdriver instance to be released.
+        """
+        try:
+            if hasattr(webdriver_instance, 'execute_cdp_cmd'):
+                webdriver_instance.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            else:
+                webdriver_instance.delete_all_cookies()
+            if hasattr(webdriver_instance, 'execute_script'):
+                webdriver_instance.execute_script(CLEAR_WEB_STORAGE_SCRIPT)
+            webdriver_instance.get('about:blank')
+        except Exception:
+            self.__quit(webdriver_instance)
+            return
+
+        with self.__lock:
+            idle_instances = self.__idle_instances[key]
+            if not self.__closed and len(idle_instances) < self.__max_idle_instances:
+                idle_instances.append(webdriver_instance)
+                return
+
+        self.__quit(webdriver_instance)
+
+    def idle_instance_count(self) -> int:
+        with self.__lock:
+            return sum(len(idle_instances) for idle_instances in self.__idle_instances.values())
+
+    def close(self):
+        """
+        Quits all idle webdriver instances. Instances released after closing the pool are quit immediately.
+        """
+        with self.__lock:
+            self.__closed = True
+            idle_instances = [instance for instances in self.__idle_instances.values() for instance in instances]
+            self.__idle_instances.clear()
+
+        for webdriver_instance in idle_instances:
+            self.__quit(webdriver_instance)
+
+    @staticmethod
+    def __quit(webdriver_instance: WebDriver):
+        try:
+            webdriver_instance.quit()
+        except Exception:
+            pass
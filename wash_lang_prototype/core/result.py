@@ -1,5 +1,7 @@
 import json
 
+from wash_lang_prototype.core.assets import AssetReference
+
 
 class ExecutionResult:
     """
@@ -46,4 +48,11 @@ class ExecutionResult:
                     attribute = attr_value
 
     def to_json(self):
-        return json.dumps(self, default=lambda o: o.__get_dict())
+        return json.dumps(self, default=ExecutionResult.__to_serializable)
+
+    @staticmethod
+    def __to_serializable(value):
+        if isinstance(value, AssetReference):
+            return value.location
+
+        return value.__get_dict()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from wash_lang_prototype.core.wait import DEFAULT_WAIT_TIMEOUT, wait_for_dom_stable
+
+
+DEFAULT_SCROLL_SETTLE_TIME = 0.5                            # Seconds
+DEFAULT_IDLE_SCROLL_ROUNDS = 3
+DEFAULT_IDLE_SCROLL_TIMEOUT = 60                            # Seconds (without new items, if only the count is set)
+
+SCROLL_PAST_ELEMENT_SCRIPT = """
+var element = arguments[0];
+if (element && element.isConnected) {
+    // NOTE: Scrolling the last rendered item to the top (instead of scrolling to the end of the list) makes
+    // virtualized lists render the items following it, so that no item is skipped.
+    element.scrollIntoView({block: 'start'});
+} else {
+    window.scrollBy(0, window.innerHeight);
+}
+"""
+
+
+def scroll_past(webdriver_instance: WebDriver, element: WebElement = None,
+                settle_time: float = DEFAULT_SCROLL_SETTLE_TIME, timeout: float = DEFAULT_WAIT_TIMEOUT) -> bool:
+    """
+    Scrolls the given element (i.e. the last item rendered so far) to the top of its scroll containers, or the
+    document by a single viewport if no element is given, and waits until the document was not mutated for the given
+    settle time, so that lazily loaded or rendered items appear.
+
+    Returns:
+        False if the document cannot be scrolled (i.e. documents without scripting), otherwise True.
+    """
+    if not hasattr(webdriver_instance, 'execute_script'):
+        return False
+
+    webdriver_instance.execute_script(SCROLL_PAST_ELEMENT_SCRIPT, element)
+    try:
+        wait_for_dom_stable(webdriver_instance, quiet_time=settle_time, timeout=timeout)
+    except TimeoutException:
+        pass                                                # NOTE: Documents that keep changing (e.g. animations).
+
+    return True
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from wash_lang_prototype.core.exceptions import WashError
+
+
+class ResultSelection:
+    """
+    Result keys requested from an execution of a WASH script, resolved against the static expressions
+    of the script (e.g. 'top_ten.link.link_url' selects the key link_url of the context expression of the key link,
+    nested in the context expression of the top-level key top_ten).
+
+    Expressions of keys that are not selected, along with their sub-contexts, are not executed.
+    Selecting a key whose expression has a context expression selects all of its nested keys.
+    """
+
+    def __init__(self, keys: dict):
+        """
+        Args:
+            keys(dict): Selected result keys, mapped to the selection of their nested keys
+                        (None if all nested keys are selected).
+        """
+        self.__keys = keys                                  # type: dict[str, Optional[ResultSelection]]
+
+    @staticmethod
+    def resolve(model, paths: Iterable[str]) -> Optional[ResultSelection]:
+        """
+        Resolves the given dot-separated result key paths against the expressions of the given WASH script model.
+        Returns None if no paths are given (i.e. all result keys are selected).
+
+        Raises:
+            WashError: If a path does not refer to a result key of the script.
+        """
+        paths = [path.strip() for path in paths or [] if path and path.strip()]
+        if not paths:
+            return None
+
+        keys = {}
+        for path in paths:
+            ResultSelection.__add_path(keys, model.expressions, path, path)
+
+        return ResultSelection.__create(keys)
+
+    def is_selected(self, result_key: str) -> bool:
+        return result_key in self.__keys
+
+    def get_nested_selection(self, result_key: str) -> Optional[ResultSelection]:
+        """
+        Returns the selection of the keys nested in the context expression of the given result key,
+        or None if all nested keys are selected.
+        """
+        return self.__keys.get(result_key)
+
+    def to_paths(self) -> list[str]:
+        """
+        Returns the dot-separated paths of the selected result keys (see resolve).
+        """
+        paths = []
+        for result_key, nested_selection in self.__keys.items():
+            if nested_selection is None:
+                paths.append(result_key)
+            else:
+                paths.extend(f'{result_key}.{nested_path}' for nested_path in nested_selection.to_paths())
+
+        return paths
+
+    @staticmethod
+    def __add_path(keys: dict, expressions: list, path: str, full_path: str):
+        expressions_by_key = {expression.result_key: expression for expression in expressions
+                              if hasattr(expression, 'result_key')}
+        result_key, _, nested_path = path.partition('.')
+        expression = expressions_by_key.get(result_key)
+        if expression is None:
+            raise WashError(f'Selected result key "{result_key}" ("{full_path}") does not exist. '
+                            f'Available result keys: {", ".join(expressions_by_key) or "none"}.')
+
+        if result_key in keys and keys[result_key] is None:
+            return                                          # NOTE: All nested keys are already selected.
+        if not nested_path:
+            keys[result_key] = None
+            return
+
+        context_expression = expression.context_expression if expression.context_expression \
+            else expression.context_expression_ref.context_expression if expression.context_expression_ref else None
+        if context_expression is None:
+            raise WashError(f'Result key "{result_key}" has no nested result keys (selected "{full_path}").')
+
+        ResultSelection.__add_path(keys.setdefault(result_key, {}), context_expression.expressions, nested_path,
+                                   full_path)
+
+    @staticmethod
+    def __create(keys: dict) -> ResultSelection:
+        return ResultSelection({result_key: None if nested_keys is None else ResultSelection.__create(nested_keys)
+                                for result_key, nested_keys in keys.items()})
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import codecs
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from textx import TextXError, metamodel_for_language
+
+from wash_lang_prototype.core.browser_context import BrowserContextPool
+from wash_lang_prototype.core.exceptions import WashError, WashLanguageError, WashRuntimeError
+from wash_lang_prototype.core.executor import create_executor_instance
+from wash_lang_prototype.core.metrics import get_metrics_registry
+from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.politeness import PolitenessScheduler, get_throttling
+from wash_lang_prototype.core.pool import WebDriverPool
+
+
+DEFAULT_WAIT_TIMEOUT = 60                                   # NOTE: Seconds
+
+class WashJob:
+    """
+    Represents a single WASH script execution submitted to the WashServer.
+    """
+    def __init__(self, script: str, script_file_path: Optional[str] = None, url: Optional[str] = None):
+        self.id = uuid.uuid4().hex                      # type: str
+        self.script = script                            # type: str
+        self.script_file_path = script_file_path        # type: Optional[str]
+        self.url = url                                  # type: Optional[str]
+        self.status = 'queued'                          # type: str
+        self.result = None                              # type: Optional[str]
+        self.error = None                               # type: Optional[str]
+        self.submitted_at = time.time()                 # type: float
+        self.started_at = None                          # type: Optional[float]
+        self.finished_at = None                         # type: Optional[float]
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'url': self.url,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error
+        }
+
+
+class CompiledScriptCache:
+    """
+    Caches parsed WASH models by script contents, so that repeated submissions of the same script
+    skip parsing and import resolution.
+    """
+    def __init__(self, max_size: int = 128):
+        self.__max_size = max_size
+        self.__models = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, script: str, script_file_path: Optional[str] = None):
+        """
+        Returns the parsed model of the given script, parsing the script only if it is not cached yet.
+        """
+        cache_key = hashlib.sha256(f'{script_file_path}\n{script}'.encode('utf-8')).hexdigest()
+        with self.__lock:
+            model = self.__models.get(cache_key)
+            if model is None:
+                metamodel = metamodel_for_language('wash')
+                model = metamodel.model_from_str(script, file_name=script_file_path)
+                self.__models[cache_key] = model
+                if len(self.__models) > self.__max_size:
+                    self.__models.popitem(last=False)
+            else:
+                self.__models.move_to_end(cache_key)
+
+        return model
+
+
+class WashServer:
+    """
+    Long-running WASH execution service.
+
+    Keeps the WASH metamodel, parsed scripts and started webdriver instances resident, and executes submitted
+    jobs from a bounded queue on a fixed number of worker threads. Jobs are submitted and inspected
+    over a local HTTP interface:
+
+        POST /jobs          Submits a job: {"script": "...", "script_path": "...", "url": "...", "wait": false}
+                            With "wait" (true or a number of seconds, up to wait_timeout), the finished job is
+                            returned, or 202 Accepted if it is not finished in time.
+        GET  /jobs/<id>     Returns the status and the result of the job.
+        GET  /stats         Returns queue depth and latency statistics.
+        GET  /metrics       Returns the metrics of the installed metrics registry in the Prometheus text format.
+
+    With the 'process' isolation, each job uses a browser process of its own (reused between jobs through
+    a WebDriverPool). With the 'context' isolation, jobs run in isolated browser contexts of shared browser
+    processes (see BrowserContextPool), which is considerably cheaper per concurrent job (Chrome only).
+
+    With a PolitenessScheduler, a job is started only once the host of its URL is ready (the job stays queued
+    meanwhile), and hosts responding with 429 or 503 are paused for the following jobs.
+    """
+
+    def __init__(self, options: WashOptions, host: str = '127.0.0.1', port: int = 8765, workers: int = 2,
+                 queue_size: int = 100, max_finished_jobs: int = 1000, isolation: str = 'process',
+                 scheduler: PolitenessScheduler = None, wait_timeout: float = DEFAULT_WAIT_TIMEOUT):
+        self.__options = options                                            # type: WashOptions
+        self.__wait_timeout = wait_timeout                                  # type: float
+        self.__scheduler = scheduler                                        # type: Optional[PolitenessScheduler]
+        self.__queue = queue.Queue(maxsize=queue_size)                      # type: queue.Queue
+        self.__jobs = OrderedDict()                                         # type: OrderedDict[str, WashJob]
+        self.__max_finished_jobs = max_finished_jobs                        # type: int
+        self.__lock = threading.Lock()
+        self.__script_cache = CompiledScriptCache()
+        self.__webdriver_pool = BrowserContextPool(max_contexts_per_browser=workers) if isolation == 'context' \
+            else WebDriverPool(max_idle_instances=workers)          # type: [WebDriverPool, BrowserContextPool]
+        self.__queue_latencies = deque(maxlen=1000)
+        self.__execution_latencies = deque(maxlen=1000)
+        self.__completed_jobs = 0
+        self.__failed_jobs = 0
+        self.__workers = [threading.Thread(target=self.__work, name=f'wash-worker-{index}', daemon=True)
+                          for index in range(workers)]
+        self.__http_server = ThreadingHTTPServer((host, port), self.__create_request_handler())
+
+        # NOTE: Constructing the metamodel up front moves its cost out of the first job.
+        metamodel_for_language('wash')
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.__http_server.server_address
+
+    @property
+    def wait_timeout(self) -> float:
+        """
+        Gets the maximum time (in seconds) a POST /jobs request waits for the submitted job to finish.
+        """
+        return self.__wait_timeout
+
+    def serve_forever(self):
+        """
+        Starts the worker threads and serves HTTP requests until shutdown() is called.
+        """
+        for worker in self.__workers:
+            worker.start()
+        try:
+            self.__http_server.serve_forever()
+        finally:
+            self.__http_server.server_close()
+            for _ in self.__workers:
+                self.__queue.put(None)
+            for worker in self.__workers:
+                worker.join()
+            self.__webdriver_pool.close()
+
+    def shutdown(self):
+        self.__http_server.shutdown()
+
+    def submit(self, script: str = None, script_file_path: str = None, url: str = None) -> WashJob:
+        """
+        Submits a new job to the job queue.
+        Raises queue.Full in case the job queue is full.
+
+        Args:
+            script(str): The contents of the WASH script. If not specified, the script is read from script_file_path.
+            script_file_path(str): The path of the WASH script file.
+            url(str): Optional URL of the document to be used instead of the one specified in the script.
+        """
+        if script is None:
+            if not script_file_path:
+                raise WashError('Either a script or a script path must be specified.')
+            script_file_path = os.path.abspath(script_file_path)
+            with codecs.open(script_file_path, 'r', 'utf-8') as script_file:
+                script = script_file.read()
+
+        job = WashJob(script=script, script_file_path=script_file_path, url=url)
+        self.__queue.put_nowait(job)
+        with self.__lock:
+            self.__jobs[job.id] = job
+
+        return job
+
+    def get_job(self, job_id: str) -> Optional[WashJob]:
+        with self.__lock:
+            return self.__jobs.get(job_id)
+
+    def statistics(self) -> dict:
+        with self.__lock:
+            statistics = {
+                'queue_depth': self.__queue.qsize(),
+                'queue_capacity': self.__queue.maxsize,
+                'workers': len(self.__workers),
+                'idle_webdrivers': self.__webdriver_pool.idle_instance_count(),
+                'completed_jobs': self.__completed_jobs,
+                'failed_jobs': self.__failed_jobs,
+                'queue_latency': self.__summarize(self.__queue_latencies),
+                'execution_latency': self.__summarize(self.__execution_latencies)
+            }
+        if self.__scheduler:
+            statistics['politeness'] = self.__scheduler.statistics()
+
+        return statistics
+
+    def __work(self):
+        while True:
+            job = self.__queue.get()
+            if job is None:
+                return
+            self.__run(job)
+
+    def __run(self, job: WashJob):
+        if self.__scheduler:
+            # NOTE: Workers running jobs of other hosts proceed meanwhile.
+            self.__scheduler.acquire(job.url)
+        job.status = 'running'
+        job.started_at = time.time()
+        throttled, retry_after = False, None
+        try:
+            model = self.__script_cache.get(job.script, job.script_file_path)
+            executor = create_executor_instance(script=job.script, options=self.__options,
+                                                metamodel=metamodel_for_language('wash'), model=model,
+                                                webdriver_pool=self.__webdriver_pool)
+            job.result = executor.execute(url=job.url).to_json()
+            job.status = 'succeeded'
+        except TextXError as e:
+            job.error = str(WashLanguageError(e.message if hasattr(e, 'message') else str(e)))
+            job.status = 'failed'
+        except Exception as e:
+            throttled, retry_after = get_throttling(e)
+            job.error = str(e) if isinstance(e, WashError) else str(WashRuntimeError(f'{type(e).__name__}: {e}'))
+            job.status = 'failed'
+        finally:
+            if self.__scheduler:
+                self.__scheduler.release(job.url, throttled=throttled, retry_after=retry_after)
+            job.finished_at = time.time()
+            metrics = get_metrics_registry()
+            metrics.observe('wash_server_queue_wait_seconds', job.started_at - job.submitted_at)
+            metrics.increment('wash_server_jobs_total', status=job.status)
+            with self.__lock:
+                self.__queue_latencies.append(job.started_at - job.submitted_at)
+                self.__execution_latencies.append(job.finished_at - job.started_at)
+                if job.status == 'succeeded':
+                    self.__completed_jobs += 1
+                else:
+                    self.__failed_jobs += 1
+                self.__discard_finished_jobs()
+            job.done.set()
+
+    def __discard_finished_jobs(self):
+        finished_jobs = [job_id for job_id, job in self.__jobs.items() if job.done.is_set()]
+        for job_id in finished_jobs[:max(0, len(finished_jobs) - self.__max_finished_jobs)]:
+            del self.__jobs[job_id]
+
+    @staticmethod
+    def __summarize(latencies: deque) -> dict:
+        if not latencies:
+            return {'count': 0}
+
+        ordered_latencies = sorted(latencies)
+        return {
+            'count': len(ordered_latencies),
+            'p50': ordered_latencies[int(0.5 * (len(ordered_latencies) - 1))],
+            'p95': ordered_latencies[int(0.95 * (len(ordered_latencies) - 1))],
+            'max': ordered_latencies[-1]
+        }
+
+    def __create_request_handler(self):
+        server = self
+
+        class WashRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/stats':
+                    self.__respond(HTTPStatus.OK, server.statistics())
+                elif self.path == '/metrics':
+                    self.__respond_with_content(HTTPStatus.OK, get_metrics_registry().export().encode('utf-8'),
+                                                content_type='text/plain; version=0.0.4')
+                elif self.path.startswith('/jobs/'):
+                    job = server.get_job(self.path[len('/jobs/'):])
+                    if job:
+                        self.__respond(HTTPStatus.OK, job.to_dict())
+                    else:
+                        self.__respond(HTTPStatus.NOT_FOUND, {'error': 'Job not found.'})
+                else:
+                    self.__respond(HTTPStatus.NOT_FOUND, {'error': 'Not found.'})
+
+            def do_POST(self):
+                if self.path != '/jobs':
+                    self.__respond(HTTPStatus.NOT_FOUND, {'error': 'Not found.'})
+                    return
+
+                try:
+                    content_length = int(self.headers.get('Content-Length', 0))
+                    request = json.loads(self.rfile.read(content_length) or b'{}')
+                    if not isinstance(request, dict):
+                        raise ValueError('The request body must be a JSON object.')
+                    wait_timeout = self.__get_wait_timeout(request.get('wait'))
+                    job = server.submit(script=request.get('script'), script_file_path=request.get('script_path'),
+                                        url=request.get('url'))
+                except queue.Full:
+                    self.__respond(HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'Job queue is full.'})
+                    return
+                except (ValueError, OSError, WashError) as e:
+                    self.__respond(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+                    return
+
+                if wait_timeout and job.done.wait(timeout=wait_timeout):
+                    self.__respond(HTTPStatus.OK, job.to_dict())
+                else:
+                    self.__respond(HTTPStatus.ACCEPTED, {'id': job.id, 'status': job.status})
+
+            def log_message(self, format, *args):
+                pass
+
+            @staticmethod
+            def __get_wait_timeout(wait) -> float:
+                """
+                Returns the time (in seconds) to wait for the job to finish: the server's wait timeout for true,
+                or the given number of seconds (up to the server's wait timeout).
+                """
+                if wait is None or wait is False:
+                    return 0.0
+                if wait is True:
+                    return server.wait_timeout
+                if isinstance(wait, (int, float)) and wait >= 0:
+                    return min(float(wait), server.wait_timeout)
+
+                raise ValueError('"wait" must be a boolean or a non-negative number of seconds.')
+
+            def __respond(self, status: HTTPStatus, body: dict):
+                self.__respond_with_content(status, json.dumps(body).encode('utf-8'), content_type='application/json')
+
+            def __respond_with_content(self, status: HTTPStatus, content: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return WashRequestHandler
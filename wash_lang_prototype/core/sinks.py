@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any
+
+from wash_lang_prototype.core.assets import AssetReference
+from wash_lang_prototype.core.common import ObjectFactory
+from wash_lang_prototype.core.exceptions import WashError
+from wash_lang_prototype.core.result import ExecutionResult
+
+
+class ResultSink(ABC):
+    """
+    Base class for result sinks that write execution results in a tabular form while the results are being produced.
+
+    Each item of a top-level result key represents a single row. Scalar values of the item are written
+    as columns, while nested values (nested context results and lists) are written as JSON encoded strings.
+    Items are buffered per result key and written in batches. Items are flattened into rows only once
+    their batch is written, so that the downloads of referenced assets (see AssetPipeline) proceed in the
+    background while the following items are extracted.
+
+    Columns that first appear in a later batch are appended to the columns of the result key,
+    and are empty in the rows written before.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self._batch_size = batch_size           # type: int
+        self.__columns = {}                     # type: dict[str, list[str]]
+        self.__buffers = {}                     # type: dict[str, list[Any]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, result_key: str, items: list):
+        """
+        Writes the given items of a top-level result key to the sink.
+
+        Args:
+            result_key(str): The result key the items belong to.
+            items(list): The items to be written (ExecutionResult instances or scalar values).
+        """
+        buffer = self.__buffers.setdefault(result_key, [])
+        buffer.extend(items)
+
+        if len(buffer) >= self._batch_size:
+            self.__flush_result_key(result_key)
+
+    def flush(self):
+        """
+        Writes all buffered rows to the underlying storage.
+        """
+        for result_key in self.__buffers:
+            self.__flush_result_key(result_key)
+
+    def close(self):
+        """
+        Flushes the remaining rows and releases the underlying storage.
+        """
+        self.flush()
+        self._close()
+
+    @staticmethod
+    def flatten(result_key: str, item: Any) -> dict[str, Any]:
+        """
+        Flattens the given result item into a single row.
+        """
+        if not isinstance(item, ExecutionResult):
+            return {result_key: ResultSink.__to_column_value(item)}
+
+        return {key: ResultSink.__to_column_value(value) for key, value in vars(item).items()
+                if key != '_ExecutionResult__parent'}
+
+    def __flush_result_key(self, result_key: str):
+        items = self.__buffers.get(result_key)
+        if items:
+            rows = [self.flatten(result_key, item) for item in items]
+            columns = self.__columns.setdefault(result_key, [])
+            for row in rows:
+                columns.extend(column for column in row if column not in columns)
+            self._write_batch(result_key, list(columns), rows)
+            self.__buffers[result_key] = []
+
+    @staticmethod
+    def __to_column_value(value: Any) -> Any:
+        if isinstance(value, AssetReference):
+            return value.location
+        if isinstance(value, (ExecutionResult, list)):
+            return json.loads(ExecutionResult(value=value).to_json())['value']
+        return value
+
+    @abstractmethod
+    def _write_batch(self, result_key: str, columns: list[str], rows: list[dict]):
+        """
+        Writes the given rows of a result key. The columns contain all columns of the result key written so far,
+        i.e. the columns of the previous batches followed by the columns that first appear in this batch.
+        """
+        pass
+
+    @abstractmethod
+    def _close(self):
+        pass
+
+
+class CsvResultSink(ResultSink):
+    """
+    Writes each top-level result key into a separate CSV file in the given directory.
+    In case a batch contains columns that are not in the header yet, the file is rewritten
+    with the extended header (like the columns added to the tables of SqliteResultSink).
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        super(CsvResultSink, self).__init__(batch_size=batch_size)
+        self.__directory = path
+        self.__files = {}
+
+        os.makedirs(self.__directory, exist_ok=True)
+
+    def _write_batch(self, result_key: str, columns: list[str], rows: list[dict]):
+        path = os.path.join(self.__directory, f'{result_key}.csv')
+        if result_key not in self.__files:
+            csv_file = open(path, 'w', newline='', encoding='utf-8')
+            writer = csv.DictWriter(csv_file, fieldnames=columns)
+            writer.writeheader()
+            self.__files[result_key] = (csv_file, writer)
+        elif len(columns) > len(self.__files[result_key][1].fieldnames):
+            self.__files[result_key] = self.__extend_header(path, self.__files[result_key][0], columns)
+
+        csv_file, writer = self.__files[result_key]
+        writer.writerows({column: self.__to_csv_value(row.get(column)) for column in writer.fieldnames}
+                         for row in rows)
+        csv_file.flush()
+
+    @staticmethod
+    def __extend_header(path: str, csv_file, columns: list[str]):
+        """
+        Rewrites the given CSV file with the given (extended) header and returns the file
+        and the writer positioned at its end.
+        """
+        csv_file.close()
+        temporary_path = path + '.part'
+        with open(path, newline='', encoding='utf-8') as source_file, \
+                open(temporary_path, 'w', newline='', encoding='utf-8') as target_file:
+            writer = csv.DictWriter(target_file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(csv.DictReader(source_file))
+        os.replace(temporary_path, path)
+
+        csv_file = open(path, 'a', newline='', encoding='utf-8')
+        return csv_file, csv.DictWriter(csv_file, fieldnames=columns)
+
+    def _close(self):
+        for csv_file, _ in self.__files.values():
+            csv_file.close()
+        self.__files = {}
+
+    @staticmethod
+    def __to_csv_value(value: Any) -> Any:
+        return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+class SqliteResultSink(ResultSink):
+    """
+    Writes each top-level result key into a separate table of the given SQLite database.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        super(SqliteResultSink, self).__init__(batch_size=batch_size)
+        self.__connection = sqlite3.connect(path)
+        self.__tables = {}
+
+    def _write_batch(self, result_key: str, columns: list[str], rows: list[dict]):
+        if result_key not in self.__tables:
+            column_definitions = ', '.join(self.__quote(column) for column in columns)
+            self.__connection.execute(f'CREATE TABLE IF NOT EXISTS {self.__quote(result_key)} ({column_definitions})')
+            self.__tables[result_key] = list(columns)
+        for column in columns[len(self.__tables[result_key]):]:
+            self.__connection.execute(f'ALTER TABLE {self.__quote(result_key)} ADD COLUMN {self.__quote(column)}')
+        self.__tables[result_key] = list(columns)
+
+        column_names = ', '.join(self.__quote(column) for column in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        self.__connection.executemany(
+            f'INSERT INTO {self.__quote(result_key)} ({column_names}) VALUES ({placeholders})',
+            ([self.__to_sqlite_value(row.get(column)) for column in columns] for row in rows))
+        self.__connection.commit()
+
+    def _close(self):
+        self.__connection.close()
+
+    @staticmethod
+    def __quote(identifier: str) -> str:
+        return '"{}"'.format(identifier.replace('"', '""'))
+
+    @staticmethod
+    def __to_sqlite_value(value: Any) -> Any:
+        return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+class ArrowResultSink(ResultSink):
+    """
+    Writes each top-level result key into a separate Parquet or Arrow IPC file in the given directory.
+    Requires pyarrow to be installed.
+
+    The schema of a file is unified with the schema of every written batch: columns that first appear
+    in a later batch are added, and columns without values so far (null type) get the type of their first
+    values. Since the schema of a file cannot change once it is written, the file written so far is rewritten
+    with the unified schema in that case. Columns with values of conflicting types are written as strings.
+    """
+
+    def __init__(self, path: str, file_format: str = 'parquet', batch_size: int = 10000):
+        super(ArrowResultSink, self).__init__(batch_size=batch_size)
+        try:
+            import pyarrow
+        except ImportError:
+            raise WashError('Missing Arrow dependencies. To write Parquet or Arrow files, please run following command: '
+                            'pip install wash-lang-prototype[arrow]')
+
+        self.__pyarrow = pyarrow
+        self.__directory = path
+        self.__file_format = file_format
+        self.__writers = {}
+
+        os.makedirs(self.__directory, exist_ok=True)
+
+    def _write_batch(self, result_key: str, columns: list[str], rows: list[dict]):
+        pyarrow = self.__pyarrow
+        writer, schema = self.__writers.get(result_key, (None, None))
+        values = {column: [self.__to_arrow_value(row.get(column)) for row in rows] for column in columns}
+        arrays = {}
+        for column, column_values in values.items():
+            try:
+                arrays[column] = pyarrow.array(column_values)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                arrays[column] = pyarrow.array([None if value is None else str(value) for value in column_values])
+        table = pyarrow.table(arrays)
+
+        if writer is None:
+            self.__writers[result_key] = (self.__create_writer(result_key, table.schema), table.schema)
+        else:
+            unified_schema = self.__unify_schemas(schema, table.schema)
+            if not unified_schema.equals(schema):
+                self.__rewrite(result_key, writer, unified_schema)
+            table = self.__cast(table, unified_schema)
+        self.__writers[result_key][0].write_table(table)
+
+    def _close(self):
+        for writer, _ in self.__writers.values():
+            writer.close()
+        self.__writers = {}
+
+    def __unify_schemas(self, schema, batch_schema):
+        pyarrow = self.__pyarrow
+        fields = []
+        for field in schema:
+            batch_type = batch_schema.field(field.name).type if field.name in batch_schema.names else pyarrow.null()
+            fields.append(field.with_type(self.__unify_types(field.type, batch_type)))
+        fields.extend(field for field in batch_schema if field.name not in schema.names)
+
+        return pyarrow.schema(fields)
+
+    def __unify_types(self, data_type, batch_data_type):
+        pyarrow = self.__pyarrow
+        if data_type.equals(batch_data_type) or pyarrow.types.is_null(batch_data_type):
+            return data_type
+        if pyarrow.types.is_null(data_type):
+            return batch_data_type
+        if pyarrow.types.is_integer(data_type) and pyarrow.types.is_floating(batch_data_type) \
+                or pyarrow.types.is_floating(data_type) and pyarrow.types.is_integer(batch_data_type):
+            return pyarrow.float64()
+
+        return pyarrow.string()
+
+    def __cast(self, table, schema):
+        pyarrow = self.__pyarrow
+        columns = [table.column(field.name).cast(field.type) if field.name in table.column_names
+                   else pyarrow.nulls(table.num_rows, type=field.type) for field in schema]
+
+        return pyarrow.Table.from_arrays(columns, schema=schema)
+
+    def __rewrite(self, result_key: str, writer, schema):
+        """
+        Rewrites the file of the given result key written so far using the given (unified) schema.
+        """
+        writer.close()
+        path = self.__get_path(result_key)
+        if self.__file_format == 'parquet':
+            from pyarrow import parquet
+            table = parquet.read_table(path)
+        else:
+            from pyarrow import ipc
+            with ipc.open_file(path) as reader:
+                table = reader.read_all()
+
+        writer = self.__create_writer(result_key, schema)
+        writer.write_table(self.__cast(table, schema))
+        self.__writers[result_key] = (writer, schema)
+
+    def __create_writer(self, result_key: str, schema):
+        if self.__file_format == 'parquet':
+            from pyarrow import parquet
+            return parquet.ParquetWriter(self.__get_path(result_key), schema)
+
+        from pyarrow import ipc
+        return ipc.new_file(self.__get_path(result_key), schema)
+
+    def __get_path(self, result_key: str) -> str:
+        return os.path.join(self.__directory, f'{result_key}.{self.__file_format}')
+
+    @staticmethod
+    def __to_arrow_value(value: Any) -> Any:
+        return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+result_sink_factory = ObjectFactory()
+result_sink_factory.register_builder('csv', CsvResultSink)
+result_sink_factory.register_builder('sqlite', SqliteResultSink)
+result_sink_factory.register_builder('parquet', lambda **kwargs: ArrowResultSink(file_format='parquet', **kwargs))
+result_sink_factory.register_builder('arrow', lambda **kwargs: ArrowResultSink(file_format='arrow', **kwargs))
+
+
+def create_result_sink(output_format: str, path: str, **kwargs) -> ResultSink:
+    """
+    Creates a result sink for the given output format ('csv', 'sqlite', 'parquet' or 'arrow').
+
+    Args:
+        output_format(str): The output format.
+        path(str): The output directory (CSV, Parquet, Arrow) or database file (SQLite).
+    """
+    try:
+        return result_sink_factory.create(output_format.casefold(), path=path, **kwargs)
+    except ValueError:
+        raise WashError(f'Unsupported output format: {output_format}')
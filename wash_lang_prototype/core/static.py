@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import functools
+import io
+import mmap
+import os
+import re
+import urllib.parse
+import urllib.request
+from collections import deque
+from typing import Iterator, Optional
+
+from selenium.common.exceptions import NoSuchElementException
+
+from wash_lang_prototype.core.exceptions import WashError, WashRuntimeError
+
+try:
+    from cssselect import HTMLTranslator, parse as parse_css_selector
+    from cssselect.parser import Attrib, Class, Element, Hash
+    from lxml import etree, html as lxml_html
+except ImportError:
+    raise WashError('Missing static execution dependencies. To execute WASH scripts without a browser, '
+                    'please run following command: pip install wash-lang-prototype[static]')
+
+
+_css_translator = HTMLTranslator()
+
+
+@functools.lru_cache(maxsize=1024)
+def css_to_xpath(css_selector: str, prefix: str = 'descendant::') -> str:
+    return _css_translator.css_to_xpath(css_selector, prefix=prefix)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_xpath(xpath: str):
+    """
+    Compiles the given XPath expression. Compiled expressions are cached, since the same selectors
+    are evaluated against every context item.
+    """
+    try:
+        return etree.XPath(xpath)
+    except etree.XPathSyntaxError as e:
+        raise WashRuntimeError(f'Invalid XPath expression "{xpath}": {e}')
+
+
+def is_streamable_css_selector(css_selector: str) -> bool:
+    """
+    Determines whether the given CSS selector can be matched while streaming a document, i.e. whether the selector
+    depends only on the tag name and attributes of the element (and not on its position, ancestors or children).
+    """
+    def is_simple(selector) -> bool:
+        if isinstance(selector, Element):
+            return True
+        if isinstance(selector, (Class, Hash, Attrib)):
+            return is_simple(selector.selector)
+        return False
+
+    try:
+        selectors = parse_css_selector(css_selector)
+    except Exception:
+        return False
+
+    return all(selector.pseudo_element is None and is_simple(selector.parsed_tree) for selector in selectors)
+
+
+class StaticElement:
+    """
+    Provides the subset of the WebElement interface used by WASH queries on top of a parsed lxml element.
+    """
+
+    def __init__(self, element, document: StaticDocument):
+        self.__element = element
+        self.parent = document                              # NOTE: Matches WebElement.parent (i.e. the driver)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.__element.tag})'
+
+    def __eq__(self, other):
+        return isinstance(other, StaticElement) and self.__element is other.__element
+
+    def __hash__(self):
+        return hash(self.__element)
+
+    @property
+    def tag_name(self) -> str:
+        return self.__element.tag
+
+    @property
+    def text(self) -> str:
+        return re.sub(r'\s+', ' ', ''.join(self.__element.itertext())).strip()
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        if name == 'outerHTML':
+            return etree.tostring(self.__element, encoding='unicode', method='html', with_tail=False)
+        if name == 'innerHTML':
+            return (self.__element.text or '') + ''.join(
+                etree.tostring(child, encoding='unicode', method='html') for child in self.__element)
+        if name in ('textContent', 'innerText'):
+            return ''.join(self.__element.itertext())
+        if name in ('href', 'src', 'currentSrc') and self.__element.get('src' if name == 'currentSrc' else name):
+            return urllib.parse.urljoin(self.parent.current_url,
+                                        self.__element.get('src' if name == 'currentSrc' else name))
+
+        return self.__element.get(name)
+
+    def find_element_by_id(self, id_: str) -> StaticElement:
+        elements = self.find_elements_by_xpath(f'descendant::*[@id={self.__quote(id_)}][1]')
+        if not elements:
+            raise NoSuchElementException(f'Unable to locate element: [id="{id_}"]')
+        return elements[0]
+
+    def find_elements_by_name(self, name: str) -> list[StaticElement]:
+        return self.find_elements_by_xpath(f'descendant::*[@name={self.__quote(name)}]')
+
+    def find_elements_by_tag_name(self, name: str) -> list[StaticElement]:
+        return self.find_elements_by_css_selector(name)
+
+    def find_elements_by_class_name(self, name: str) -> list[StaticElement]:
+        return self.find_elements_by_css_selector(f'.{name}')
+
+    def find_elements_by_css_selector(self, css_selector: str) -> list[StaticElement]:
+        return self.find_elements_by_xpath(css_to_xpath(css_selector))
+
+    def find_elements_by_xpath(self, xpath: str) -> list[StaticElement]:
+        try:
+            result = compile_xpath(xpath)(self.__element)
+        except etree.XPathEvalError as e:
+            raise WashRuntimeError(f'Invalid XPath expression "{xpath}": {e}')
+
+        return [StaticElement(element, self.parent) for element in result
+                if isinstance(element, etree._Element) and isinstance(element.tag, str)]
+
+    def release(self):
+        """
+        Releases the subtree of the element and the already processed preceding siblings (of the element
+        and its ancestors), so that the memory used by a streamed document stays bounded.
+        """
+        element = self.__element
+        element.clear(keep_tail=True)
+        while element is not None:
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+            element = element.getparent()
+
+    @staticmethod
+    def __quote(value: str) -> str:
+        if "'" not in value:
+            return f"'{value}'"
+        return 'concat(' + ', "\'", '.join(f"'{part}'" for part in value.split("'")) + ')'
+
+
+class StaticDocument:
+    """
+    Provides the subset of the WebDriver interface used by WASH scripts on top of a statically parsed HTML document.
+    Documents are loaded without a browser, so JavaScript is not executed and no interaction is possible.
+
+    Local files are memory-mapped instead of being read into memory, and the document tree is only built
+    once it is needed. Top-level contexts can instead be streamed (see stream_elements), in which case
+    the document is parsed incrementally and processed elements are released.
+    """
+
+    def __init__(self):
+        self.current_url = None                             # type: Optional[str]
+        self.__content = None                               # type: Optional[bytes]
+        self.__file = None
+        self.__mapped_file = None                           # type: Optional[mmap.mmap]
+        self.__root = None                                  # type: Optional[StaticElement]
+
+    def __getattr__(self, name: str):
+        raise AttributeError(f'"{name}" is not supported by static execution, '
+                             f'which does not use a browser (browser type "static").')
+
+    @property
+    def is_memory_mapped(self) -> bool:
+        return self.__mapped_file is not None
+
+    def implicitly_wait(self, time_to_wait: int):
+        pass
+
+    def get(self, url: str):
+        """
+        Loads the document on the given URL (file, data or HTTP(S) URL).
+        """
+        self.__close_file()
+        self.__content = None
+        self.__root = None
+        self.current_url = url
+
+        parsed_url = urllib.parse.urlparse(url)
+        if parsed_url.scheme == 'file':
+            path = urllib.request.url2pathname(parsed_url.path)
+            if os.name != 'nt' and not path.startswith('/'):
+                path = '/' + path
+            self.__file = open(path, 'rb')
+            if os.fstat(self.__file.fileno()).st_size > 0:
+                self.__mapped_file = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.__content = b''
+        elif parsed_url.scheme == 'data':
+            header, _, data = url.partition(',')
+            self.__content = urllib.parse.unquote_to_bytes(data)
+        else:
+            with urllib.request.urlopen(url) as response:
+                self.current_url = response.geturl()
+                self.__content = response.read()
+
+    def quit(self):
+        self.__close_file()
+        self.__content = None
+        self.__root = None
+
+    @property
+    def page_source(self) -> str:
+        return self.__get_root().get_attribute('outerHTML')
+
+    def get_cookies(self) -> list[dict]:
+        return []
+
+    def delete_all_cookies(self):
+        pass
+
+    def find_element_by_id(self, id_: str) -> StaticElement:
+        return self.__get_root().find_element_by_id(id_)
+
+    def find_elements_by_name(self, name: str) -> list[StaticElement]:
+        return self.__get_root().find_elements_by_name(name)
+
+    def find_elements_by_tag_name(self, name: str) -> list[StaticElement]:
+        return self.__get_root().find_elements_by_tag_name(name)
+
+    def find_elements_by_class_name(self, name: str) -> list[StaticElement]:
+        return self.__get_root().find_elements_by_class_name(name)
+
+    def find_elements_by_css_selector(self, css_selector: str) -> list[StaticElement]:
+        return self.__get_root().find_elements_by_css_selector(css_selector)
+
+    def find_elements_by_xpath(self, xpath: str) -> list[StaticElement]:
+        return self.__get_root().find_elements_by_xpath(xpath)
+
+    def stream_elements(self, css_selector: str, first: bool = False) -> Iterator[StaticElement]:
+        """
+        Parses the document incrementally and yields the elements matching the given CSS selector in
+        document order. Each element is yielded once its subtree is parsed, and is released (along with
+        the preceding parts of the document) once the consumer requests the next element.
+        The selector must be streamable (see is_streamable_css_selector).
+
+        Args:
+            css_selector(str): The CSS selector the elements are matched by.
+            first(bool): If True, only the first matching element is yielded.
+        """
+        matcher = compile_xpath(css_to_xpath(css_selector, prefix='self::'))
+        pending_matches = deque()                           # Matched elements in document order, [element, ended]
+
+        for event, element in etree.iterparse(self.__open_source(), events=('start', 'end'), html=True,
+                                              huge_tree=True, remove_comments=True):
+            if event == 'start':
+                if matcher(element):
+                    pending_matches.append([element, False])
+                continue
+
+            for pending_match in reversed(pending_matches):
+                if pending_match[0] is element:
+                    pending_match[1] = True
+                    break
+
+            while pending_matches and pending_matches[0][1]:
+                yield StaticElement(pending_matches.popleft()[0], self)
+                if first:
+                    return
+
+            # NOTE: Elements are released only once no pending match can contain them.
+            if not pending_matches:
+                StaticElement(element, self).release()
+
+    def __get_root(self) -> StaticElement:
+        if self.__root is None:
+            document = lxml_html.parse(self.__open_source(), parser=lxml_html.HTMLParser(huge_tree=True))
+            self.__root = StaticElement(document.getroot(), self)
+
+        return self.__root
+
+    def __open_source(self):
+        if self.__mapped_file is not None:
+            self.__mapped_file.seek(0)
+            return self.__mapped_file
+
+        return io.BytesIO(self.__content or b'<html></html>')
+
+    def __close_file(self):
+        if self.__mapped_file is not None:
+            self.__mapped_file.close()
+            self.__mapped_file = None
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
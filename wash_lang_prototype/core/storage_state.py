@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+LOCAL_STORAGE_SCRIPT = """
+var items = [];
+for (var i = 0; i < window.localStorage.length; i++) {
+    var name = window.localStorage.key(i);
+    items.push({name: name, value: window.localStorage.getItem(name)});
+}
+return {origin: window.location.origin, localStorage: items};
+"""
+
+RESTORE_LOCAL_STORAGE_SCRIPT = """
+(function (origins) {
+    var origin = origins[window.location.origin];
+    if (!origin) return;
+    try {
+        origin.forEach(function (item) { window.localStorage.setItem(item.name, item.value); });
+    } catch (e) {}
+})(%s);
+"""
+
+# NOTE: Keys of cookies (as returned by WebDriver) accepted by the Network.setCookies DevTools command.
+_CDP_COOKIE_KEYS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+
+class StorageState:
+    """
+    Browser session state (cookies and local storage) persisted between WASH script executions,
+    so that authenticated sessions are reused instead of logging in on every execution.
+
+    The state is stored as a JSON file in the following format:
+
+        {"cookies": [{"name": "...", "value": "...", "domain": "...", "path": "/", ...}],
+         "origins": [{"origin": "https://...", "localStorage": [{"name": "...", "value": "..."}]}]}
+    """
+
+    def __init__(self, cookies: Optional[list[dict]] = None, origins: Optional[list[dict]] = None):
+        self.cookies = cookies or []                        # type: list[dict]
+        self.origins = origins or []                        # type: list[dict]
+
+    @staticmethod
+    def load(path: str) -> StorageState:
+        """
+        Loads the storage state from the given file. An empty state is returned if the file does not exist.
+        """
+        if not os.path.exists(path):
+            return StorageState()
+
+        with open(path, 'r', encoding='utf-8') as state_file:
+            state = json.load(state_file)
+
+        return StorageState(cookies=state.get('cookies'), origins=state.get('origins'))
+
+    def save(self, path: str):
+        """
+        Writes the storage state to the given file. The file is replaced atomically.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp',
+                                         delete=False) as state_file:
+            json.dump({'cookies': self.cookies, 'origins': self.origins}, state_file, indent=2)
+        os.replace(state_file.name, path)
+
+    def capture(self, webdriver_instance: WebDriver):
+        """
+        Updates the state with the cookies of the browser (all cookies of the browser context when the
+        Chrome DevTools Protocol is available, otherwise the cookies of the current document) and
+        the local storage of the current document.
+        """
+        if hasattr(webdriver_instance, 'execute_cdp_cmd'):
+            self.cookies = [StorageState.__from_cdp_cookie(cookie) for cookie in
+                            webdriver_instance.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])]
+        else:
+            current_cookies = webdriver_instance.get_cookies()
+            replaced_cookies = {StorageState.__cookie_key(cookie) for cookie in current_cookies}
+            self.cookies = [cookie for cookie in self.cookies
+                            if StorageState.__cookie_key(cookie) not in replaced_cookies] + current_cookies
+
+        try:
+            origin = webdriver_instance.execute_script(LOCAL_STORAGE_SCRIPT) \
+                if hasattr(webdriver_instance, 'execute_script') else None
+        except WebDriverException:
+            origin = None
+        if origin and urlparse(origin['origin']).scheme in ('http', 'https'):
+            self.origins = [item for item in self.origins if item['origin'] != origin['origin']]
+            if origin['localStorage']:
+                self.origins.append(origin)
+
+    def apply(self, webdriver_instance: WebDriver, url: str, cookies: Optional[dict[str, str]] = None):
+        """
+        Sets the stored cookies and the given (configured) cookies in a single batch, and arranges for the stored
+        local storage to be restored, before the document on the given URL is loaded.
+
+        With the Chrome DevTools Protocol, cookies of all domains are set without loading a document.
+        Otherwise, WebDriver only allows setting cookies of the current document, so a lightweight document
+        of the URL's origin (robots.txt) is loaded first and only cookies of its domain are set.
+        Local storage is only restored with the Chrome DevTools Protocol.
+
+        Returns:
+            The identifier of the script restoring the local storage (see remove_restore_script), or None.
+        """
+        if urlparse(url).scheme not in ('http', 'https'):
+            return None
+
+        configured_cookies = [{'name': name, 'value': value} for name, value in (cookies or {}).items()]
+        if hasattr(webdriver_instance, 'execute_cdp_cmd'):
+            batch = [StorageState.__to_cdp_cookie(cookie) for cookie in self.cookies] + \
+                    [dict(cookie, url=url) for cookie in configured_cookies]
+            if batch:
+                webdriver_instance.execute_cdp_cmd('Network.setCookies', {'cookies': batch})
+
+            if self.origins:
+                origins = {item['origin']: item['localStorage'] for item in self.origins}
+                return webdriver_instance.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                    'source': RESTORE_LOCAL_STORAGE_SCRIPT % json.dumps(origins)
+                }).get('identifier')
+
+            return None
+
+        host = urlparse(url).hostname or ''
+        batch = [cookie for cookie in self.cookies if StorageState.__matches_domain(host, cookie.get('domain'))]
+        batch += configured_cookies
+        if batch and hasattr(webdriver_instance, 'add_cookie'):
+            webdriver_instance.get(urljoin(url, '/robots.txt'))
+            for cookie in batch:
+                try:
+                    webdriver_instance.add_cookie(cookie)
+                except WebDriverException:
+                    pass
+
+        return None
+
+    @staticmethod
+    def remove_restore_script(webdriver_instance: WebDriver, identifier: Optional[str]):
+        """
+        Removes the script restoring the local storage, once the initial document is loaded.
+        """
+        if identifier:
+            webdriver_instance.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument', {'identifier': identifier})
+
+    @staticmethod
+    def __matches_domain(host: str, domain: Optional[str]) -> bool:
+        if not domain:
+            return True
+        domain = domain.lstrip('.')
+        return host == domain or host.endswith(f'.{domain}')
+
+    @staticmethod
+    def __cookie_key(cookie: dict) -> tuple:
+        return cookie.get('name'), cookie.get('domain'), cookie.get('path')
+
+    @staticmethod
+    def __to_cdp_cookie(cookie: dict) -> dict:
+        cdp_cookie = {key: cookie[key] for key in _CDP_COOKIE_KEYS if cookie.get(key) is not None}
+        if 'expiry' in cookie:
+            cdp_cookie['expires'] = cookie['expiry']
+        return cdp_cookie
+
+    @staticmethod
+    def __from_cdp_cookie(cookie: dict) -> dict:
+        result = {key: cookie[key] for key in _CDP_COOKIE_KEYS if key in cookie and key != 'expires'}
+        if not cookie.get('session') and cookie.get('expires', -1) > 0:
+            result['expiry'] = int(cookie['expires'])
+        return result
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from wash_lang_prototype import __version__
+
+
+_NO_OP_SPAN = nullcontext()
+
+
+class Tracer:
+    """
+    Records hierarchical spans covering the execution of WASH scripts.
+
+    This is the no-op tracer used by default: spans are not recorded unless a tracer that records them
+    is installed using set_tracer().
+    """
+
+    enabled = False
+
+    def span(self, name: str, **attributes):
+        """
+        Returns a context manager that records a span with the given name and attributes around the enclosed block.
+        Spans opened inside the block (in the same thread) become children of the span.
+        """
+        return _NO_OP_SPAN
+
+    def export(self, path: str):
+        """
+        Writes the recorded spans to the given file in the OTLP JSON format.
+        """
+        pass
+
+
+class Span:
+    """
+    Represents a single recorded span.
+    """
+    def __init__(self, name: str, trace_id: str, parent_span_id: [str, None], attributes: dict):
+        self.name = name                                        # type: str
+        self.trace_id = trace_id                                # type: str
+        self.span_id = os.urandom(8).hex()                      # type: str
+        self.parent_span_id = parent_span_id                    # type: [str, None]
+        self.attributes = attributes                            # type: dict
+        self.start_time = time.time_ns()                        # type: int
+        self.end_time = None                                    # type: [int, None]
+        self.error = None                                       # type: [str, None]
+
+    def to_otlp(self) -> dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,                                          # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_time),
+            'endTimeUnixNano': str(self.end_time),
+            'attributes': [{'key': key, 'value': Span.__to_otlp_value(value)}
+                           for key, value in self.attributes.items() if value is not None],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+
+        return span
+
+    @staticmethod
+    def __to_otlp_value(value) -> dict:
+        if isinstance(value, bool):
+            return {'boolValue': value}
+        if isinstance(value, int):
+            return {'intValue': str(value)}
+        if isinstance(value, float):
+            return {'doubleValue': value}
+        return {'stringValue': str(value)}
+
+
+class RecordingTracer(Tracer):
+    """
+    Tracer that keeps finished spans in memory and exports them in the OTLP JSON format,
+    which can be loaded into trace viewers (e.g. Jaeger) or sent to an OpenTelemetry collector.
+    """
+
+    enabled = True
+
+    def __init__(self, service_name: str = 'wash-lang-prototype', max_spans: int = 100000):
+        self.__service_name = service_name                      # type: str
+        self.__max_spans = max_spans                            # type: int
+        self.__spans = []                                       # type: list[Span]
+        self.__current_span = contextvars.ContextVar('wash_current_span', default=None)
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent_span = self.__current_span.get()
+        span = Span(name=name, trace_id=parent_span.trace_id if parent_span else os.urandom(16).hex(),
+                    parent_span_id=parent_span.span_id if parent_span else None, attributes=attributes)
+        token = self.__current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f'{e.__class__.__name__}: {e}'
+            raise
+        finally:
+            span.end_time = time.time_ns()
+            self.__current_span.reset(token)
+            with self.__lock:
+                if len(self.__spans) < self.__max_spans:
+                    self.__spans.append(span)
+
+    def export(self, path: str):
+        with self.__lock:
+            spans = [span.to_otlp() for span in self.__spans]
+
+        trace = {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.__service_name}}]},
+                'scopeSpans': [{
+                    'scope': {'name': 'wash_lang_prototype', 'version': __version__},
+                    'spans': spans
+                }]
+            }]
+        }
+        with open(path, 'w', encoding='utf-8') as trace_file:
+            json.dump(trace, trace_file)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns the tracer used by WASH executors.
+    """
+    return _tracer
+
+
+def set_tracer(tracer: Tracer = None):
+    """
+    Installs the given tracer. If None is given, the no-op tracer is restored.
+    """
+    global _tracer
+    _tracer = tracer or Tracer()
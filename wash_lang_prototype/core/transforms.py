@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from typing import Any, Callable, Iterable, Optional
+from urllib.parse import urljoin
+
+from wash_lang_prototype.core.exceptions import WashLanguageError
+
+
+# NOTE: Transforms that can also be applied in the browser, while the values of multiple elements are extracted.
+# Regular expressions are applied in the browser only if they match the same in Python and JavaScript
+# (see is_browser_compatible_pattern), and URLs are always made absolute in Python (JavaScript normalizes them),
+# so that a data query returns the same values regardless of the number of elements it is executed against.
+BROWSER_TRANSFORMS = ('trim', 'lower', 'upper', 'regex')
+RESULT_TYPES = ('int', 'float', 'bool', 'str')
+
+# NOTE: Constructs of regular expressions that are not supported by JavaScript, or whose meaning differs:
+# \w, \d, \s and \b are ASCII-only in JavaScript, \A and \Z do not exist, $ also matches before a trailing
+# newline in Python, and inline flags, comments, conditionals and {,n} quantifiers are Python-only.
+_PYTHON_ONLY_PATTERN_CONSTRUCTS = re.compile(r'\\[wWdDsSbBAZ]|\$|\(\?[aiLmsux#(]|\(\?P|\{,')
+
+DOCUMENT_BASE_URL_SCRIPT = 'return document.baseURI;'
+
+DATA_VALUES_SCRIPT = """
+var elements = arguments[0], source = arguments[1], steps = arguments[2];
+var patterns = steps.map(function (step) { return step.name === 'regex' ? new RegExp(step.pattern, 'u') : null; });
+// NOTE: The whitespace stripped by str.strip() in Python (String.prototype.trim also strips U+FEFF, but not U+001C-U+001F and U+0085).
+var whitespace = '[\\t\\n\\v\\f\\r\\x1c-\\x20\\x85\\xa0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000]';
+var trimPattern = new RegExp('^' + whitespace + '+|' + whitespace + '+$', 'g');
+
+function extract(element) {
+    if (source.type === 'text') return (element.innerText || '').trim();
+    if (source.type === 'html') return element.outerHTML;
+    if (source.type === 'inner_html') return element.innerHTML;
+    var value = element[source.name];
+    if (typeof value === 'boolean') return value ? 'true' : null;
+    if (value === undefined || value === null || typeof value === 'object' || typeof value === 'function') {
+        value = element.getAttribute(source.name);
+    }
+    return value === null || value === undefined ? null : String(value);
+}
+
+return elements.map(function (element) {
+    var value = extract(element);
+    for (var i = 0; i < steps.length && value !== null; i++) {
+        var step = steps[i];
+        if (step.name === 'trim') {
+            value = value.replace(trimPattern, '');
+        } else if (step.name === 'lower') {
+            value = value.toLowerCase();
+        } else if (step.name === 'upper') {
+            value = value.toUpperCase();
+        } else if (step.name === 'regex') {
+            var match = patterns[i].exec(value);
+            value = match && match[step.group] !== undefined ? match[step.group] : null;
+        }
+    }
+    return value;
+});
+"""
+
+_TRUE_VALUES = frozenset(('true', 'yes', 'on', '1'))
+_FALSE_VALUES = frozenset(('false', 'no', 'off', '0', ''))
+_NUMBER_SEPARATOR_PATTERN = re.compile(r'[\s,_]')
+
+
+def is_browser_compatible_pattern(pattern: str) -> bool:
+    """
+    Returns whether the given regular expression matches the same in Python and in JavaScript (with the 'u' flag),
+    i.e. whether it can be applied in the browser (see DATA_VALUES_SCRIPT).
+    """
+    return not _PYTHON_ONLY_PATTERN_CONSTRUCTS.search(pattern)
+
+
+def to_int(value: Any) -> Optional[int]:
+    """
+    Parses an integer (e.g. '1,234' or ' 42 '). Returns None if the value is not an integer.
+    """
+    if isinstance(value, (bool, int)) or value is None:
+        return None if value is None else int(value)
+    try:
+        return int(_NUMBER_SEPARATOR_PATTERN.sub('', str(value)))
+    except ValueError:
+        return None
+
+
+def to_float(value: Any) -> Optional[float]:
+    """
+    Parses a number (e.g. '1,234.5'). Commas are treated as thousands separators.
+    Returns None if the value is not a number.
+    """
+    if isinstance(value, (bool, int, float)) or value is None:
+        return None if value is None else float(value)
+    try:
+        return float(_NUMBER_SEPARATOR_PATTERN.sub('', str(value)))
+    except ValueError:
+        return None
+
+
+def to_bool(value: Any) -> Optional[bool]:
+    """
+    Parses a boolean (true/false, yes/no, on/off, 1/0). Returns None for other values.
+    """
+    if isinstance(value, bool) or value is None:
+        return value
+    normalized_value = str(value).strip().casefold()
+    if normalized_value in _TRUE_VALUES:
+        return True
+    if normalized_value in _FALSE_VALUES:
+        return False
+    return None
+
+
+_CONVERTERS = {
+    'int': to_int,
+    'float': to_float,
+    'bool': to_bool,
+    'str': lambda value: None if value is None else str(value),
+}
+
+
+def convert_value(value: Any, result_type: str) -> Any:
+    """
+    Converts the given value (or each item of the given list of values) to the given result type.
+    Values that cannot be converted are replaced with None.
+    """
+    converter = _CONVERTERS[result_type]
+    if isinstance(value, list):
+        return [convert_value(item, result_type) for item in value]
+
+    return converter(value)
+
+
+class TransformPipeline:
+    """
+    Compiled sequence of value transforms of a data query (e.g. `: text | trim | regex "(\\d+)" | int`).
+
+    Transforms are applied to whole batches of values, one transform at a time, and patterns are compiled once.
+    A value that a transform cannot be applied to (e.g. a regex that does not match, or a number that cannot
+    be parsed) becomes None, and None values are passed through the remaining transforms.
+
+    The leading transforms that do not depend on Python (see BROWSER_TRANSFORMS) can instead be applied
+    in the browser using DATA_VALUES_SCRIPT (see browser_steps). Regular expressions whose meaning differs
+    between Python and JavaScript (see is_browser_compatible_pattern) are always applied in Python.
+    """
+
+    def __init__(self, transforms: Iterable):
+        """
+        Args:
+            transforms(Iterable): Value transforms, i.e. objects with the name of the transform and its arguments
+                                  (pattern, group, replacement and date_format).
+
+        Raises:
+            WashLanguageError: If a transform is not valid (e.g. invalid regular expression).
+        """
+        self.__transforms = list(transforms)
+        self.__steps = [TransformPipeline.__compile(transform) for transform in self.__transforms]
+        self.__browser_steps = []                           # type: list[dict]
+        for transform, (_, pattern, group) in zip(self.__transforms, self.__steps):
+            if transform.name not in BROWSER_TRANSFORMS or \
+                    pattern is not None and not is_browser_compatible_pattern(pattern.pattern):
+                break
+            self.__browser_steps.append({'name': transform.name, 'pattern': pattern.pattern if pattern else None,
+                                         'group': group})
+
+    def __len__(self):
+        return len(self.__steps)
+
+    def browser_steps(self) -> list[dict]:
+        """
+        Returns the description of the leading transforms that can be applied in the browser (see DATA_VALUES_SCRIPT).
+        """
+        return list(self.__browser_steps)
+
+    def requires_base_url(self, start: int = 0) -> bool:
+        return any(transform.name == 'absolute_url' for transform in self.__transforms[start:])
+
+    def apply(self, values: list, base_url: Optional[str] = None, start: int = 0) -> list:
+        """
+        Applies the transforms (starting with the transform at the given index) to the given values.
+
+        Args:
+            values(list): The extracted values.
+            base_url(str): The URL of the document, used to make relative URLs absolute.
+            start(int): The index of the first transform to be applied (i.e. the number of transforms
+                        already applied in the browser).
+        """
+        for function, _, _ in self.__steps[start:]:
+            values = [None if value is None else function(value, base_url) for value in values]
+
+        return values
+
+    @staticmethod
+    def __compile(transform) -> tuple[Callable[[Any, Optional[str]], Any], Optional[re.Pattern], Optional[int]]:
+        name = transform.name
+        if name == 'trim':
+            return lambda value, base_url: str(value).strip(), None, None
+        if name == 'lower':
+            return lambda value, base_url: str(value).lower(), None, None
+        if name == 'upper':
+            return lambda value, base_url: str(value).upper(), None, None
+        if name == 'absolute_url':
+            return lambda value, base_url: urljoin(base_url or '', str(value).strip()), None, None
+        if name in ('int', 'float', 'bool'):
+            converter = _CONVERTERS[name]
+            return lambda value, base_url: converter(value), None, None
+        if name == 'regex':
+            pattern = TransformPipeline.__compile_pattern(transform.pattern)
+            group = transform.group if transform.group is not None else (1 if pattern.groups else 0)
+            if group > pattern.groups:
+                raise WashLanguageError(f'Regular expression "{transform.pattern}" has no group {group}.')
+
+            def search(value, base_url):
+                match = pattern.search(str(value))
+                return match.group(group) if match else None
+            return search, pattern, group
+        if name == 'replace':
+            pattern = TransformPipeline.__compile_pattern(transform.pattern)
+            replacement = transform.replacement
+            return lambda value, base_url: pattern.sub(replacement, str(value)), pattern, None
+        if name == 'date':
+            date_format = transform.date_format
+
+            def parse_date(value, base_url):
+                try:
+                    return datetime.strptime(str(value).strip(), date_format).date().isoformat()
+                except ValueError:
+                    return None
+            return parse_date, None, None
+
+        raise WashLanguageError(f'Unsupported value transform "{name}".')
+
+    @staticmethod
+    def __compile_pattern(pattern: str) -> re.Pattern:
+        try:
+            return re.compile(pattern)
+        except re.error as e:
+            raise WashLanguageError(f'Invalid regular expression "{pattern}": {e}')
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import codecs
+import glob
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from textx import metamodel_for_language
+from textx.scoping import GlobalModelRepository, ModelRepository
+
+from wash_lang_prototype.core.exceptions import WashError, WashLanguageError
+
+
+_IMPORT_STATEMENT_PATTERN = re.compile(r'^\s*import\s+"([^"]*)"', re.MULTILINE)
+_COMMENT_PATTERN = re.compile(r'\*\*.*$', re.MULTILINE)
+
+# NOTE: Models loaded by validations in the current process (keyed by the absolute file path), shared between
+# validations so that imported files are parsed only once.
+_loaded_models = ModelRepository()
+
+
+def collect_script_files(paths: Iterable[str]) -> list[str]:
+    """
+    Collects the WASH script files specified by the given paths. Each path can be a file, a directory
+    (searched recursively for *.wash files) or a glob pattern (recursive '**' patterns are supported).
+
+    Raises:
+        WashError: If a path does not match any WASH script file.
+    """
+    script_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = glob.glob(os.path.join(path, '**', '*.wash'), recursive=True)
+        elif glob.has_magic(path):
+            matches = [match for match in glob.glob(path, recursive=True) if os.path.isfile(match)]
+        else:
+            matches = [path] if os.path.isfile(path) else []
+
+        if not matches:
+            raise WashError(f'No WASH script files found: "{path}".')
+
+        script_files.extend(os.path.abspath(match) for match in sorted(matches))
+
+    return list(dict.fromkeys(script_files))
+
+
+class ImportGraph:
+    """
+    Dependency graph of WASH script files, built from their import statements. Imported files are
+    added to the graph as well, so the graph covers everything the given files depend on.
+    """
+
+    def __init__(self, script_files: Iterable[str]):
+        self.__imports = {}                                     # type: dict[str, set[str]]
+        self.__importers = defaultdict(set)                     # type: dict[str, set[str]]
+
+        for script_file in script_files:
+            self.update(script_file)
+
+    @property
+    def files(self) -> list[str]:
+        return list(self.__imports)
+
+    def update(self, script_file: str):
+        """
+        (Re-)reads the import statements of the given file (and of newly discovered imported files).
+        """
+        pending_files = [os.path.abspath(script_file)]
+        while pending_files:
+            file = pending_files.pop()
+            for imported_file in self.__imports.get(file, ()):
+                self.__importers[imported_file].discard(file)
+
+            imports = ImportGraph.__read_imports(file)
+            self.__imports[file] = imports
+            for imported_file in imports:
+                self.__importers[imported_file].add(file)
+                if imported_file not in self.__imports:
+                    pending_files.append(imported_file)
+
+    def remove(self, script_file: str):
+        for imported_file in self.__imports.pop(script_file, ()):
+            self.__importers[imported_file].discard(script_file)
+
+    def dependencies(self, script_file: str) -> set[str]:
+        """
+        Returns the files the given file imports, directly or transitively.
+        """
+        return ImportGraph.__traverse(script_file, self.__imports)
+
+    def dependents(self, script_file: str) -> set[str]:
+        """
+        Returns the files importing the given file, directly or transitively.
+        """
+        return ImportGraph.__traverse(script_file, self.__importers)
+
+    @staticmethod
+    def __traverse(script_file: str, edges: dict) -> set[str]:
+        visited = set()
+        pending_files = list(edges.get(script_file, ()))
+        while pending_files:
+            file = pending_files.pop()
+            if file not in visited:
+                visited.add(file)
+                pending_files.extend(edges.get(file, ()))
+
+        return visited
+
+    @staticmethod
+    def __read_imports(script_file: str) -> set[str]:
+        try:
+            with codecs.open(script_file, 'r', 'utf-8') as file:
+                script = _COMMENT_PATTERN.sub('', file.read())
+        except OSError:
+            return set()
+
+        base_directory = os.path.dirname(script_file)
+        return {os.path.abspath(os.path.join(base_directory, import_uri))
+                for import_uri in _IMPORT_STATEMENT_PATTERN.findall(script)}
+
+
+def validate_script_files(script_files: list[str], import_graph: ImportGraph, processes: int = 1,
+                          invalidated_files: Iterable[str] = (), debug: bool = False) -> dict[str, Optional[str]]:
+    """
+    Validates the given WASH script files and returns the validation error of each file (None if the file is valid).
+
+    Files are ordered by their imports and split into one batch per process, so files sharing imports mostly end
+    up in the same batch. Each process keeps the models of the imported files it has parsed, so a shared import
+    is parsed once per process instead of once per importing file.
+
+    Args:
+        script_files(list[str]): The absolute paths of the files to be validated.
+        import_graph(ImportGraph): The import graph of the files.
+        processes(int): The number of processes the files are validated in (1 validates in the current process).
+        invalidated_files(Iterable[str]): The files that changed since the previous validation. The cached models of
+                                          these files (and of the files importing them) are discarded.
+        debug(bool): Indicates whether debug messages should be printed or not.
+    """
+    invalidated_files = set(invalidated_files)
+    for invalidated_file in list(invalidated_files):
+        invalidated_files.update(import_graph.dependents(invalidated_file))
+
+    if processes <= 1 or len(script_files) <= 1:
+        return validate_batch(script_files, sorted(invalidated_files), debug)
+
+    # NOTE: Ordering files by their dependencies places files with the same imports next to each other.
+    ordered_files = sorted(script_files, key=lambda file: (sorted(import_graph.dependencies(file)), file))
+    batch_size = -(-len(ordered_files) // processes)
+    batches = [ordered_files[index:index + batch_size] for index in range(0, len(ordered_files), batch_size)]
+
+    errors = {}
+    with ProcessPoolExecutor(max_workers=len(batches)) as process_pool:
+        for batch_errors in process_pool.map(validate_batch, batches, [sorted(invalidated_files)] * len(batches),
+                                             [debug] * len(batches)):
+            errors.update(batch_errors)
+
+    return {script_file: errors[script_file] for script_file in script_files}
+
+
+def validate_batch(script_files: list[str], invalidated_files: list[str] = (),
+                   debug: bool = False) -> dict[str, Optional[str]]:
+    """
+    Validates the given WASH script files in the current process (see validate_script_files).
+    """
+    metamodel = metamodel_for_language('wash')
+    models = _loaded_models.filename_to_model
+    for invalidated_file in invalidated_files:
+        models.pop(invalidated_file, None)
+
+    def share_loaded_models(model):
+        model._tx_model_repository = GlobalModelRepository(_loaded_models)
+
+    errors = {}
+    for script_file in script_files:
+        cached_files = set(models)
+        try:
+            # NOTE: The file itself is always parsed again, even if it was parsed as an import of another file.
+            models.pop(script_file, None)
+            with codecs.open(script_file, 'r', 'utf-8') as file:
+                metamodel.model_from_str(file.read(), file_name=script_file, debug=debug,
+                                         pre_ref_resolution_callback=share_loaded_models)
+            errors[script_file] = None
+        except WashError as e:
+            errors[script_file] = str(e)
+        except Exception as e:
+            errors[script_file] = str(WashLanguageError(e.message if hasattr(e, 'message') else str(e)))
+
+        if errors[script_file] is not None:
+            # NOTE: Models loaded during a failed validation may be partially resolved.
+            for file in set(models) - cached_files:
+                models.pop(file, None)
+            models.pop(script_file, None)
+
+    return errors
+
+
+class ValidationWatcher:
+    """
+    Watches WASH script files (and the files they import) and re-validates the files affected by changes,
+    i.e. the changed files and the files importing them, directly or transitively.
+    """
+
+    def __init__(self, paths: list[str], processes: int = 1, poll_interval: float = 0.5, debug: bool = False):
+        self.__paths = paths                                    # type: list[str]
+        self.__processes = processes                            # type: int
+        self.__poll_interval = poll_interval                    # type: float
+        self.__debug = debug                                    # type: bool
+        self.__script_files = collect_script_files(paths)       # type: list[str]
+        self.__import_graph = ImportGraph(self.__script_files)  # type: ImportGraph
+        self.__modification_times = self.__get_modification_times()
+
+    def validate(self) -> dict[str, Optional[str]]:
+        """
+        Validates all watched script files.
+        """
+        return validate_script_files(self.__script_files, self.__import_graph, processes=self.__processes,
+                                     debug=self.__debug)
+
+    def watch(self, on_validated: Callable[[dict[str, Optional[str]]], None]):
+        """
+        Polls the watched files for changes until interrupted, and calls the given callback
+        with the validation errors of the affected files after each change.
+        """
+        while True:
+            time.sleep(self.__poll_interval)
+            errors = self.poll()
+            if errors:
+                on_validated(errors)
+
+    def poll(self) -> dict[str, Optional[str]]:
+        """
+        Re-validates the files affected by the changes since the previous poll.
+        """
+        try:
+            script_files = collect_script_files(self.__paths)
+        except WashError:
+            script_files = []
+
+        for removed_file in set(self.__script_files) - set(script_files):
+            self.__import_graph.remove(removed_file)
+        self.__script_files = script_files
+
+        modification_times = self.__get_modification_times()
+        changed_files = {file for file, modification_time in modification_times.items()
+                         if self.__modification_times.get(file) != modification_time}
+        changed_files.update(set(self.__modification_times) - set(modification_times))
+        if not changed_files:
+            return {}
+
+        for changed_file in changed_files:
+            if changed_file in modification_times:
+                self.__import_graph.update(changed_file)
+        self.__modification_times = self.__get_modification_times()
+
+        affected_files = set(changed_files)
+        for changed_file in changed_files:
+            affected_files.update(self.__import_graph.dependents(changed_file))
+
+        return validate_script_files([file for file in self.__script_files if file in affected_files],
+                                     self.__import_graph, processes=self.__processes,
+                                     invalidated_files=changed_files, debug=self.__debug)
+
+    def __get_modification_times(self) -> dict[str, float]:
+        modification_times = {}
+        for file in set(self.__script_files) | set(self.__import_graph.files):
+            try:
+                modification_times[file] = os.stat(file).st_mtime_ns
+            except OSError:
+                pass
+
+        return modification_times
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+DEFAULT_WAIT_TIMEOUT = 10                                   # Seconds
+DEFAULT_NETWORK_IDLE_TIME = 0.5                             # Seconds
+DEFAULT_DOM_QUIET_TIME = 0.5                                # Seconds
+
+# NOTE: Margin added to the script timeout, so that the wait script always finishes (and reports a timeout)
+# before WebDriver aborts it.
+_SCRIPT_TIMEOUT_MARGIN = 5
+
+# NOTE: Messages of the errors raised when a script is aborted because the page navigates (ChromeDriver, Firefox
+# and the Chrome DevTools Protocol).
+_NAVIGATION_ERROR_MESSAGES = ('document unloaded', 'execution context was destroyed',
+                              'cannot find context with specified id', 'inspected target navigated',
+                              'no such execution context', 'page navigated', 'stale element reference')
+
+WAIT_FOR_ELEMENTS_SCRIPT = """
+var conditions = arguments[0], requireAll = arguments[1], timeout = arguments[2];
+var done = arguments[arguments.length - 1];
+
+function find(condition) {
+    switch (condition.by) {
+        case 'id': return document.getElementById(condition.value);
+        case 'name': return document.getElementsByName(condition.value)[0] || null;
+        case 'tag name': return document.getElementsByTagName(condition.value)[0] || null;
+        case 'class name': return document.getElementsByClassName(condition.value)[0] || null;
+        case 'css selector': return document.querySelector(condition.value);
+        case 'xpath': return document.evaluate(condition.value, document, null,
+                                               XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return null;
+}
+
+function isVisible(element) {
+    var style = window.getComputedStyle(element);
+    return element.getClientRects().length > 0 && style.visibility !== 'hidden' && parseFloat(style.opacity) > 0;
+}
+
+function isSatisfied(condition) {
+    var element = find(condition);
+    if (!element) return false;
+    if (condition.rule === 'present') return true;
+    if (!isVisible(element)) return false;
+    return condition.rule !== 'clickable' || !element.disabled;
+}
+
+function check() {
+    var results = conditions.map(isSatisfied);
+    return requireAll ? results.every(Boolean) : results.some(Boolean);
+}
+
+if (check()) {
+    done(true);
+    return;
+}
+
+var finished = false, observer, interval, timer;
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    done(result);
+}
+
+observer = new MutationObserver(function () { if (check()) finish(true); });
+observer.observe(document, {childList: true, subtree: true, attributes: true});
+// NOTE: Visibility can also change without DOM mutations (e.g. layout, transitions), which is covered by
+// an in-page poll that does not involve WebDriver.
+interval = setInterval(function () { if (check()) finish(true); }, 100);
+timer = setTimeout(function () { finish(false); }, timeout);
+"""
+
+
+NETWORK_TRACKER_SCRIPT = """
+(function () {
+    if (window.__washNetwork) return;
+    var state = window.__washNetwork = {pending: 0, lastActivity: Date.now()};
+    function start() { state.pending++; state.lastActivity = Date.now(); }
+    function end() { state.pending = Math.max(0, state.pending - 1); state.lastActivity = Date.now(); }
+
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            start();
+            return originalFetch.apply(this, arguments).then(
+                function (response) { end(); return response; },
+                function (error) { end(); throw error; });
+        };
+    }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        start();
+        this.addEventListener('loadend', end, {once: true});
+        return originalSend.apply(this, arguments);
+    };
+    // NOTE: Other requests (e.g. images, scripts, styles) are tracked once they finish.
+    if (window.PerformanceObserver) {
+        try {
+            new PerformanceObserver(function () { state.lastActivity = Date.now(); })
+                .observe({entryTypes: ['resource']});
+        } catch (e) {}
+    }
+})();
+"""
+
+WAIT_FOR_NETWORK_IDLE_SCRIPT = NETWORK_TRACKER_SCRIPT + """
+var idleTime = arguments[0], timeout = arguments[1], done = arguments[arguments.length - 1];
+var state = window.__washNetwork, deadline = Date.now() + timeout;
+(function check() {
+    var now = Date.now();
+    if (document.readyState === 'complete' && state.pending === 0 && now - state.lastActivity >= idleTime) {
+        done(true);
+    } else if (now >= deadline) {
+        done(false);
+    } else {
+        setTimeout(check, 50);
+    }
+})();
+"""
+
+WAIT_FOR_DOM_STABLE_SCRIPT = """
+var quietTime = arguments[0], timeout = arguments[1], done = arguments[arguments.length - 1];
+var lastMutation = Date.now(), deadline = lastMutation + timeout;
+var observer = new MutationObserver(function () { lastMutation = Date.now(); });
+observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+(function check() {
+    var now = Date.now();
+    if (now - lastMutation >= quietTime || now >= deadline) {
+        observer.disconnect();
+        done(now - lastMutation >= quietTime);
+    } else {
+        setTimeout(check, Math.min(quietTime - (now - lastMutation), deadline - now));
+    }
+})();
+"""
+
+
+class ElementCondition:
+    """
+    Condition on the first element located by a selector: 'present', 'visible' or 'clickable'.
+    """
+    def __init__(self, by: str, value: str, rule: str):
+        self.by = by                                        # type: str  (selenium.webdriver.common.by.By)
+        self.value = value                                  # type: str
+        self.rule = rule                                    # type: str
+
+    def __str__(self):
+        return f'{self.by} "{self.value}" is {self.rule}'
+
+    def to_dict(self) -> dict:
+        return {'by': self.by, 'value': self.value, 'rule': self.rule}
+
+    def to_expected_condition(self):
+        from selenium.webdriver.support import expected_conditions as ec
+
+        locator = (self.by, self.value)
+        if self.rule == 'present':
+            return ec.presence_of_element_located(locator)
+        if self.rule == 'visible':
+            return ec.visibility_of_element_located(locator)
+        if self.rule == 'clickable':
+            return ec.element_to_be_clickable(locator)
+
+        raise ValueError(f'Unsupported wait rule "{self.rule}".')
+
+
+def wait_for_elements(webdriver_instance: WebDriver, conditions: list[ElementCondition], require_all: bool = True,
+                      timeout: float = DEFAULT_WAIT_TIMEOUT):
+    """
+    Waits until all (or any) of the given element conditions are satisfied.
+
+    The conditions are evaluated in the page by a single asynchronous script, which re-evaluates them on
+    DOM mutations (using a MutationObserver) and returns as soon as they are satisfied, instead of polling
+    the page over WebDriver. In case the script cannot be executed (e.g. the page navigates while waiting),
+    the conditions are polled using WebDriverWait for the remaining time.
+
+    Raises:
+        TimeoutException: If the conditions are not satisfied within the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    if hasattr(webdriver_instance, 'execute_async_script'):
+        try:
+            if _execute_wait_script(webdriver_instance, WAIT_FOR_ELEMENTS_SCRIPT, timeout,
+                                    [condition.to_dict() for condition in conditions], require_all):
+                return
+            raise TimeoutException(_describe_timeout(conditions, require_all, timeout))
+        except TimeoutException:
+            raise
+        except WebDriverException:
+            pass
+
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    expected_conditions = [condition.to_expected_condition() for condition in conditions]
+    combine = all if require_all else any
+    WebDriverWait(webdriver_instance, max(deadline - time.monotonic(), 0)).until(
+        lambda driver: combine(expected_condition(driver) for expected_condition in expected_conditions),
+        message=_describe_timeout(conditions, require_all, timeout))
+
+
+def wait_for_network_idle(webdriver_instance: WebDriver, idle_time: float = DEFAULT_NETWORK_IDLE_TIME,
+                          timeout: float = DEFAULT_WAIT_TIMEOUT):
+    """
+    Waits until the document is loaded and no network requests were in flight for the given idle time (in seconds).
+
+    Requests are tracked in the page by instrumenting fetch and XMLHttpRequest (and by observing resource timing
+    entries of other requests). The instrumentation is installed once the wait starts, unless it was installed
+    before the document was loaded (see install_network_tracker).
+
+    Raises:
+        TimeoutException: If the network does not become idle within the timeout.
+    """
+    _wait_for_page_state(webdriver_instance, WAIT_FOR_NETWORK_IDLE_SCRIPT, idle_time, timeout,
+                         description=f'the network is idle for {idle_time} seconds')
+
+
+def wait_for_dom_stable(webdriver_instance: WebDriver, quiet_time: float = DEFAULT_DOM_QUIET_TIME,
+                        timeout: float = DEFAULT_WAIT_TIMEOUT):
+    """
+    Waits until the document was not mutated for the given quiet time (in seconds).
+
+    Raises:
+        TimeoutException: If the document does not become stable within the timeout.
+    """
+    _wait_for_page_state(webdriver_instance, WAIT_FOR_DOM_STABLE_SCRIPT, quiet_time, timeout,
+                         description=f'the document is stable for {quiet_time} seconds')
+
+
+def install_network_tracker(webdriver_instance: WebDriver) -> Optional[str]:
+    """
+    Installs the network request instrumentation (see wait_for_network_idle) in every document loaded from now on,
+    so that requests started before a wait are tracked as well. Requires the Chrome DevTools Protocol;
+    otherwise the instrumentation is installed once a wait starts.
+
+    Returns:
+        The identifier of the installed script (see uninstall_network_tracker), or None.
+    """
+    if not hasattr(webdriver_instance, 'execute_cdp_cmd'):
+        return None
+
+    return webdriver_instance.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                                              {'source': NETWORK_TRACKER_SCRIPT}).get('identifier')
+
+
+def uninstall_network_tracker(webdriver_instance: WebDriver, identifier: Optional[str]):
+    """
+    Stops installing the network request instrumentation in new documents (e.g. before a pooled webdriver
+    instance is reused by another execution).
+    """
+    if identifier:
+        webdriver_instance.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument', {'identifier': identifier})
+
+
+def _wait_for_page_state(webdriver_instance: WebDriver, script: str, period: float, timeout: float,
+                         description: str):
+    if not hasattr(webdriver_instance, 'execute_async_script'):
+        return                                              # NOTE: Documents without scripting do not change.
+
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining_time = deadline - time.monotonic()
+        if remaining_time <= 0:
+            break
+        try:
+            if _execute_wait_script(webdriver_instance, script, remaining_time, int(period * 1000)):
+                return
+            break
+        except TimeoutException:
+            break
+        except WebDriverException as e:
+            # NOTE: The script is aborted when the page navigates while waiting, in which case the wait is restarted.
+            if not _is_navigation_error(e):
+                raise
+            time.sleep(0.05)
+
+    raise TimeoutException(f'Timed out after {timeout} seconds waiting until {description}.')
+
+
+def _is_navigation_error(exception: WebDriverException) -> bool:
+    """
+    Returns whether the given exception was raised because the page navigated while a script was running.
+    """
+    if isinstance(exception, StaleElementReferenceException):
+        return True
+    message = (exception.msg or str(exception)).casefold()
+
+    return any(navigation_message in message for navigation_message in _NAVIGATION_ERROR_MESSAGES)
+
+
+def _execute_wait_script(webdriver_instance: WebDriver, script: str, timeout: float, *args) -> bool:
+    """
+    Executes the given asynchronous wait script, passing the given arguments followed by the timeout in milliseconds.
+    """
+    webdriver_instance.set_script_timeout(timeout + _SCRIPT_TIMEOUT_MARGIN)
+    return bool(webdriver_instance.execute_async_script(script, *args, int(timeout * 1000)))
+
+
+def _describe_timeout(conditions: list[ElementCondition], require_all: bool, timeout: float) -> str:
+    separator = ' and ' if require_all else ' or '
+    return f'Timed out after {timeout} seconds waiting until {separator.join(str(c) for c in conditions)}.'
@@ -9,8 +9,10 @@ def wash_language():
     WASH DSL - Web automation script helper domain specific language.
     """
     from .wash import wash_classes
-    from .wash_object_processors import configuration_object_processor, configuration_entry_object_processor,\
-        configuration_parameter_value_object_processor, static_expression_object_processor
+    from .wash_object_processors import wash_script_object_processor, configuration_object_processor, \
+        configuration_entry_object_processor, configuration_parameter_value_object_processor, \
+        static_expression_object_processor, explicit_wait_command_object_processor, \
+        scroll_collect_expression_object_processor, data_query_object_processor
 
     wash_internal_meta_model = metamodel_for_language('wash_internal')
     internal_folder = os.path.join(os.path.dirname(__file__), '..', 'internal')
@@ -23,10 +25,14 @@ def wash_language():
         builtin_models_repository.add_model(internal_file_model)
 
     object_processors_map = {
+        'WashScript': wash_script_object_processor,
         'Configuration': configuration_object_processor,
         'ConfigurationEntry': configuration_entry_object_processor,
         'ConfigurationParameterValue': configuration_parameter_value_object_processor,
-        'StaticExpression': static_expression_object_processor
+        'StaticExpression': static_expression_object_processor,
+        'ExplicitWaitCommand': explicit_wait_command_object_processor,
+        'ScrollCollectExpression': scroll_collect_expression_object_processor,
+        'DataQuery': data_query_object_processor
     }
 
     path_to_metamodel = os.path.join(os.path.dirname(__file__), 'wash.tx')
@@ -1,12 +1,28 @@
+from __future__ import annotations
+
 import itertools
 import re
 import time
 from abc import abstractmethod
+from types import MappingProxyType
 from typing import Any
 
+from selenium.common.exceptions import WebDriverException
+
+from wash_lang_prototype.core.assets import ImageAsset, ScreenshotAsset
+from wash_lang_prototype.core.element_set import LazyElementSet
 from wash_lang_prototype.core.exceptions import WashRuntimeError, WashLanguageError
+from wash_lang_prototype.core.metrics import get_metrics_registry
+from wash_lang_prototype.core.tracing import get_tracer
+from wash_lang_prototype.core.transforms import DATA_VALUES_SCRIPT, DOCUMENT_BASE_URL_SCRIPT, TransformPipeline
+from wash_lang_prototype.core.wait import DEFAULT_DOM_QUIET_TIME, DEFAULT_NETWORK_IDLE_TIME, DEFAULT_WAIT_TIMEOUT, \
+    ElementCondition, wait_for_dom_stable, wait_for_elements, wait_for_network_idle
 from wash_lang_prototype.core.result import ExecutionResult
 
+IMAGE_URLS_SCRIPT = """
+return arguments[0].map(function (element) { return element.currentSrc || element.src || null; });
+"""
+
 
 class WashBase:
     """
@@ -52,57 +68,100 @@ class ConfigurationEntry(WashBase):
         return parameter_value
 
 
-class Configuration(WashBase):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+class ConfigurationSettings:
+    """
+    Immutable, typed view of the values of a Configuration, indexed by configuration option and parameter name.
+    Array values are represented as tuples of primitive values.
+
+    Settings are resolved once while the model is processed (see configuration_object_processor),
+    so reading a value does not scan the configuration entries.
+    """
+
+    def __init__(self, values: dict[str, dict[str, Any]]):
+        self.__values = MappingProxyType({option_name: MappingProxyType(dict(parameter_values))
+                                          for option_name, parameter_values in values.items()})
+
+    def __contains__(self, option_name: str) -> bool:
+        return option_name in self.__values
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({ {name: dict(values) for name, values in self.__values.items()} })'
 
-    def __extract_configuration_entry(self, entry_name: str) -> [ConfigurationEntry, None]:
+    @staticmethod
+    def from_configuration(configuration: Configuration) -> ConfigurationSettings:
         """
-        Extracts configuration entry by given name from current Configuration instance.
-        In case the entry with given name is not found, a None value is returned.
+        Resolves the settings of the given Configuration. If an option is specified multiple times,
+        the first entry is used.
+        """
+        values = {}
+        for entry in configuration.configuration_entries:
+            if entry.type.name not in values:
+                values[entry.type.name] = {parameter.parameter.name: ConfigurationSettings.__unwrap(parameter.value)
+                                           for parameter in entry.parameters}
 
-        Args:
-            entry_name(str): Name of the configuration entry.
+        return ConfigurationSettings(values)
+
+    def get(self, option_name: str, parameter_name: str) -> Any:
         """
-        try:
-            return next(entry for entry in self.configuration_entries if entry.type.name == entry_name)
-        except StopIteration:
-            return None
+        Returns the value of the given parameter of the given configuration option.
+        In case the option or the parameter is not specified, a None value is returned.
+        """
+        parameter_values = self.__values.get(option_name)
+        return parameter_values.get(parameter_name) if parameter_values is not None else None
+
+    @staticmethod
+    def __unwrap(value) -> Any:
+        if isinstance(value.value, list):
+            return tuple(item.value for item in value.value)
+        return value.value
+
+
+class Configuration(WashBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.settings = None                                # type: [ConfigurationSettings, None]
 
-    def __extract_configuration_entry_value(self, entry_name: str, value_name: str):
-        entry = self.__extract_configuration_entry(entry_name)
-        return entry if not entry else entry.extract_parameter_value(value_name)
+    def __get_settings(self) -> ConfigurationSettings:
+        if self.settings is None:
+            self.settings = ConfigurationSettings.from_configuration(self)
+        return self.settings
 
     def get_browser_type(self) -> [str, None]:
         """
         Extracts 'browser type' configuration value from given configuration.
         """
-        return self.__extract_configuration_entry_value('browser_type', 'browser_type')
+        return self.__get_settings().get('browser_type', 'browser_type')
+
+    def get_automation_protocol(self) -> [str, None]:
+        """
+        Extracts 'automation protocol' configuration value from given configuration.
+        """
+        return self.__get_settings().get('automation_protocol', 'protocol')
 
     def get_user_agent(self) -> [str, None]:
         """
         Extracts 'user agent' configuration value from given configuration.
         """
-        return self.__extract_configuration_entry_value('user_agent', 'user_agent')
+        return self.__get_settings().get('user_agent', 'user_agent')
 
     def get_access_as_mobile_device(self) -> [bool, None]:
         """
         Extracts 'access as mobile device' configuration value from given configuration.
         """
-        return self.__extract_configuration_entry_value('access_as_mobile_device', 'is_active')
+        return self.__get_settings().get('access_as_mobile_device', 'is_active')
 
     def get_use_incognito_mode(self) -> [bool, None]:
         """
         Extracts 'use incognito mode' configuration value from given configuration.
         """
-        return self.__extract_configuration_entry_value('use_incognito_mode', 'is_active')
+        return self.__get_settings().get('use_incognito_mode', 'is_active')
 
     def get_window_size(self) -> [tuple[int, int], None]:
         """
         Extracts 'window size' configuration value from given configuration.
         """
-        width_value = self.__extract_configuration_entry_value('window_size', 'width')
-        height_value = self.__extract_configuration_entry_value('window_size', 'height')
+        width_value = self.__get_settings().get('window_size', 'width')
+        height_value = self.__get_settings().get('window_size', 'height')
 
         return None if not width_value or not height_value else (width_value, height_value)
 
@@ -110,14 +169,14 @@ class Configuration(WashBase):
         """
         Extracts 'wait timeout' configuration value from given configuration.
         """
-        return self.__extract_configuration_entry_value('wait_timeout', 'timeout')
+        return self.__get_settings().get('wait_timeout', 'timeout')
 
     def get_cookies(self) -> [dict[str, str], None]:
         """
         Extracts 'cookies' configuration value from given configuration.
         """
-        cookie_names = self.__extract_configuration_entry_value('cookies', 'cookie_names')
-        cookie_values = self.__extract_configuration_entry_value('cookies', 'cookie_values')
+        cookie_names = self.__get_settings().get('cookies', 'cookie_names')
+        cookie_values = self.__get_settings().get('cookies', 'cookie_values')
 
         return None if not cookie_names or not cookie_values else dict(zip(cookie_names, cookie_values))
 
@@ -141,28 +200,71 @@ class OpenStringStatement(WashBase):
 
 
 class StaticExpression(WashBase):
-    def __init__(self, parent, queries, context_expression, context_expression_ref, result_key):
+    def __init__(self, parent, queries, context_expression, context_expression_ref, result_key, result_type=None):
         super().__init__(parent)
         self.queries = queries
         self.context_expression = context_expression
         self.context_expression_ref = context_expression_ref
         self.result_key = result_key
+        self.result_type = result_type                      # NOTE: int, float, bool, str or None (not converted)
         self.execution_context = None                       # TODO: Use execution_context
     
 
+class ScrollCollectExpression(WashBase):
+    def __init__(self, parent, queries, result_key, context_expression=None, context_expression_ref=None, key=None,
+                 stop_conditions=None):
+        super().__init__(parent)
+        self.queries = queries
+        self.context_expression = context_expression
+        self.context_expression_ref = context_expression_ref
+        self.key = key
+        self.stop_conditions = stop_conditions or []
+        self.result_key = result_key
+
+    @property
+    def max_count(self) -> [int, None]:
+        """
+        The number of items after which collection stops, or None if items are collected until no new items appear.
+        """
+        return next((condition.count for condition in self.stop_conditions if condition.count is not None), None)
+
+    @property
+    def stops_when_idle(self) -> bool:
+        """
+        Indicates whether collection stops once no new items appear after a few scrolls, i.e. if the "no new items"
+        condition is specified, or if no item count is specified.
+        """
+        return any(condition.no_new_items for condition in self.stop_conditions) or self.max_count is None
+
+    def get_context_expression(self) -> ContextExpression:
+        return self.context_expression if self.context_expression \
+            else self.context_expression_ref.context_expression
+
+
+class ScrollStopCondition(WashBase):
+    def __init__(self, parent, count=None, no_new_items=False):
+        super().__init__(parent)
+        self.count = count
+        self.no_new_items = no_new_items
+
+
 class Query(WashBase):
     def __init__(self, parent, query_value):
         super().__init__(parent)
         self.query_value = query_value
 
     def execute(self, execution_context):
-        if isinstance(execution_context, list):
-            if len(execution_context) == 1:
-                return self._execute(execution_context[0])
+        if isinstance(execution_context, LazyElementSet):
+            execution_context = execution_context.resolve()
+
+        with get_metrics_registry().timer('wash_query_duration_seconds', query_type=self.__class__.__name__):
+            if isinstance(execution_context, list):
+                if len(execution_context) == 1:
+                    return self._execute(execution_context[0])
+                else:
+                    return self._execute_and_flatten(execution_context)
             else:
-                return self._execute_and_flatten(execution_context)
-        else:
-            return self._execute(execution_context)
+                return self._execute(execution_context)
 
     @abstractmethod
     def _execute(self, execution_context):
@@ -177,17 +279,31 @@ class SelectorQuery(Query):
     def __init__(self, parent, query_value):
         super().__init__(parent, query_value)
 
-    def execute(self, execution_context):
+    def execute(self, execution_context) -> LazyElementSet:
+        """
+        Returns a LazyElementSet that describes the result of the selector query applied to the given
+        execution context. No WebDriver calls are made until the elements of the set are needed.
+        """
+        if isinstance(execution_context, LazyElementSet):
+            return execution_context.select(self)
+
+        return LazyElementSet(execution_context=execution_context, selector_queries=[self])
+
+    def execute_eagerly(self, execution_context):
+        """
+        Executes the selector query against the given execution context right away.
+        """
         if not self._execution_context_valid(execution_context):
             raise ValueError(f"{__class__}: Unsupported execution context type {execution_context.__class__}.")
 
-        if isinstance(execution_context, list):
-            if len(execution_context) == 1:
-                return self._execute(execution_context[0])
+        with get_metrics_registry().timer('wash_query_duration_seconds', query_type=self.__class__.__name__):
+            if isinstance(execution_context, list):
+                if len(execution_context) == 1:
+                    return self._execute(execution_context[0])
+                else:
+                    return self._execute_and_flatten(execution_context)
             else:
-                return self._execute_and_flatten(execution_context)
-        else:
-            return self._execute(execution_context)
+                return self._execute(execution_context)
 
     def _execution_context_valid(self, execution_context) -> bool:
         return True
@@ -204,18 +320,26 @@ class SelectorQuery(Query):
     def _execute_selector(self, execution_context):
         raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
 
+    @abstractmethod
+    def get_browser_step(self) -> dict:
+        """
+        Returns the description of the selector query used for composite, in-browser evaluation of selector chains.
+        """
+        raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
+
 
 class IndexSelectorQuery(SelectorQuery):
     def __init__(self, parent, query_value):
         super().__init__(parent, query_value)
 
-    def execute(self, execution_context):
+    def execute_eagerly(self, execution_context):
         # NOTE: This method is overridden because
         #       different behavior is expected for IndexSelectorQuery compared to all other selector queries.
         if not isinstance(execution_context, list):
             execution_context = [execution_context]
 
-        return self._execute(execution_context)
+        with get_metrics_registry().timer('wash_query_duration_seconds', query_type=self.__class__.__name__):
+            return self._execute(execution_context)
 
     def _execution_context_valid(self, execution_context):
         return isinstance(execution_context, list)
@@ -229,14 +353,19 @@ class IndexSelectorQuery(SelectorQuery):
     def _execute_and_flatten(self, execution_context: list) -> list:
         raise NotImplementedError(f"Calling this method from {__class__} class is not allowed.")
 
+    def get_browser_step(self) -> dict:
+        index_range = self.__extract_range()
+        if index_range:
+            return {'type': 'slice', 'start': index_range.start, 'stop': index_range.stop, 'step': index_range.step}
+
+        return {'type': 'index', 'value': self.__extract_index()}
+
     def _execute_selector(self, execution_context):
-        # TODO (fivkovic): Add first n items feature
-        if re.match(r"[-+]?\d+$", self.query_value.value) is None:
-            raise WashLanguageError(f"Index selector value is not an integer value: {self.query_value.value}.")
+        index_range = self.__extract_range()
+        if index_range:
+            return execution_context[index_range]
 
-        index = int(self.query_value.value)
-        if abs(index) == 0:
-            raise WashRuntimeError(f"Index selector value is not valid: {self.query_value.value}.")
+        index = self.__extract_index()
         if abs(index) > len(execution_context):
             raise WashRuntimeError(f"Index accessor value out of range: "
                                    f"given value {index} exceeds collection size ({len(execution_context)}).")
@@ -250,6 +379,36 @@ class IndexSelectorQuery(SelectorQuery):
 
         return selector_result if isinstance(selector_result, list) else [selector_result]
 
+    def __extract_range(self) -> [slice, None]:
+        """
+        Extracts the range of items to be selected in case the index selector value is specified
+        in the range format '<start>..<stop> step <step>', where all parts are optional (e.g. '1..50', '-10..',
+        '..5', '2.. step 2'). Both bounds are inclusive and 1-based, while negative bounds are counted
+        from the end of the collection (-1 being the last item). Returns None for single index values.
+        """
+        match = re.match(r"([-+]?\d+)?\.\.([-+]?\d+)?(?:\s+step\s+(\d+))?$", self.query_value.value)
+        if match is None:
+            return None
+
+        start, stop, step = (int(value) if value is not None else None for value in match.groups())
+        if start == 0 or stop == 0 or step == 0:
+            raise WashRuntimeError(f"Index selector range is not valid: {self.query_value.value}.")
+
+        start = start - 1 if start is not None and start > 0 else start
+        stop = None if stop == -1 else stop + 1 if stop is not None and stop < 0 else stop
+
+        return slice(start, stop, step or 1)
+
+    def __extract_index(self) -> int:
+        if re.match(r"[-+]?\d+$", self.query_value.value) is None:
+            raise WashLanguageError(f"Index selector value is not an integer value: {self.query_value.value}.")
+
+        index = int(self.query_value.value)
+        if abs(index) == 0:
+            raise WashRuntimeError(f"Index selector value is not valid: {self.query_value.value}.")
+
+        return index
+
 
 class IDSelectorQuery(SelectorQuery):
     def __init__(self, parent, query_value):
@@ -259,12 +418,14 @@ class IDSelectorQuery(SelectorQuery):
         return self._execute_selector(execution_context)
 
     def _execute_and_flatten(self, execution_context: list) -> list:
-        result = [self._execute_selector(execution_item) for execution_item in execution_context]
-        return list(itertools.chain.from_iterable(result))
+        return [self._execute_selector(execution_item) for execution_item in execution_context]
 
     def _execute_selector(self, execution_context):
         return execution_context.find_element_by_id(self.query_value.value)
 
+    def get_browser_step(self) -> dict:
+        return {'type': 'css', 'value': f'[id="{self.query_value.value}"]', 'first': True}
+
 
 class NameSelectorQuery(SelectorQuery):
     def __init__(self, parent, query_value):
@@ -280,6 +441,9 @@ class NameSelectorQuery(SelectorQuery):
     def _execute_selector(self, execution_context):
         return execution_context.find_elements_by_name(self.query_value.value)
 
+    def get_browser_step(self) -> dict:
+        return {'type': 'css', 'value': f'[name="{self.query_value.value}"]'}
+
 
 class TagSelectorQuery(SelectorQuery):
     def __init__(self, parent, query_value):
@@ -295,6 +459,9 @@ class TagSelectorQuery(SelectorQuery):
     def _execute_selector(self, execution_context):
         return execution_context.find_elements_by_tag_name(self.query_value.value)
 
+    def get_browser_step(self) -> dict:
+        return {'type': 'css', 'value': self.query_value.value}
+
 
 class ClassSelectorQuery(SelectorQuery):
     def __init__(self, parent, query_value):
@@ -310,6 +477,9 @@ class ClassSelectorQuery(SelectorQuery):
     def _execute_selector(self, execution_context):
         return execution_context.find_elements_by_class_name(self.query_value.value)
 
+    def get_browser_step(self) -> dict:
+        return {'type': 'css', 'value': f'.{self.query_value.value}'}
+
 
 class CSSSelectorQuery(SelectorQuery):
     def __init__(self, parent, query_value):
@@ -325,6 +495,9 @@ class CSSSelectorQuery(SelectorQuery):
     def _execute_selector(self, execution_context):
         return execution_context.find_elements_by_css_selector(self.query_value.value)
 
+    def get_browser_step(self) -> dict:
+        return {'type': 'css', 'value': self.query_value.value}
+
 
 class XPathSelectorQuery(SelectorQuery):
     def __init__(self, parent, query_value):
@@ -340,16 +513,80 @@ class XPathSelectorQuery(SelectorQuery):
     def _execute_selector(self, execution_context):
         return execution_context.find_elements_by_xpath(self.query_value.value)
 
+    def get_browser_step(self) -> dict:
+        return {'type': 'xpath', 'value': self.query_value.value}
+
 
 class DataQuery(Query):
-    def __init__(self, parent, query_value):
+    def __init__(self, parent, query_value, transforms=None):
         super().__init__(parent, query_value)
+        self.transforms = transforms or []
+        self.pipeline = None                                # type: TransformPipeline  # NOTE: Set by object processor
 
     def _execute(self, execution_context):
-        return self.__execute_data_query(execution_context)
+        value = self.__execute_data_query(execution_context)
+        if not self.transforms:
+            return value
+
+        base_url = self.__get_base_url(execution_context) if self.pipeline.requires_base_url() else None
+        return self.pipeline.apply([value], base_url=base_url)[0]
 
     def _execute_and_flatten(self, execution_context: list) -> list:
-        return [self.__execute_data_query(execution_item) for execution_item in execution_context]
+        if self.query_value.value == 'image' and execution_context \
+                and hasattr(execution_context[0].parent, 'execute_script'):
+            return [ImageAsset(url) for url in execution_context[0].parent.execute_script(
+                IMAGE_URLS_SCRIPT, execution_context)]
+
+        if self.transforms and execution_context and hasattr(execution_context[0].parent, 'execute_script'):
+            values = self.__execute_data_script(execution_context)
+            if values is not None:
+                browser_steps_count = len(self.pipeline.browser_steps())
+                base_url = self.__get_base_url(execution_context[0]) \
+                    if self.pipeline.requires_base_url(start=browser_steps_count) else None
+                return self.pipeline.apply(values, base_url=base_url, start=browser_steps_count)
+
+        values = [self.__execute_data_query(execution_item) for execution_item in execution_context]
+        if not self.transforms:
+            return values
+
+        base_url = self.__get_base_url(execution_context[0]) \
+            if execution_context and self.pipeline.requires_base_url() else None
+        return self.pipeline.apply(values, base_url=base_url)
+
+    def __execute_data_script(self, execution_context: list) -> [list, None]:
+        """
+        Extracts the values of all elements and applies the leading (browser) transforms using a single script.
+        Returns None if the values cannot be extracted in the browser.
+        """
+        value = self.query_value.value
+        if value in ('text', 'html', 'inner_html'):
+            source = {'type': value}
+        elif value[0] == '@':
+            source = {'type': 'attribute', 'name': value[1:]}
+        else:
+            return None
+
+        try:
+            return execution_context[0].parent.execute_script(
+                DATA_VALUES_SCRIPT, execution_context, source, self.pipeline.browser_steps())
+        except WebDriverException:
+            # NOTE: E.g. a regular expression that is valid in Python, but not in JavaScript.
+            return None
+
+    @staticmethod
+    def __get_base_url(execution_item) -> [str, None]:
+        """
+        Returns the base URL of the document (i.e. the URL given by its <base href> element, or the URL of the
+        document), which relative URLs are resolved against regardless of the number of elements.
+        """
+        webdriver_instance = execution_item.parent
+        if hasattr(webdriver_instance, 'execute_script'):
+            try:
+                return webdriver_instance.execute_script(DOCUMENT_BASE_URL_SCRIPT)
+            except WebDriverException:
+                pass
+
+        return getattr(webdriver_instance, 'current_url', None)
 
     def __execute_data_query(self, execution_item):
         if self.query_value.value == 'text':
@@ -361,7 +598,10 @@ class DataQuery(Query):
         elif self.query_value.value[0] == '@':
             attribute_name = self.query_value.value[1:]
             return execution_item.get_attribute(attribute_name)
-        # TODO (fivkovic): Add image retrieval
+        elif self.query_value.value == 'image':
+            return ImageAsset(execution_item.get_attribute('currentSrc') or execution_item.get_attribute('src'))
+        elif self.query_value.value == 'screenshot':
+            return ScreenshotAsset(execution_item)
         else:
             raise ValueError(f'Unsupported DataQuery value: {self.query_value.value}')
 
@@ -372,6 +612,21 @@ class QueryValue(WashBase):
         self.value = value.strip()
 
 
+class DataQueryValue(QueryValue):
+    def __init__(self, parent, value):
+        super().__init__(parent, value)
+
+
+class ValueTransform(WashBase):
+    def __init__(self, parent, name, pattern=None, group=None, replacement=None, date_format=None):
+        super().__init__(parent)
+        self.name = name
+        self.pattern = pattern
+        self.group = group
+        self.replacement = replacement
+        self.date_format = date_format
+
+
 class ContextExpression(WashBase):
     def __init__(self, parent, expressions):
         super().__init__(parent)
@@ -391,13 +646,13 @@ class MouseEventCommand(DynamicExpression):
 
     def execute(self, execution_context):
         element_to_click = self.__get_element_to_click(execution_context)
-        element_to_click = element_to_click[0] if isinstance(element_to_click, list) else element_to_click
+        element_to_click = element_to_click[0] if isinstance(element_to_click, (list, LazyElementSet)) else element_to_click
         element_to_click.click()
 
     def __get_element_to_click(self, execution_context):
         query_result = None
         for query in self.element_selector_queries:
-            if not query_result:
+            if query_result is None:
                 query_result = query.execute(execution_context=execution_context)
             else:
                 query_result = query.execute(query_result)
@@ -429,14 +684,14 @@ class KeyboardEventCommand(DynamicExpression):
             actions.perform()
         else:
             element_to_type = self.__get_element_to_type(execution_context)
-            element_to_type = element_to_type[0] if isinstance(element_to_type, list) else element_to_type
+            element_to_type = element_to_type[0] if isinstance(element_to_type, (list, LazyElementSet)) else element_to_type
             element_to_type.clear()
             element_to_type.send_keys(self.value)
 
     def __get_element_to_type(self, execution_context):
         query_result = None
         for query in self.element_selector_queries:
-            if not query_result:
+            if query_result is None:
                 query_result = query.execute(execution_context=execution_context)
             else:
                 query_result = query.execute(query_result)
@@ -454,19 +709,30 @@ class SleepCommand(DynamicExpression):
 
 
 class ExplicitWaitCommand(DynamicExpression):
-    def __init__(self, parent, selector_query, rule, timeout_value=None):
+    def __init__(self, parent, conditions, operators=None, timeout_value=None):
         super().__init__(parent)
         self.parent = parent
-        self.selector_query = selector_query
-        self.rule = rule
+        self.conditions = conditions
+        self.operators = operators or []
         self.timeout_value = timeout_value
 
     def execute(self, execution_context):
         # TODO: Raise exception if not a web driver instance
-        from selenium.webdriver.support.ui import WebDriverWait
+        wait_for_elements(execution_context,
+                          conditions=[condition.to_element_condition() for condition in self.conditions],
+                          require_all='or' not in self.operators,
+                          timeout=self.timeout_value if self.timeout_value is not None else DEFAULT_WAIT_TIMEOUT)
+
+
+class ExplicitWaitCondition(WashBase):
+    def __init__(self, parent, selector_query, rule):
+        super().__init__(parent)
+        self.selector_query = selector_query
+        self.rule = rule
 
-        expected_condition = self.__get_expected_condition()
-        WebDriverWait(execution_context, self.timeout_value).until(expected_condition)
+    def to_element_condition(self) -> ElementCondition:
+        return ElementCondition(by=self.__get_by(), value=self.selector_query.query_value.value.strip(),
+                                rule=self.rule)
 
     def __get_by(self):
         from selenium.webdriver.common.by import By
@@ -484,17 +750,35 @@ class ExplicitWaitCommand(DynamicExpression):
         elif isinstance(self.selector_query, XPathSelectorQuery):
             return By.XPATH
         else:
-            raise Exception()
+            raise WashLanguageError(f'Selector query "{self.selector_query.__class__.__name__}" '
+                                    f'is not supported in explicit wait commands.')
 
-    def __get_expected_condition(self):
-        from selenium.webdriver.support import expected_conditions as ec
 
-        if self.rule == 'present':
-            return ec.presence_of_element_located((self.__get_by(), self.selector_query.query_value.value))
-        if self.rule == 'visible':
-            return ec.visibility_of_element_located((self.__get_by(), self.selector_query.query_value.value))
-        if self.rule == 'clickable':
-            return ec.element_to_be_clickable((self.__get_by(), self.selector_query.query_value.value))
+class PageStateWaitCommand(DynamicExpression):
+    def __init__(self, parent, state, period=None, timeout_value=None):
+        super().__init__(parent)
+        self.state = state
+        self.period = period
+        self.timeout_value = timeout_value
+
+    def execute(self, execution_context):
+        timeout = self.timeout_value if self.timeout_value is not None else DEFAULT_WAIT_TIMEOUT
+        if self.state == 'network idle':
+            wait_for_network_idle(execution_context, idle_time=self.__get_period(DEFAULT_NETWORK_IDLE_TIME),
+                                  timeout=timeout)
+        elif self.state == 'dom stable':
+            wait_for_dom_stable(execution_context, quiet_time=self.__get_period(DEFAULT_DOM_QUIET_TIME),
+                                timeout=timeout)
+
+    def __get_period(self, default_period: float) -> float:
+        """
+        Returns the period (e.g. '300ms', '1.5s') in seconds.
+        """
+        if not self.period:
+            return default_period
+
+        value, unit = re.fullmatch(r'(\d+(?:\.\d+)?)\s*(ms|s)', self.period).groups()
+        return float(value) / 1000 if unit == 'ms' else float(value)
 
 
 class NavigationCommand(DynamicExpression):
@@ -504,18 +788,19 @@ class NavigationCommand(DynamicExpression):
 
     def execute(self, execution_context):
         # TODO: Raise exception if not a web driver instance
-        execution_context.get(self.url)
+        with get_metrics_registry().timer('wash_page_load_seconds'), get_tracer().span('wash.open', url=self.url):
+            execution_context.get(self.url)
 
 
 wash_classes = [
     WashScript,
     Configuration, ConfigurationEntry, ConfigurationParameterValue,
     OpenURLStatement, OpenFileStatement, OpenStringStatement,
-    StaticExpression, ContextExpression, 
+    StaticExpression, ContextExpression, ScrollCollectExpression, ScrollStopCondition,
     IndexSelectorQuery, IDSelectorQuery, NameSelectorQuery, TagSelectorQuery, ClassSelectorQuery,
     CSSSelectorQuery, XPathSelectorQuery, 
-    DataQuery,
-    QueryValue,
+    DataQuery, ValueTransform,
+    QueryValue, DataQueryValue,
     MouseEventCommand, ScriptExecutionCommand, KeyboardEventCommand,
-    SleepCommand, ExplicitWaitCommand, NavigationCommand
+    SleepCommand, ExplicitWaitCommand, ExplicitWaitCondition, PageStateWaitCommand, NavigationCommand
 ]
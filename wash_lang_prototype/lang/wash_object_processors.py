@@ -1,15 +1,28 @@
+from collections import Counter
+
 from wash_lang_prototype.core.exceptions import WashLanguageError
+from wash_lang_prototype.core.transforms import TransformPipeline
+from wash_lang_prototype.lang.wash import ConfigurationSettings
 
 
-def configuration_object_processor(configuration):
+def wash_script_object_processor(wash_script):
     """
     Validates if all Configuration names are unique in the WASH script.
     """
-    configuration_names = [configuration.name for configuration in configuration.parent.configuration_definitions]
-    for configuration_name in configuration_names:
-        if configuration_names.count(configuration_name) > 1:
-            raise WashLanguageError(f'Configuration with the name {configuration_name} already exists. '
+    configuration_names = set()
+    for configuration in wash_script.configuration_definitions:
+        if configuration.name in configuration_names:
+            raise WashLanguageError(f'Configuration with the name {configuration.name} already exists. '
                                     f'Names of configurations in a WASH script must be unique.')
+        configuration_names.add(configuration.name)
+
+
+def configuration_object_processor(configuration):
+    """
+    Resolves the settings of the Configuration (see ConfigurationSettings), so that the configuration values
+    are not looked up in the configuration entries each time they are read.
+    """
+    configuration.settings = ConfigurationSettings.from_configuration(configuration)
 
 
 def configuration_entry_object_processor(configuration_entry):
@@ -19,7 +32,8 @@ def configuration_entry_object_processor(configuration_entry):
         2. If values for all required parameters are unique in a single configuration entry.
         3. If all values in a single configuration entry are defined as values in the relevant ConfigurationOption.
     """
-    parameters_in_configuration_entry = [p.parameter for p in configuration_entry.parameters]
+    parameters_in_configuration_entry = Counter(p.parameter for p in configuration_entry.parameters)
+    option_parameters = set(configuration_entry.type.parameters)
 
     for parameter in configuration_entry.type.parameters:
         if parameter.required and parameter not in parameters_in_configuration_entry:
@@ -27,12 +41,12 @@ def configuration_entry_object_processor(configuration_entry):
                                     f'{configuration_entry.type.name} configuration option '
                                     f'in the configuration "{configuration_entry.parent.name}"')
 
-    for parameter_entry in parameters_in_configuration_entry:
-        if parameter_entry not in configuration_entry.type.parameters:
+    for parameter_entry, count in parameters_in_configuration_entry.items():
+        if parameter_entry not in option_parameters:
             raise WashLanguageError(f'Unknown/Unsupported parameter "{parameter_entry.name}" of configuration option '
                                     f'{configuration_entry.type.name} has been defined '
                                     f'in the configuration "{configuration_entry.parent.name}"')
-        if parameters_in_configuration_entry.count(parameter_entry) > 1:
+        if count > 1:
             raise WashLanguageError(f'Parameter "{parameter_entry.name}" of configuration option '
                                     f'{configuration_entry.type.name} has been defined '
                                     f'multiple times in the configuration "{configuration_entry.parent.name}"')
@@ -77,9 +91,65 @@ def configuration_parameter_value_object_processor(configuration_parameter_value
 
 def static_expression_object_processor(static_expression):
     """
-    Validates if a static expression has a context expression specified in the WASH script.
+    Validates:
+        1. If a static expression has a context expression specified in the WASH script.
+        2. If a static expression with a result type has no context expression (i.e. its result is a value).
     """
     both_specified = static_expression.context_expression and static_expression.context_expression_ref
     if both_specified:
         raise WashLanguageError(f'Static expression with the result key {static_expression.result_key} is not valid. '
                                 f'Either a context expression or a reference to a context expression are allowed.')
+
+    has_context_expression = static_expression.context_expression or static_expression.context_expression_ref
+    if static_expression.result_type and has_context_expression:
+        raise WashLanguageError(f'Static expression with the result key {static_expression.result_key} is not valid. '
+                                f'A result type cannot be specified for an expression with a context expression.')
+
+
+def data_query_object_processor(data_query):
+    """
+    Validates the value transforms of a data query, and compiles them (see TransformPipeline),
+    so that regular expressions are not compiled each time the query is executed.
+    """
+    if data_query.transforms and data_query.query_value.value in ('image', 'screenshot'):
+        raise WashLanguageError(f'Value transforms cannot be applied to the "{data_query.query_value.value}" '
+                                f'data query.')
+
+    data_query.pipeline = TransformPipeline(data_query.transforms)
+
+
+def explicit_wait_command_object_processor(explicit_wait_command):
+    """
+    Validates if conditions of an explicit wait command are combined using a single operator ('and' or 'or').
+    """
+    if len(set(explicit_wait_command.operators)) > 1:
+        raise WashLanguageError('Conditions of an explicit wait command must be combined either using "and" or "or" '
+                                '(mixing both is not supported).')
+
+
+def scroll_collect_expression_object_processor(scroll_collect_expression):
+    """
+    Validates:
+        1. If a scroll and collect expression has exactly one context expression (or reference) specified.
+        2. If the key of the expression is a result key of its context expression.
+        3. If each stop condition is specified at most once, and the item count is positive.
+    """
+    result_key = scroll_collect_expression.result_key
+    if bool(scroll_collect_expression.context_expression) == bool(scroll_collect_expression.context_expression_ref):
+        raise WashLanguageError(f'Scroll and collect expression with the result key {result_key} is not valid. '
+                                f'Either a context expression or a reference to a context expression is required.')
+
+    context_expression = scroll_collect_expression.get_context_expression()
+    key = scroll_collect_expression.key
+    if key and key not in (expression.result_key for expression in context_expression.expressions):
+        raise WashLanguageError(f'Key "{key}" of the scroll and collect expression with the result key {result_key} '
+                                f'is not a result key of its context expression.')
+
+    stop_conditions = scroll_collect_expression.stop_conditions
+    if sum(1 for condition in stop_conditions if condition.count is not None) > 1 or \
+            sum(1 for condition in stop_conditions if condition.no_new_items) > 1:
+        raise WashLanguageError(f'Stop conditions of the scroll and collect expression with the result key '
+                                f'{result_key} must be unique.')
+    if any(condition.count is not None and condition.count <= 0 for condition in stop_conditions):
+        raise WashLanguageError(f'Item count of the scroll and collect expression with the result key {result_key} '
+                                f'must be positive.')
@@ -4,8 +4,11 @@ import os
 from textx import metamodel_for_language
 
 from wash_lang_prototype.core.exceptions import WashError, WashLanguageError
-from wash_lang_prototype.core.executor import WashExecutor, create_executor_instance, ExecutionResult
+from wash_lang_prototype.core.executor import WashExecutor, create_executor_instance, ExecutionResult, \
+    launch_default_browser
 from wash_lang_prototype.core.options import WashOptions
+from wash_lang_prototype.core.sinks import ResultSink
+from wash_lang_prototype.core.tracing import get_tracer
 
 
 class Wash:
@@ -63,31 +66,57 @@ class Wash:
             encoding(str): The encoding to be used for reading the contents of the WASH script file.
             debug(bool): Indicates whether debug messages should be printed or not.
         """
+        # NOTE: With prelaunch_browser enabled, the default browser is started while the script is parsed.
+        # The executor uses the launch if the configuration resolves to the same browser (and options),
+        # otherwise the launch is discarded and the configured browser is started right away.
+        browser_launch = None
+        if options.prelaunch_browser and not kwargs.get('webdriver_pool'):
+            browser_launch = launch_default_browser(options)
         try:
-            metamodel = metamodel_for_language('wash')
-            model = metamodel.model_from_str(script, encoding=encoding, file_name=script_file_path, debug=debug)
+            with get_tracer().span('wash.parse', script_file_path=script_file_path):
+                metamodel = metamodel_for_language('wash')
+                model = metamodel.model_from_str(script, encoding=encoding, file_name=script_file_path, debug=debug)
 
             # NOTE: Providing the filename as parameter is required as a workaround
             # for using model_from_str having _tx_filename set at the same time.
 
             executor = create_executor_instance(script=script, options=options, metamodel=metamodel,
-                                                model=model, debug=debug, **kwargs)
+                                                model=model, debug=debug, browser_launch=browser_launch, **kwargs)
 
             return Wash(executor=executor)
         except WashError:
+            if browser_launch:
+                browser_launch.discard()
             raise
         except Exception as e:
+            if browser_launch:
+                browser_launch.discard()
             message = e.message if hasattr(e, 'message') else str(e)
             raise WashLanguageError(message)
 
-    def execute(self) -> ExecutionResult:
+    def execute(self, result_sink: ResultSink = None, select: list[str] = None) -> ExecutionResult:
         """
         Executes the WASH script and returns the execution result in form of a typed object.
+
+        Args:
+            result_sink(ResultSink): Optional sink (e.g. CSV, SQLite, Parquet) the items of top-level result keys
+                                     are written to while the script is being executed.
+            select(list[str]): Optional dot-separated paths of the only result keys to be extracted
+                               (e.g. ['top_ten.link.link_url']).
         """
-        return self.__executor.execute()
+        return self.__executor.execute(result_sink=result_sink, select=select)
 
-    def execute_as_json(self) -> str:
+    def execute_as_json(self, select: list[str] = None) -> str:
         """
         Executes the WASH script and returns the execution result as a JSON string value.
+
+        Args:
+            select(list[str]): Optional dot-separated paths of the only result keys to be extracted.
+        """
+        return self.__executor.execute(select=select).to_json()
+
+    def close(self):
+        """
+        Quits the browser started in advance (see WashOptions.prelaunch_browser) if the script has not been executed.
         """
-        return self.__executor.execute().to_json()
+        self.__executor.close()